@@ -0,0 +1,79 @@
+"""
+Alembic environment for the coding platform schema
+Uses DATABASE_URL, or a connection passed in by init_db()
+"""
+
+import asyncio
+from logging.config import fileConfig
+
+from sqlalchemy import pool, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from alembic import context
+
+from database.connection import Base, DATABASE_URL, MIGRATION_LOCK_KEY
+
+# Import all models to register them
+from models.user import User  # noqa: F401
+from models.lesson import Lesson  # noqa: F401
+from models.progress import UserProgress  # noqa: F401
+from models.submission import CodeSubmission  # noqa: F401
+from models.blob import ContentBlob  # noqa: F401
+from models.version import LessonVersion  # noqa: F401
+from models.stats import LessonStats  # noqa: F401
+
+config = context.config
+
+# Only configure logging when run from the alembic CLI; workers keep loguru
+if config.config_file_name is not None and "connection" not in config.attributes:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+def run_migrations_offline() -> None:
+    """
+    Emit SQL to stdout instead of running it (alembic upgrade --sql)
+    """
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata)
+
+    with context.begin_transaction():
+        # Same lock as init_db(): replicas that run `alembic upgrade head`
+        # together queue here, and the later ones find nothing left to do
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        context.run_migrations()
+
+async def run_async_migrations() -> None:
+    """
+    Run migrations on a fresh connection to DATABASE_URL
+    """
+    connectable = create_async_engine(DATABASE_URL, poolclass=pool.NullPool)
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        # Called from init_db() through AsyncConnection.run_sync()
+        do_run_migrations(connection)
+    else:
+        asyncio.run(run_async_migrations())
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
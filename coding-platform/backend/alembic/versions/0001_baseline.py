@@ -0,0 +1,104 @@
+"""Baseline schema
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+Tables as originally created by Base.metadata.create_all(). Databases
+that already have them are left untouched, so `alembic upgrade head`
+works on both new and existing installations.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_baseline"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("users"):
+        return
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("username", sa.String(100), nullable=False),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("full_name", sa.String(200)),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("is_admin", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("last_login", sa.DateTime(timezone=True)),
+        sa.Column("total_submissions", sa.Integer()),
+        sa.Column("successful_submissions", sa.Integer()),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "lessons",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("title", sa.String(200), nullable=False),
+        sa.Column("slug", sa.String(200), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("difficulty", sa.String(50)),
+        sa.Column("order", sa.Integer()),
+        sa.Column("starter_code", sa.Text()),
+        sa.Column("solution_code", sa.Text()),
+        sa.Column("test_cases", sa.JSON()),
+        sa.Column("language", sa.String(50)),
+        sa.Column("estimated_time", sa.Integer()),
+        sa.Column("tags", sa.JSON()),
+        sa.Column("is_published", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_lessons_slug", "lessons", ["slug"], unique=True)
+
+    op.create_table(
+        "user_progress",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("lesson_id", sa.String(), sa.ForeignKey("lessons.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("is_completed", sa.Boolean()),
+        sa.Column("attempts", sa.Integer()),
+        sa.Column("best_score", sa.Integer()),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("completed_at", sa.DateTime(timezone=True)),
+        sa.Column("last_attempt_at", sa.DateTime(timezone=True)),
+    )
+
+    op.create_table(
+        "code_submissions",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("lesson_id", sa.String(), sa.ForeignKey("lessons.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("code", sa.Text(), nullable=False),
+        sa.Column("language", sa.String(50)),
+        sa.Column("output", sa.Text()),
+        sa.Column("error", sa.Text()),
+        sa.Column("execution_time", sa.Float()),
+        sa.Column("memory_used", sa.Integer()),
+        sa.Column("exit_code", sa.Integer()),
+        sa.Column("tests_passed", sa.Integer()),
+        sa.Column("tests_failed", sa.Integer()),
+        sa.Column("test_results", sa.JSON()),
+        sa.Column("status", sa.String(50)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("code_submissions")
+    op.drop_table("user_progress")
+    op.drop_table("lessons")
+    op.drop_table("users")
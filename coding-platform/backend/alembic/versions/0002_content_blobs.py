@@ -0,0 +1,48 @@
+"""Content-addressed blob store for submission payloads
+
+Revision ID: 0002_content_blobs
+Revises: 0001_baseline
+Create Date: 2026-10-19 09:01:00.000000
+
+Existing submissions are moved into content_blobs by the backfill task:
+python -m tasks.storage
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_content_blobs"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: databases created by create_all() already have these
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS content_blobs (
+            hash VARCHAR(64) PRIMARY KEY,
+            codec VARCHAR(10) NOT NULL,
+            data BYTEA NOT NULL,
+            size INTEGER NOT NULL,
+            created_at TIMESTAMPTZ DEFAULT now()
+        )
+    """)
+    op.execute("""
+        ALTER TABLE code_submissions
+            ALTER COLUMN code DROP NOT NULL,
+            ADD COLUMN IF NOT EXISTS code_ref VARCHAR(64),
+            ADD COLUMN IF NOT EXISTS output_ref VARCHAR(64),
+            ADD COLUMN IF NOT EXISTS error_ref VARCHAR(64),
+            ADD COLUMN IF NOT EXISTS test_results_ref VARCHAR(64)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column("code_submissions", "test_results_ref")
+    op.drop_column("code_submissions", "error_ref")
+    op.drop_column("code_submissions", "output_ref")
+    op.drop_column("code_submissions", "code_ref")
+    op.drop_table("content_blobs")
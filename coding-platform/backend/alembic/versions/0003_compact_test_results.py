@@ -0,0 +1,33 @@
+"""Compact test results pinned to a lesson test-suite version
+
+Revision ID: 0003_compact_test_results
+Revises: 0002_content_blobs
+Create Date: 2026-10-19 09:02:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_compact_test_results"
+down_revision: Union[str, None] = "0002_content_blobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE lessons "
+        "ADD COLUMN IF NOT EXISTS test_suite_version INTEGER NOT NULL DEFAULT 1"
+    )
+    op.execute(
+        "ALTER TABLE code_submissions "
+        "ADD COLUMN IF NOT EXISTS test_suite_version INTEGER"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("code_submissions", "test_suite_version")
+    op.drop_column("lessons", "test_suite_version")
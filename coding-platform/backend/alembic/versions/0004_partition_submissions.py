@@ -0,0 +1,109 @@
+"""Partition code_submissions by month on created_at
+
+Revision ID: 0004_partition_submissions
+Revises: 0003_compact_test_results
+Create Date: 2026-10-19 09:03:00.000000
+
+A plain table is renamed, recreated as a partitioned table, filled with
+one INSERT ... SELECT and dropped. Databases already partitioned by
+create_all() only get the index and upcoming partitions.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from database.partitions import PARENT_TABLE, ensure_partitions, month_start
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_partition_submissions"
+down_revision: Union[str, None] = "0003_compact_test_results"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LEGACY_TABLE = f"{PARENT_TABLE}_legacy"
+
+COLUMNS = (
+    "id", "user_id", "lesson_id", "code", "code_ref", "language",
+    "output", "output_ref", "error", "error_ref", "execution_time",
+    "memory_used", "exit_code", "tests_passed", "tests_failed",
+    "test_results", "test_results_ref", "test_suite_version", "status",
+    "created_at",
+)
+
+
+def is_partitioned(conn) -> bool:
+    return conn.execute(sa.text(
+        "SELECT c.relkind FROM pg_class c "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relname = :name AND n.nspname = current_schema()"
+    ), {"name": PARENT_TABLE}).scalar_one_or_none() == "p"
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    if not is_partitioned(conn):
+        op.execute(f"ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_TABLE}")
+        op.execute(
+            f"ALTER TABLE {LEGACY_TABLE} "
+            f"RENAME CONSTRAINT {PARENT_TABLE}_pkey TO {LEGACY_TABLE}_pkey"
+        )
+        op.execute(f"""
+            CREATE TABLE {PARENT_TABLE} (
+                id VARCHAR NOT NULL,
+                user_id VARCHAR NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+                lesson_id VARCHAR REFERENCES lessons (id) ON DELETE CASCADE,
+                code TEXT,
+                code_ref VARCHAR(64),
+                language VARCHAR(50),
+                output TEXT,
+                output_ref VARCHAR(64),
+                error TEXT,
+                error_ref VARCHAR(64),
+                execution_time FLOAT,
+                memory_used INTEGER,
+                exit_code INTEGER,
+                tests_passed INTEGER,
+                tests_failed INTEGER,
+                test_results JSON,
+                test_results_ref VARCHAR(64),
+                test_suite_version INTEGER,
+                status VARCHAR(50),
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """)
+
+        oldest = conn.execute(sa.text(f"SELECT min(created_at) FROM {LEGACY_TABLE}")).scalar()
+        ensure_partitions(conn, first_month=month_start(oldest) if oldest else None)
+
+        columns = ", ".join(COLUMNS)
+        values = ", ".join(
+            "coalesce(created_at, now())" if name == "created_at" else name
+            for name in COLUMNS
+        )
+        op.execute(f"INSERT INTO {PARENT_TABLE} ({columns}) SELECT {values} FROM {LEGACY_TABLE}")
+        op.execute(f"DROP TABLE {LEGACY_TABLE}")
+    else:
+        ensure_partitions(conn)
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_code_submissions_user_created "
+        f"ON {PARENT_TABLE} (user_id, created_at)"
+    )
+
+
+def downgrade() -> None:
+    columns = ", ".join(COLUMNS)
+    op.execute(f"ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_TABLE}")
+    op.execute(f"CREATE TABLE {PARENT_TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS)")
+    op.execute(f"INSERT INTO {PARENT_TABLE} ({columns}) SELECT {columns} FROM {LEGACY_TABLE}")
+    op.execute(f"DROP TABLE {LEGACY_TABLE} CASCADE")
+    op.execute(f"ALTER TABLE {PARENT_TABLE} ADD PRIMARY KEY (id)")
+    op.execute(
+        f"ALTER TABLE {PARENT_TABLE} "
+        "ADD FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE, "
+        "ADD FOREIGN KEY (lesson_id) REFERENCES lessons (id) ON DELETE CASCADE"
+    )
@@ -0,0 +1,80 @@
+"""Native UUID primary and foreign keys
+
+Revision ID: 0005_native_uuid_keys
+Revises: 0004_partition_submissions
+Create Date: 2026-10-19 10:00:00.000000
+
+Converts the VARCHAR id columns (36-byte text) to 16-byte uuid. Existing
+ids are uuid4 strings and convert in place; new rows get UUIDv7 values
+from database.ids.uuid7. Each table is rewritten once, so run this in a
+maintenance window on large databases.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_native_uuid_keys"
+down_revision: Union[str, None] = "0004_partition_submissions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referenced table); keys are recreated with Postgres default names
+FOREIGN_KEYS = (
+    ("user_progress", "user_id", "users"),
+    ("user_progress", "lesson_id", "lessons"),
+    ("code_submissions", "user_id", "users"),
+    ("code_submissions", "lesson_id", "lessons"),
+)
+
+ID_COLUMNS = {
+    "users": ("id",),
+    "lessons": ("id",),
+    "user_progress": ("id", "user_id", "lesson_id"),
+    "code_submissions": ("id", "user_id", "lesson_id"),
+}
+
+
+def foreign_key_names(conn, table: str, column: str) -> list:
+    # 0004 recreates code_submissions while the legacy table still holds
+    # the default names, so its keys may be suffixed (..._fkey1)
+    return conn.execute(sa.text(
+        "SELECT c.conname FROM pg_constraint c "
+        "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey) "
+        "WHERE c.conrelid = to_regclass(:table) AND c.contype = 'f' "
+        "AND c.conparentid = 0 AND a.attname = :column"
+    ), {"table": table, "column": column}).scalars().all()
+
+
+def convert(column_type: str) -> None:
+    conn = op.get_bind()
+
+    # Foreign keys cannot span a type change, so drop them first
+    for table, column, _ in FOREIGN_KEYS:
+        for name in foreign_key_names(conn, table, column):
+            op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+
+    for table, columns in ID_COLUMNS.items():
+        op.execute(
+            f"ALTER TABLE {table} "
+            + ", ".join(
+                f"ALTER COLUMN {column} TYPE {column_type} USING {column}::{column_type}"
+                for column in columns
+            )
+        )
+
+    for table, column, referenced in FOREIGN_KEYS:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey "
+            f"FOREIGN KEY ({column}) REFERENCES {referenced} (id) ON DELETE CASCADE"
+        )
+
+
+def upgrade() -> None:
+    convert("uuid")
+
+
+def downgrade() -> None:
+    convert("varchar")
@@ -0,0 +1,46 @@
+"""Normalized, case-insensitive usernames and emails
+
+Revision ID: 0006_normalized_logins
+Revises: 0005_native_uuid_keys
+Create Date: 2026-10-19 11:00:00.000000
+
+Adds lowercased username/email columns with unique indexes and drops the
+case-sensitive unique indexes they supersede. Fails if existing accounts
+differ only in case; merge or rename those first.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_normalized_logins"
+down_revision: Union[str, None] = "0005_native_uuid_keys"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("email_normalized", sa.String(255)))
+    op.add_column("users", sa.Column("username_normalized", sa.String(100)))
+    op.execute(
+        "UPDATE users SET email_normalized = lower(trim(email)), "
+        "username_normalized = lower(trim(username))"
+    )
+    op.alter_column("users", "email_normalized", nullable=False)
+    op.alter_column("users", "username_normalized", nullable=False)
+
+    op.create_index("ix_users_email_normalized", "users", ["email_normalized"], unique=True)
+    op.create_index("ix_users_username_normalized", "users", ["username_normalized"], unique=True)
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_username", table_name="users")
+
+
+def downgrade() -> None:
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.drop_index("ix_users_username_normalized", table_name="users")
+    op.drop_index("ix_users_email_normalized", table_name="users")
+    op.drop_column("users", "username_normalized")
+    op.drop_column("users", "email_normalized")
@@ -0,0 +1,28 @@
+"""Organization on users for shared execution quotas
+
+Revision ID: 0007_user_organization
+Revises: 0006_normalized_logins
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_user_organization"
+down_revision: Union[str, None] = "0006_normalized_logins"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("organization", sa.String(100)))
+    op.create_index("ix_users_organization", "users", ["organization"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_organization", table_name="users")
+    op.drop_column("users", "organization")
@@ -0,0 +1,92 @@
+"""Pre-rendered and pre-compressed lesson content
+
+Revision ID: 0008_lesson_rendered_content
+Revises: 0007_user_organization
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import gzip
+import markdown
+import nh3
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_lesson_rendered_content"
+down_revision: Union[str, None] = "0007_user_organization"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Render settings copied from database/rendering.py rather than imported, so
+# this revision keeps its meaning if the renderer changes
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+MARKDOWN_EXTENSIONS = ["fenced_code", "codehilite", "tables", "sane_lists", "nl2br"]
+MARKDOWN_CONFIG = {"codehilite": {"css_class": "highlight", "guess_lang": False}}
+ALLOWED_ATTRIBUTES = {
+    **nh3.ALLOWED_ATTRIBUTES,
+    "code": {"class"},
+    "div": {"class"},
+    "pre": {"class"},
+    "span": {"class"},
+}
+
+
+def render_content(source):
+    if source is None:
+        return None, None, None
+    html = nh3.clean(
+        markdown.markdown(
+            source,
+            extensions=MARKDOWN_EXTENSIONS,
+            extension_configs=MARKDOWN_CONFIG,
+            output_format="html",
+        ),
+        attributes=ALLOWED_ATTRIBUTES,
+    )
+    data = html.encode("utf-8")
+    gzipped = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    brotlied = brotli.compress(data, quality=BROTLI_QUALITY) if brotli is not None else None
+    return html, gzipped, brotlied
+
+
+def upgrade() -> None:
+    op.add_column("lessons", sa.Column("content_html", sa.Text()))
+    op.add_column("lessons", sa.Column("content_gzip", sa.LargeBinary()))
+    op.add_column("lessons", sa.Column("content_br", sa.LargeBinary()))
+
+    # Render existing lessons once; new writes are rendered by the model.
+    # Offline SQL skips this and the catalog renders missing rows on load.
+    if op.get_context().as_sql:
+        return
+
+    lessons = sa.table(
+        "lessons",
+        sa.column("id"),
+        sa.column("content", sa.Text()),
+        sa.column("content_html", sa.Text()),
+        sa.column("content_gzip", sa.LargeBinary()),
+        sa.column("content_br", sa.LargeBinary()),
+    )
+    conn = op.get_bind()
+    for row in conn.execute(sa.select(lessons.c.id, lessons.c.content)).all():
+        html, gzipped, brotlied = render_content(row.content)
+        conn.execute(
+            lessons.update()
+            .where(lessons.c.id == row.id)
+            .values(content_html=html, content_gzip=gzipped, content_br=brotlied)
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("lessons", "content_br")
+    op.drop_column("lessons", "content_gzip")
+    op.drop_column("lessons", "content_html")
@@ -0,0 +1,57 @@
+"""Lesson listing indexes and JSONB tags
+
+Revision ID: 0009_lesson_listing_indexes
+Revises: 0008_lesson_rendered_content
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_lesson_listing_indexes"
+down_revision: Union[str, None] = "0008_lesson_rendered_content"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keyset pagination compares (order, id) rows, which NULLs would break
+    op.execute('UPDATE lessons SET "order" = 0 WHERE "order" IS NULL')
+    op.alter_column("lessons", "order", existing_type=sa.Integer(), nullable=False)
+
+    # GIN containment (@>) on tags needs jsonb
+    op.alter_column(
+        "lessons", "tags",
+        type_=postgresql.JSONB(),
+        existing_type=sa.JSON(),
+        postgresql_using="tags::jsonb",
+    )
+
+    published = sa.text("is_published")
+    op.create_index("ix_lessons_published_order", "lessons", ["order", "id"], postgresql_where=published)
+    op.create_index("ix_lessons_difficulty_order", "lessons", ["difficulty", "order", "id"], postgresql_where=published)
+    op.create_index("ix_lessons_language_order", "lessons", ["language", "order", "id"], postgresql_where=published)
+    op.create_index(
+        "ix_lessons_tags", "lessons", ["tags"],
+        postgresql_using="gin",
+        postgresql_ops={"tags": "jsonb_path_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_lessons_tags", table_name="lessons")
+    op.drop_index("ix_lessons_language_order", table_name="lessons")
+    op.drop_index("ix_lessons_difficulty_order", table_name="lessons")
+    op.drop_index("ix_lessons_published_order", table_name="lessons")
+    op.alter_column(
+        "lessons", "tags",
+        type_=sa.JSON(),
+        existing_type=postgresql.JSONB(),
+        postgresql_using="tags::json",
+    )
+    op.alter_column("lessons", "order", existing_type=sa.Integer(), nullable=True)
@@ -0,0 +1,42 @@
+"""Lesson full-text search vector
+
+Revision ID: 0010_lesson_search
+Revises: 0009_lesson_listing_indexes
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_lesson_search"
+down_revision: Union[str, None] = "0009_lesson_listing_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copied rather than imported so this revision keeps its meaning if the model changes
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(jsonb_to_tsvector('english', coalesce(tags, '[]'::jsonb), '[\"string\"]'), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    # A stored generated column is filled for existing rows by the ALTER and
+    # kept current by Postgres on every write
+    op.add_column(
+        "lessons",
+        sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True)),
+    )
+    op.create_index("ix_lessons_search", "lessons", ["search_vector"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_lessons_search", table_name="lessons")
+    op.drop_column("lessons", "search_vector")
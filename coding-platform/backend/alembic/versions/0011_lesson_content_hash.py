@@ -0,0 +1,27 @@
+"""Lesson content-pack hash
+
+Revision ID: 0011_lesson_content_hash
+Revises: 0010_lesson_search
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011_lesson_content_hash"
+down_revision: Union[str, None] = "0010_lesson_search"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing lessons start without a hash and are rewritten by their first sync
+    op.add_column("lessons", sa.Column("content_hash", sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("lessons", "content_hash")
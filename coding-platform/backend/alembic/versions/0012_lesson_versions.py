@@ -0,0 +1,96 @@
+"""Immutable lesson versions
+
+Revision ID: 0012_lesson_versions
+Revises: 0011_lesson_content_hash
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import hashlib
+import orjson
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012_lesson_versions"
+down_revision: Union[str, None] = "0011_lesson_content_hash"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copied from database/versions.py rather than imported, so this revision
+# keeps its meaning if the versioned fields or the hash change
+VERSIONED_FIELDS = ("title", "description", "content", "starter_code", "test_cases", "language")
+
+
+def version_hash(values) -> str:
+    fields = {name: values.get(name) for name in VERSIONED_FIELDS}
+    return hashlib.blake2b(orjson.dumps(fields, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+
+def upgrade() -> None:
+    op.create_table(
+        "lesson_versions",
+        sa.Column("lesson_id", sa.Uuid(as_uuid=False), sa.ForeignKey("lessons.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("number", sa.Integer(), nullable=False),
+        sa.Column("content_hash", sa.String(length=32), nullable=False),
+        sa.Column("title", sa.String(length=200), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("content_html", sa.Text()),
+        sa.Column("content_gzip", sa.LargeBinary()),
+        sa.Column("content_br", sa.LargeBinary()),
+        sa.Column("starter_code", sa.Text()),
+        sa.Column("test_cases", sa.JSON()),
+        sa.Column("test_suite_version", sa.Integer(), nullable=False),
+        sa.Column("language", sa.String(length=50)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+        sa.PrimaryKeyConstraint("lesson_id", "number"),
+    )
+
+    # Every existing lesson becomes version 1 of itself
+    op.add_column("lessons", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+    op.alter_column("lessons", "version", server_default=None)
+    op.execute(
+        "INSERT INTO lesson_versions (lesson_id, number, content_hash, title, description, content, "
+        "content_html, content_gzip, content_br, starter_code, test_cases, test_suite_version, language) "
+        "SELECT id, 1, '', title, description, content, content_html, content_gzip, content_br, "
+        "starter_code, test_cases, test_suite_version, language FROM lessons"
+    )
+    op.create_foreign_key(
+        "fk_lessons_current_version", "lessons", "lesson_versions",
+        ["id", "version"], ["lesson_id", "number"],
+        deferrable=True, initially="DEFERRED",
+    )
+
+    # Parent of the monthly partitions; the column propagates to each
+    op.add_column("code_submissions", sa.Column("lesson_version", sa.Integer()))
+
+    # Hashes are computed in Python to match new versions. Offline SQL
+    # leaves them empty, and a content sync then writes one extra version.
+    if op.get_context().as_sql:
+        return
+
+    versions = sa.table(
+        "lesson_versions",
+        sa.column("lesson_id"),
+        sa.column("number"),
+        sa.column("content_hash", sa.String()),
+        *(sa.column(name, sa.JSON() if name == "test_cases" else sa.Text()) for name in VERSIONED_FIELDS),
+    )
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(versions.c.lesson_id, *(versions.c[name] for name in VERSIONED_FIELDS))).all()
+    for row in rows:
+        conn.execute(
+            versions.update()
+            .where(versions.c.lesson_id == row.lesson_id, versions.c.number == 1)
+            .values(content_hash=version_hash(row._mapping))
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("code_submissions", "lesson_version")
+    op.drop_constraint("fk_lessons_current_version", "lessons", type_="foreignkey")
+    op.drop_column("lessons", "version")
+    op.drop_table("lesson_versions")
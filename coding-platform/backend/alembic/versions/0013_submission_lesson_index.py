@@ -0,0 +1,29 @@
+"""Index submissions by user, lesson and time
+
+Revision ID: 0013_submission_lesson_index
+Revises: 0012_lesson_versions
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0013_submission_lesson_index"
+down_revision: Union[str, None] = "0012_lesson_versions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Created on the partitioned parent, so every partition gets one
+    op.create_index(
+        "ix_code_submissions_user_lesson_created", "code_submissions",
+        ["user_id", "lesson_id", "created_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_code_submissions_user_lesson_created", table_name="code_submissions")
@@ -0,0 +1,54 @@
+"""One progress row per user and lesson
+
+Revision ID: 0014_unique_user_progress
+Revises: 0013_submission_lesson_index
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0014_unique_user_progress"
+down_revision: Union[str, None] = "0013_submission_lesson_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Concurrent get-or-create could leave duplicates; fold them into the
+    # oldest row before the constraint goes on
+    op.execute("""
+        UPDATE user_progress AS keep
+        SET attempts = merged.attempts,
+            best_score = merged.best_score,
+            is_completed = merged.is_completed,
+            completed_at = merged.completed_at,
+            last_attempt_at = merged.last_attempt_at
+        FROM (
+            SELECT min(id::text)::uuid AS id,
+                   sum(coalesce(attempts, 0)) AS attempts,
+                   max(coalesce(best_score, 0)) AS best_score,
+                   bool_or(coalesce(is_completed, false)) AS is_completed,
+                   min(completed_at) AS completed_at,
+                   max(last_attempt_at) AS last_attempt_at
+            FROM user_progress
+            GROUP BY user_id, lesson_id
+            HAVING count(*) > 1
+        ) AS merged
+        WHERE keep.id = merged.id
+    """)
+    op.execute("""
+        DELETE FROM user_progress AS dup
+        USING user_progress AS keep
+        WHERE dup.user_id = keep.user_id
+          AND dup.lesson_id = keep.lesson_id
+          AND dup.id::text > keep.id::text
+    """)
+    op.create_unique_constraint("uq_user_progress_user_lesson", "user_progress", ["user_id", "lesson_id"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_user_progress_user_lesson", "user_progress", type_="unique")
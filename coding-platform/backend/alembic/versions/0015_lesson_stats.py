@@ -0,0 +1,40 @@
+"""Per-lesson statistics
+
+Revision ID: 0015_lesson_stats
+Revises: 0014_unique_user_progress
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0015_lesson_stats"
+down_revision: Union[str, None] = "0014_unique_user_progress"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled as submissions arrive; run `python -m tasks.stats` to backfill
+    op.create_table(
+        "lesson_stats",
+        sa.Column("lesson_id", sa.Uuid(as_uuid=False), sa.ForeignKey("lessons.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("submissions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("passed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("learners", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("learners_passed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("first_pass_attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("runtime_sketch", postgresql.JSONB()),
+        sa.Column("top_errors", postgresql.JSONB()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("reconciled_at", sa.DateTime(timezone=True)),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("lesson_stats")
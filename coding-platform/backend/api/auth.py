@@ -3,19 +3,22 @@ Authentication API endpoints
 Handles user registration, login, and JWT token management
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr, Field
 import os
 from typing import Optional
 
-from database.connection import get_db
-from models.user import User
+from database.connection import get_db, get_read_db
+from api.hashing import hash_password, verify_password
+from api.ratelimit import RateLimit, client_ip
+from api.serialization import json_response
+from models.user import User, normalize_login
 
 router = APIRouter()
 
@@ -24,17 +27,18 @@ SECRET_KEY = os.getenv("SECRET_KEY", "dev_secret_key")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Per-IP limits; a classroom often shares one address, so keep these roomy
+login_rate_limit = RateLimit("login", "20/minute")
+register_rate_limit = RateLimit("register", "10/minute")
+
 # Pydantic models
 class UserCreate(BaseModel):
     """User registration model"""
     email: EmailStr
-    username: str = Field(..., min_length=3, max_length=50)
+    username: str = Field(..., min_length=3, max_length=50, pattern=r"^[^@\s]+$")
     password: str = Field(..., min_length=8, max_length=100)
     full_name: Optional[str] = None
 
@@ -44,6 +48,7 @@ class UserResponse(BaseModel):
     email: str
     username: str
     full_name: Optional[str]
+    organization: Optional[str] = None
     is_active: bool
     created_at: datetime
 
@@ -61,14 +66,6 @@ class TokenData(BaseModel):
     user_id: Optional[str] = None
 
 # Helper functions
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str) -> str:
-    """Hash password"""
-    return pwd_context.hash(password)
-
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
@@ -80,12 +77,24 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
-) -> User:
+def user_rate_limit_key(request: Request) -> str:
     """
-    Get current authenticated user from JWT token
+    Rate limit key for authenticated routes: the token's user, or the client
+    IP when the token is missing or invalid (the route then rejects it)
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            user_id = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+            if user_id:
+                return f"user:{user_id}"
+        except JWTError:
+            pass
+    return f"ip:{client_ip(request)}"
+
+def decode_token(token: str) -> TokenData:
+    """
+    Verify a JWT token's signature and expiry and read its subject
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -97,80 +106,132 @@ async def get_current_user(
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-        token_data = TokenData(user_id=user_id)
+        return TokenData(user_id=user_id)
     except JWTError:
         raise credentials_exception
 
-    result = await db.execute(select(User).where(User.id == token_data.user_id))
+async def authenticate_token(token: str, db: AsyncSession) -> User:
+    """
+    Resolve and validate the user for a JWT token
+    """
+    return await load_active_user(decode_token(token).user_id, db)
+
+async def load_active_user(user_id: str, db: AsyncSession) -> User:
+    """
+    Look up the user behind an already verified token
+    """
+    result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
 
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
     return user
 
-# API Endpoints
-@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> User:
     """
-    Register a new user
+    Get current authenticated user from JWT token
     """
-    # Check if email already exists
-    result = await db.execute(select(User).where(User.email == user_data.email))
-    if result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
+    user = await authenticate_token(token, db)
+    # Lets the session route this user's subsequent reads to the primary
+    db.info["user_id"] = user.id
+    return user
 
-    # Check if username already exists
-    result = await db.execute(select(User).where(User.username == user_data.username))
-    if result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken"
-        )
+async def get_current_reader(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_read_db)
+) -> User:
+    """
+    Get current authenticated user for read-only endpoints
+    """
+    return await authenticate_token(token, db)
 
-    # Create new user
+async def get_token_user_id(token: str = Depends(oauth2_scheme)) -> str:
+    """
+    Get the user id from a verified JWT token without a database lookup
+
+    For catalog reads that are the same for every user; a deactivated
+    account keeps this access until its token expires.
+    """
+    return decode_token(token).user_id
+
+# API Endpoints
+@router.post(
+    "/register",
+    response_model=Token,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(register_rate_limit)]
+)
+async def register(
+    user_data: UserCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Register a new user
+    """
+    # Create new user; the unique indexes on the normalized columns reject
+    # duplicates, so there is no separate existence check to race with
     new_user = User(
         email=user_data.email,
         username=user_data.username,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await hash_password(user_data.password),
         full_name=user_data.full_name
     )
 
     db.add(new_user)
+    try:
+        # Single INSERT ... RETURNING created_at
+        await db.flush()
+    except IntegrityError as e:
+        await db.rollback()
+        if "email_normalized" in str(e.orig):
+            detail = "Email already registered"
+        else:
+            detail = "Username already taken"
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+    db.info["user_id"] = new_user.id
     await db.commit()
-    await db.refresh(new_user)
 
     # Create access token
     access_token = create_access_token(data={"sub": new_user.id})
 
-    return Token(
+    token = Token(
         access_token=access_token,
         token_type="bearer",
-        user=UserResponse.from_orm(new_user)
+        user=UserResponse.model_validate(new_user)
     )
+    # Keeps the rate limit headers set on the injected response
+    return json_response(token, response, status.HTTP_201_CREATED)
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(login_rate_limit)])
 async def login(
+    response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Login with username/email and password
     """
-    # Try to find user by username or email
-    result = await db.execute(
-        select(User).where(
-            (User.username == form_data.username) | (User.email == form_data.username)
-        )
-    )
+    # Usernames cannot contain "@", so the input shape picks exactly one index
+    login_name = normalize_login(form_data.username)
+    login_column = User.email_normalized if "@" in login_name else User.username_normalized
+    result = await db.execute(select(User).where(login_column == login_name))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await verify_password(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username/email or password",
@@ -183,25 +244,28 @@ async def login(
             detail="Inactive user"
         )
 
-    # Update last login
+    # Update last login, upgrading the stored hash if its cost changed
     user.last_login = datetime.utcnow()
+    if new_hash:
+        user.hashed_password = new_hash
     await db.commit()
 
     # Create access token
     access_token = create_access_token(data={"sub": user.id})
 
-    return Token(
+    token = Token(
         access_token=access_token,
         token_type="bearer",
-        user=UserResponse.from_orm(user)
+        user=UserResponse.model_validate(user)
     )
+    return json_response(token, response)
 
 @router.get("/me", response_model=UserResponse)
 async def get_me(current_user: User = Depends(get_current_user)):
     """
     Get current user information
     """
-    return UserResponse.from_orm(current_user)
+    return json_response(UserResponse.model_validate(current_user))
 
 @router.get("/verify")
 async def verify_token(current_user: User = Depends(get_current_user)):
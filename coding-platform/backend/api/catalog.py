@@ -0,0 +1,269 @@
+"""
+In-memory catalog of published lessons
+Each worker keeps a snapshot indexed by id and slug; admin writes bump a
+version in Redis and announce it over pub/sub so every worker reloads.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.orm import undefer_group
+from dataclasses import dataclass, field
+from bisect import bisect_left, bisect_right
+from functools import cached_property
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import os
+from loguru import logger
+
+from api.http_cache import make_etag
+from api.pagination import LessonQuery, encode_cursor
+from api.search import LESSON_SEARCH_BACKEND, SearchIndex
+from api.serialization import dump_json
+from database.cache import redis_client
+from database.rendering import render_content
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_CHANNEL = "catalog:changed"
+
+# Safety net for missed announcements: how often the Redis version is polled
+CATALOG_POLL_SECONDS = float(os.getenv("CATALOG_POLL_SECONDS", "30"))
+
+@dataclass(frozen=True)
+class RenderedContent:
+    """
+    A lesson's rendered HTML in every precomputed content-coding
+    """
+    encodings: Dict[str, bytes]  # identity, gzip, br -> body
+    etags: Dict[str, str]  # Each coding is a distinct representation
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Published lessons as validated response models and their encoded JSON,
+    replaced wholesale on reload
+    """
+    version: int
+    summaries: List = field(default_factory=list)  # LessonListItem, sorted by (order, id)
+    summary_bodies: List = field(default_factory=list)  # JSON of each summary, same order
+    keys: List = field(default_factory=list)  # (order, id) of each summary, same order
+    facets: Dict = field(default_factory=dict)  # (facet, value) -> ascending summary positions
+    by_id: Dict = field(default_factory=dict)  # id -> LessonResponse
+    by_slug: Dict = field(default_factory=dict)  # slug -> LessonResponse
+    list_etag: str = ""  # Changes whenever any published summary does
+    bodies: Dict = field(default_factory=dict)  # id -> JSON of the lesson detail
+    etags: Dict = field(default_factory=dict)  # id -> ETag of the lesson detail
+    contents: Dict = field(default_factory=dict)  # id -> RenderedContent
+    positions: Dict = field(default_factory=dict)  # id -> position in summaries
+
+    @cached_property
+    def search_index(self) -> SearchIndex:
+        """Built on the first in-memory search, once per snapshot"""
+        return SearchIndex([self.by_id[summary.id] for summary in self.summaries])
+
+    def page(self, query: LessonQuery) -> Tuple[bytes, Optional[str]]:
+        """
+        JSON array of the summaries matching a query, and the next cursor
+
+        Pages are joined from pre-encoded summaries, so nothing is
+        serialized per request.
+        """
+        facets = query.facets()
+        if facets:
+            matches = [self.facets.get(facet, []) for facet in facets]
+            smallest = min(matches, key=len)
+            others = [set(positions) for positions in matches if positions is not smallest]
+            positions = [p for p in smallest if all(p in other for other in others)]
+        else:
+            positions = range(len(self.summaries))
+
+        start = bisect_left(positions, bisect_right(self.keys, query.after)) if query.after else 0
+        selected = positions[start:start + query.limit + 1]
+        next_cursor = None
+        if len(selected) > query.limit:
+            selected = selected[:query.limit]
+            next_cursor = encode_cursor(*self.keys[selected[-1]])
+
+        return self._join(selected), next_cursor
+
+    def search(self, text: str, limit: int) -> bytes:
+        """JSON array of the best in-memory search matches"""
+        return self._join(self.search_index.search(text, limit))
+
+    def select(self, lesson_ids: Iterable[str]) -> bytes:
+        """JSON array of the given lessons in the given order, skipping unknown ids"""
+        return self._join(self.positions[i] for i in lesson_ids if i in self.positions)
+
+    def _join(self, positions: Iterable[int]) -> bytes:
+        return b"[" + b",".join(self.summary_bodies[p] for p in positions) + b"]"
+
+_snapshot: Optional[CatalogSnapshot] = None
+_reload_lock = asyncio.Lock()
+_listener: Optional[asyncio.Task] = None
+
+async def current_version() -> int:
+    """Catalog version in Redis (0 before the first admin write)"""
+    return int(await redis_client.get(CATALOG_VERSION_KEY) or 0)
+
+async def load_snapshot(version: int) -> CatalogSnapshot:
+    """
+    Read all published lessons from the primary
+
+    The primary is used because a replica may not have the write that
+    triggered the reload yet.
+    """
+    from database.connection import ReadSessionLocal, primary_read_engine
+    from models.lesson import Lesson
+
+    async with ReadSessionLocal(bind=primary_read_engine) as session:
+        result = await session.execute(
+            select(Lesson)
+            .options(undefer_group("body"), undefer_group("rendered"))
+            .where(Lesson.is_published == True)
+            .order_by(Lesson.order, Lesson.id)
+        )
+        lessons = result.scalars().all()
+
+    return build_snapshot(version, lessons)
+
+def rendered_content(lesson) -> RenderedContent:
+    """
+    Encodings stored on a lesson, rendering here only for rows written
+    before content was rendered at write time
+    """
+    html = getattr(lesson, "content_html", None)
+    gzipped = getattr(lesson, "content_gzip", None)
+    brotlied = getattr(lesson, "content_br", None)
+    if html is None:
+        html, gzipped, brotlied = render_content(lesson.content)
+
+    encodings = {"identity": html.encode("utf-8"), "gzip": gzipped}
+    if brotlied is not None:
+        encodings["br"] = brotlied
+    return RenderedContent(
+        encodings=encodings,
+        etags={coding: make_etag(encodings["identity"], coding) for coding in encodings},
+    )
+
+def build_snapshot(version: int, lessons) -> CatalogSnapshot:
+    """
+    Validate lessons into response models once and index them
+    """
+    from api.lessons import LessonListItem, LessonResponse
+
+    lessons = sorted(lessons, key=lambda lesson: (lesson.order, lesson.id))
+    details = [LessonResponse.model_validate(lesson) for lesson in lessons]
+    summaries = [LessonListItem.model_validate(lesson) for lesson in lessons]
+
+    facets = {}
+    for position, summary in enumerate(summaries):
+        keys = [("difficulty", summary.difficulty), ("language", summary.language)]
+        keys += [("tag", tag) for tag in set(summary.tags or [])]
+        for key in keys:
+            facets.setdefault(key, []).append(position)
+
+    # Responses are encoded here once; ETags hash those bytes, so every
+    # worker that loaded the same lessons hands out the same validators
+    summary_bodies = [dump_json(summary) for summary in summaries]
+    bodies = {lesson.id: dump_json(lesson) for lesson in details}
+    return CatalogSnapshot(
+        version=version,
+        summaries=summaries,
+        summary_bodies=summary_bodies,
+        keys=[(summary.order, summary.id) for summary in summaries],
+        facets=facets,
+        by_id={lesson.id: lesson for lesson in details},
+        by_slug={lesson.slug: lesson for lesson in details},
+        list_etag=make_etag(*summary_bodies),
+        bodies=bodies,
+        etags={lesson_id: make_etag(body) for lesson_id, body in bodies.items()},
+        contents={lesson.id: rendered_content(lesson) for lesson in lessons},
+        positions={summary.id: position for position, summary in enumerate(summaries)},
+    )
+
+async def reload_catalog(version: Optional[int] = None) -> CatalogSnapshot:
+    """
+    Replace the snapshot unless it is already at the given version
+
+    The version is read before the lessons, so a write that lands during
+    the load leaves the snapshot marked stale rather than falsely current.
+    """
+    global _snapshot
+
+    async with _reload_lock:
+        if version is None:
+            try:
+                version = await current_version()
+            except Exception as e:
+                logger.warning(f"Catalog version unavailable, reloading anyway: {e}")
+                version = -1
+        if _snapshot is not None and version >= 0 and _snapshot.version == version:
+            return _snapshot
+
+        _snapshot = await load_snapshot(version)
+        if LESSON_SEARCH_BACKEND == "memory":
+            _snapshot.search_index  # Built now rather than on the first search request
+        logger.info(f"Lesson catalog loaded: {len(_snapshot.summaries)} lessons, version {version}")
+        return _snapshot
+
+async def get_catalog() -> CatalogSnapshot:
+    """
+    Current snapshot, loaded on first use if startup did not load it
+    """
+    return _snapshot or await reload_catalog()
+
+async def publish_catalog_change():
+    """
+    Announce an admin write to all workers; call after the commit
+    """
+    version = None
+    try:
+        version = await redis_client.incr(CATALOG_VERSION_KEY)
+        await redis_client.publish(CATALOG_CHANNEL, version)
+    except Exception as e:
+        logger.warning(f"Could not announce catalog change: {e}")
+
+    # This worker reloads right away so the admin sees their own edit
+    await reload_catalog(version)
+
+async def listen_for_changes():
+    """
+    Reload on announcements, and poll the version in case one was missed
+    """
+    while True:
+        try:
+            async with redis_client.pubsub() as pubsub:
+                await pubsub.subscribe(CATALOG_CHANNEL)
+                await reload_catalog()
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True,
+                        timeout=CATALOG_POLL_SECONDS
+                    )
+                    await reload_catalog(int(message["data"]) if message else None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Catalog listener error, retrying: {e}")
+            await asyncio.sleep(CATALOG_POLL_SECONDS)
+            try:
+                await reload_catalog()
+            except Exception as e:
+                logger.error(f"Catalog reload failed: {e}")
+
+async def start_catalog():
+    """
+    Load the catalog and start listening for changes
+    """
+    global _listener
+    await reload_catalog()
+    _listener = asyncio.create_task(listen_for_changes())
+
+async def stop_catalog():
+    """
+    Stop the change listener
+    """
+    if _listener:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
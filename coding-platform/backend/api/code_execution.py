@@ -3,34 +3,55 @@ Code Execution API endpoints
 Handles secure code execution via Piston engine
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import httpx
+import json
 import os
 import time
 from loguru import logger
 
 from database.connection import get_db
+from database.blobs import externalize, load_texts
+from database.ids import EntityId
+from database.lesson_stats import record_graded_submission
 from models.user import User
 from models.submission import CodeSubmission
 from models.lesson import Lesson
-from api.auth import get_current_user
+from models.version import LessonVersion
+from api.auth import get_current_user, user_rate_limit_key
+from api.ratelimit import RATE_LIMIT_PER_MINUTE, RateLimit
+from api.serialization import json_response
+from api.events import publish_events
+from api.http_cache import bump_progress_version
+from api.progress import ProgressResponse, progress_event, record_graded_attempt
+from api.quotas import (
+    EXECUTION_QUOTA_ORGANIZATION,
+    charge_execution_quota,
+    check_execution_quota,
+    get_usage,
+    quota_scopes,
+    top_consumers,
+)
 
 router = APIRouter()
 
 # Piston configuration
 PISTON_URL = os.getenv("PISTON_URL", "http://piston:2000")
 
+# Per-user limit protecting Piston capacity
+execute_rate_limit = RateLimit("execute", f"{RATE_LIMIT_PER_MINUTE}/minute", key_func=user_rate_limit_key)
+
 # Pydantic models
 class CodeExecuteRequest(BaseModel):
     """Code execution request"""
     code: str = Field(..., max_length=10000)
     language: str = Field(default="python", pattern="^(python|javascript|java|cpp|c|go|rust)$")
     stdin: Optional[str] = ""
-    lesson_id: Optional[str] = None
+    lesson_id: Optional[EntityId] = None
 
 class TestCase(BaseModel):
     """Test case model"""
@@ -46,6 +67,8 @@ class CodeExecuteResponse(BaseModel):
     status: str
     submission_id: str
     test_results: Optional[List[Dict[str, Any]]] = None
+    tests_skipped: bool = False  # Lesson tests not run because the execution quota is low
+    progress: Optional[ProgressResponse] = None  # Lesson progress after a graded run
 
 class PistonRuntime(BaseModel):
     """Piston runtime information"""
@@ -147,6 +170,10 @@ def get_file_extension(language: str) -> str:
 async def run_test_cases(code: str, language: str, test_cases: List[Dict]) -> List[Dict[str, Any]]:
     """
     Run code against test cases
+
+    Returns compact results that refer to the lesson's test cases by index.
+    Actual output is only kept for failing cases, since a passing case's
+    output is by definition the expected output.
     """
     results = []
 
@@ -160,22 +187,181 @@ async def run_test_cases(code: str, language: str, test_cases: List[Dict]) -> Li
         actual_output = execution_result["output"].strip()
         passed = actual_output == expected_output and execution_result["status"] == "success"
 
-        results.append({
-            "test_number": i + 1,
-            "description": test_case.get("description", f"Test {i + 1}"),
-            "input": test_input,
-            "expected_output": expected_output,
-            "actual_output": actual_output,
+        result = {
+            "test": i,
             "passed": passed,
-            "error": execution_result.get("error")
-        })
+            "time": round(execution_result["execution_time"], 4)
+        }
+        if not passed:
+            result["output"] = actual_output
+        if execution_result.get("error"):
+            result["error"] = execution_result["error"]
+        results.append(result)
 
     return results
 
+def store_test_results(results: List[Dict[str, Any]], refs: Dict[Any, str]) -> List[Dict[str, Any]]:
+    """
+    Replace per-case outputs that were moved to the blob store with references
+    """
+    stored = []
+    for result in results:
+        entry = dict(result)
+        for field in ("output", "error"):
+            ref = refs.get((result["test"], field))
+            if ref:
+                del entry[field]
+                entry[f"{field}_ref"] = ref
+        stored.append(entry)
+    return stored
+
+def expand_test_results(
+    results: List[Dict[str, Any]],
+    test_cases: Optional[List[Dict]],
+    texts: Optional[Dict[str, str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Expand compact test results against the lesson's test cases
+
+    Pass test_cases=None when the lesson's test suite has changed since the
+    run; input and expected output are then reported as unavailable.
+    """
+    texts = texts or {}
+    expanded = []
+
+    for result in results:
+        if "test" not in result:
+            # Rows written before compact storage hold fully expanded results
+            expanded.append(result)
+            continue
+
+        index = result["test"]
+        test_case = test_cases[index] if test_cases and index < len(test_cases) else None
+        expected_output = test_case.get("expected_output", "").strip() if test_case else None
+
+        output = texts.get(result["output_ref"]) if "output_ref" in result else result.get("output")
+        if output is None and result["passed"]:
+            output = expected_output
+        error = texts.get(result["error_ref"]) if "error_ref" in result else result.get("error")
+
+        expanded.append({
+            "test_number": index + 1,
+            "description": (test_case or {}).get("description", f"Test {index + 1}"),
+            "input": test_case.get("input", "") if test_case else None,
+            "expected_output": expected_output,
+            "actual_output": output,
+            "passed": result["passed"],
+            "error": error,
+            "execution_time": result.get("time")
+        })
+
+    return expanded
+
+def submission_to_dict(
+    submission: CodeSubmission,
+    texts: Dict[str, str],
+    test_suites: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Build the API representation of a submission, resolving blob references
+    and expanding test results against the lesson's test suite
+    """
+    def resolve(field: str) -> Optional[str]:
+        ref = getattr(submission, f"{field}_ref")
+        return texts.get(ref) if ref else getattr(submission, field)
+
+    test_results = submission.test_results
+    if submission.test_results_ref:
+        # A missing blob reads as missing results rather than failing the page
+        stored = texts.get(submission.test_results_ref)
+        test_results = json.loads(stored) if stored else None
+    if test_results:
+        suite = test_suites.get((submission.lesson_id, submission.lesson_version)) or test_suites.get(submission.lesson_id)
+        test_cases = None
+        if suite and suite.test_suite_version == submission.test_suite_version:
+            test_cases = suite.test_cases
+        test_results = expand_test_results(test_results, test_cases, texts)
+
+    return {
+        "id": submission.id,
+        "user_id": submission.user_id,
+        "lesson_id": submission.lesson_id,
+        "code": resolve("code"),
+        "language": submission.language,
+        "output": resolve("output"),
+        "error": resolve("error"),
+        "execution_time": submission.execution_time,
+        "memory_used": submission.memory_used,
+        "exit_code": submission.exit_code,
+        "tests_passed": submission.tests_passed,
+        "tests_failed": submission.tests_failed,
+        "test_results": test_results,
+        "test_suite_version": submission.test_suite_version,
+        "lesson_version": submission.lesson_version,
+        "status": submission.status,
+        "created_at": submission.created_at,
+    }
+
+async def serialize_submissions(db: AsyncSession, submissions: List[CodeSubmission]) -> List[Dict[str, Any]]:
+    """
+    Serialize submissions, loading referenced blobs and test suites in bulk
+    """
+    def case_refs(results):
+        return [
+            result.get(key)
+            for result in results or []
+            for key in ("output_ref", "error_ref")
+        ]
+
+    texts = await load_texts(db, [
+        ref
+        for submission in submissions
+        for ref in (
+            submission.code_ref,
+            submission.output_ref,
+            submission.error_ref,
+            submission.test_results_ref,
+            *case_refs(submission.test_results),
+        )
+    ])
+
+    # Results that were themselves stored as a blob may reference more blobs
+    nested_refs = [
+        ref
+        for submission in submissions
+        if texts.get(submission.test_results_ref)
+        for ref in case_refs(json.loads(texts[submission.test_results_ref]))
+        if ref and ref not in texts
+    ]
+    if nested_refs:
+        texts.update(await load_texts(db, nested_refs))
+
+    # Results are expanded against the lesson version they ran on; older
+    # submissions without one fall back to the lesson's current suite
+    graded = [s for s in submissions if s.lesson_id and (s.test_results or s.test_results_ref)]
+    versions = {(s.lesson_id, s.lesson_version) for s in graded if s.lesson_version}
+    lesson_ids = {s.lesson_id for s in graded if not s.lesson_version}
+    test_suites = {}
+    if versions:
+        result = await db.execute(
+            select(LessonVersion.lesson_id, LessonVersion.number, LessonVersion.test_cases, LessonVersion.test_suite_version)
+            .where(tuple_(LessonVersion.lesson_id, LessonVersion.number).in_(versions))
+        )
+        test_suites.update({(row.lesson_id, row.number): row for row in result})
+    if lesson_ids:
+        result = await db.execute(
+            select(Lesson.id, Lesson.test_cases, Lesson.test_suite_version)
+            .where(Lesson.id.in_(lesson_ids))
+        )
+        test_suites.update({row.id: row for row in result})
+
+    return [submission_to_dict(submission, texts, test_suites) for submission in submissions]
+
 # API Endpoints
-@router.post("/execute", response_model=CodeExecuteResponse)
+@router.post("/execute", response_model=CodeExecuteResponse, dependencies=[Depends(execute_rate_limit)])
 async def execute_code(
     request: CodeExecuteRequest,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -206,6 +392,9 @@ async def execute_code(
             logger.warning(f"Dangerous code pattern detected: {pattern} by user {current_user.username}")
             # Allow but log - Piston provides sandboxing
 
+    # Reject before touching Piston when an execution-time budget is used up
+    quota = await check_execution_quota(current_user)
+
     # Execute code
     execution_result = await execute_code_on_piston(
         request.code,
@@ -215,36 +404,71 @@ async def execute_code(
 
     # If lesson_id provided, run test cases
     test_results = None
+    test_cases = None
+    test_suite_version = None
+    lesson_version = None
     tests_passed = 0
     tests_failed = 0
+    tests_skipped = False
 
     if request.lesson_id:
-        result = await db.execute(select(Lesson).where(Lesson.id == request.lesson_id))
-        lesson = result.scalar_one_or_none()
-
-        if lesson and lesson.test_cases:
+        result = await db.execute(
+            select(Lesson.test_cases, Lesson.test_suite_version, Lesson.version)
+            .where(Lesson.id == request.lesson_id)
+        )
+        lesson = result.one_or_none()
+        if lesson:
+            lesson_version = lesson.version
+
+        if lesson and lesson.test_cases and not quota.run_tests:
+            tests_skipped = True
+        elif lesson and lesson.test_cases:
+            test_cases = lesson.test_cases
+            test_suite_version = lesson.test_suite_version
             test_results = await run_test_cases(
                 request.code,
                 request.language,
-                lesson.test_cases
+                test_cases
             )
             tests_passed = sum(1 for t in test_results if t["passed"])
             tests_failed = len(test_results) - tests_passed
 
+    await charge_execution_quota(
+        current_user,
+        execution_result["execution_time"] + sum(t["time"] for t in test_results or [])
+    )
+
+    # Move large fields, including failing test outputs, to the
+    # deduplicated blob store in a single INSERT
+    blob_fields = {
+        "code": request.code,
+        "output": execution_result["output"],
+        "error": execution_result.get("error"),
+    }
+    for result in test_results or []:
+        blob_fields[(result["test"], "output")] = result.get("output")
+        blob_fields[(result["test"], "error")] = result.get("error")
+    refs = await externalize(db, blob_fields)
+
     # Save submission to database
     submission = CodeSubmission(
         user_id=current_user.id,
         lesson_id=request.lesson_id,
-        code=request.code,
+        code=None if "code" in refs else request.code,
+        code_ref=refs.get("code"),
         language=request.language,
-        output=execution_result["output"],
-        error=execution_result.get("error"),
+        output=None if "output" in refs else execution_result["output"],
+        output_ref=refs.get("output"),
+        error=None if "error" in refs else execution_result.get("error"),
+        error_ref=refs.get("error"),
         execution_time=execution_result["execution_time"],
         exit_code=execution_result.get("exit_code", 0),
         status=execution_result["status"],
         tests_passed=tests_passed,
         tests_failed=tests_failed,
-        test_results=test_results
+        test_results=store_test_results(test_results, refs) if test_results is not None else None,
+        test_suite_version=test_suite_version,
+        lesson_version=lesson_version
     )
 
     db.add(submission)
@@ -254,17 +478,53 @@ async def execute_code(
     if execution_result["status"] == "success" and tests_failed == 0:
         current_user.successful_submissions += 1
 
+    # Graded runs update lesson progress in the same transaction, scored
+    # from the server's own test results
+    progress = None
+    if test_results:
+        progress = await record_graded_attempt(
+            db, current_user.id, request.lesson_id, tests_passed, tests_failed
+        )
+        # Last before the commit: it locks the lesson's stats row
+        await record_graded_submission(
+            db, request.lesson_id, progress,
+            passed=tests_failed == 0,
+            execution_time=execution_result["execution_time"],
+            error=execution_result.get("error")
+        )
+
+    # No refresh: id is generated client-side and created_at, part of the
+    # primary key, comes back from the INSERT's RETURNING
     await db.commit()
-    await db.refresh(submission)
+    if progress:
+        await bump_progress_version(current_user.id)
 
-    return CodeExecuteResponse(
+    if request.lesson_id:
+        events = [("submission", {
+            "user_id": current_user.id,
+            "username": current_user.username,
+            "lesson_id": request.lesson_id,
+            "submission_id": submission.id,
+            "status": submission.status,
+            "tests_passed": tests_passed,
+            "tests_failed": tests_failed,
+            "created_at": submission.created_at,
+        })]
+        if progress:
+            events.append(("progress", progress_event(current_user, request.lesson_id, progress)))
+        await publish_events(current_user, events)
+
+    execute_response = CodeExecuteResponse(
         output=execution_result["output"],
         error=execution_result.get("error"),
         execution_time=execution_result["execution_time"],
         status=execution_result["status"],
         submission_id=submission.id,
-        test_results=test_results
+        test_results=expand_test_results(test_results, test_cases) if test_results is not None else None,
+        tests_skipped=tests_skipped,
+        progress=progress
     )
+    return json_response(execute_response, response)
 
 @router.get("/runtimes", response_model=List[PistonRuntime])
 async def get_runtimes():
@@ -291,9 +551,49 @@ async def get_runtimes():
             detail="Execution engine unavailable"
         )
 
+@router.get("/usage")
+async def get_execution_usage(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    user_id: Optional[EntityId] = None,
+    organization: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Execution-time consumption over the current quota windows (admin only)
+
+    With user_id or organization, returns that budget; otherwise the top
+    consumers in each scope.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can view execution usage"
+        )
+
+    if user_id:
+        result = await db.execute(select(User.id, User.organization).where(User.id == user_id))
+        user = result.one_or_none()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        usages = await get_usage(quota_scopes(user))
+        return {"usage": [usage.as_dict() for usage in usages]}
+
+    if organization:
+        usages = await get_usage({"organization": (organization, EXECUTION_QUOTA_ORGANIZATION)})
+        return {"usage": [usage.as_dict() for usage in usages]}
+
+    return {
+        "users": [usage.as_dict() for usage in await top_consumers("user", limit)],
+        "organizations": [usage.as_dict() for usage in await top_consumers("organization", limit)],
+    }
+
 @router.get("/submissions/{submission_id}")
 async def get_submission(
-    submission_id: str,
+    submission_id: EntityId,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -314,7 +614,7 @@ async def get_submission(
             detail="Submission not found"
         )
 
-    return submission
+    return (await serialize_submissions(db, [submission]))[0]
 
 @router.get("/submissions")
 async def get_user_submissions(
@@ -333,7 +633,7 @@ async def get_user_submissions(
         .limit(limit)
         .offset(offset)
     )
-    submissions = result.scalars().all()
+    submissions = await serialize_submissions(db, result.scalars().all())
 
     return {
         "submissions": submissions,
@@ -0,0 +1,241 @@
+"""
+Live progress events
+Server-sent event streams per user and per cohort, fanned out over Redis pub/sub
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+import asyncio
+import os
+from loguru import logger
+
+from database.cache import redis_client
+from database.connection import open_read_session
+from models.user import User
+from api.auth import get_token_user_id, load_active_user
+from api.serialization import dump_json
+
+router = APIRouter()
+
+# Frames buffered per stream; a client that falls further behind drops the
+# oldest and is told to resync, so a slow reader cannot grow memory
+EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", "16"))
+
+# Comment frames keep idle streams open through proxies
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "25"))
+
+EVENTS_MEDIA_TYPE = "text/event-stream"
+
+# Sent first: how long the browser waits before reconnecting
+STREAM_PREAMBLE = b"retry: 5000\n\n"
+HEARTBEAT_FRAME = b": ping\n\n"
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+
+def user_channel(user_id: str) -> str:
+    """Pub/sub channel for one user's events"""
+    return f"events:user:{user_id}"
+
+def cohort_channel(organization: str) -> str:
+    """Pub/sub channel for every event in an organization"""
+    return f"events:cohort:{organization}"
+
+def event_frame(kind: str, data: Any) -> str:
+    """
+    One server-sent event; encoded once by the publisher and forwarded
+    as is by every worker
+    """
+    return f"event: {kind}\ndata: {dump_json(data).decode()}\n\n"
+
+async def publish_events(user: User, events: Iterable[Tuple[str, Any]]):
+    """
+    Publish events about a user to their stream and their cohort's;
+    call after the write is committed
+    """
+    message = "".join(event_frame(kind, data) for kind, data in events)
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.publish(user_channel(user.id), message)
+            if user.organization:
+                pipe.publish(cohort_channel(user.organization), message)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not publish events: {e}")
+
+class Subscriber:
+    """
+    One open stream's pending frames
+
+    Frames are shared bytes objects, so a subscriber holds references,
+    never copies.
+    """
+    __slots__ = ("frames", "ready", "dropped")
+
+    def __init__(self):
+        self.frames = deque(maxlen=EVENTS_BUFFER_SIZE)
+        self.ready = asyncio.Event()
+        self.dropped = False
+
+    def push(self, frame: bytes):
+        if len(self.frames) == self.frames.maxlen:
+            self.dropped = True
+        self.frames.append(frame)
+        self.ready.set()
+
+    def drain(self) -> bytes:
+        frames = b"".join(self.frames)
+        self.frames.clear()
+        self.ready.clear()
+        if self.dropped:
+            self.dropped = False
+            frames = RESYNC_FRAME + frames
+        return frames
+
+class EventHub:
+    """
+    Fans pub/sub messages out to this worker's open streams
+
+    One Redis connection per worker, subscribed to the channels that
+    have at least one local stream.
+    """
+    def __init__(self):
+        self.subscribers: Dict[str, Set[Subscriber]] = {}
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._active = asyncio.Event()  # Set while any channel is subscribed
+        self._closed = False
+
+    async def subscribe(self, channel: str) -> Subscriber:
+        subscriber = Subscriber()
+        async with self._lock:
+            if channel not in self.subscribers:
+                if self._pubsub is None:
+                    self._pubsub = redis_client.pubsub()
+                await self._pubsub.subscribe(channel)
+                self.subscribers[channel] = set()
+                self._active.set()
+                if self._reader is None:
+                    self._reader = asyncio.create_task(self._read())
+            self.subscribers[channel].add(subscriber)
+        return subscriber
+
+    async def unsubscribe(self, channel: str, subscriber: Subscriber):
+        async with self._lock:
+            subscribers = self.subscribers.get(channel)
+            if subscribers is None:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[channel]
+                if not self.subscribers:
+                    self._active.clear()
+                try:
+                    await self._pubsub.unsubscribe(channel)
+                except Exception as e:
+                    logger.warning(f"Could not unsubscribe from {channel}: {e}")
+
+    def dispatch(self, channel: str, message: str):
+        subscribers = self.subscribers.get(channel)
+        if subscribers:
+            frame = message.encode()
+            for subscriber in subscribers:
+                subscriber.push(frame)
+
+    async def _read(self):
+        # The connection resubscribes to its channels when it reconnects.
+        # The flag ends the loop even if the client swallows a cancellation.
+        while not self._closed:
+            await self._active.wait()
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message:
+                    self.dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Event listener error, retrying: {e}")
+                await asyncio.sleep(1)
+
+    async def close(self):
+        self._closed = True
+        if self._reader:
+            self._active.set()
+            self._reader.cancel()
+            await asyncio.wait([self._reader])
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self.subscribers.clear()
+        self._active.clear()
+        self._closed = False
+
+hub = EventHub()
+
+async def stream(channel: str) -> AsyncIterator[bytes]:
+    """
+    Frames for one client until it disconnects, which cancels the generator
+    """
+    subscriber = await hub.subscribe(channel)
+    try:
+        yield STREAM_PREAMBLE
+        while True:
+            try:
+                # A timer rather than wait_for, which would add a task per stream
+                async with asyncio.timeout(EVENTS_HEARTBEAT_SECONDS):
+                    await subscriber.ready.wait()
+            except TimeoutError:
+                yield HEARTBEAT_FRAME
+                continue
+            yield subscriber.drain()
+    finally:
+        await hub.unsubscribe(channel, subscriber)
+
+def event_stream(channel: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream(channel),
+        media_type=EVENTS_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# API Endpoints
+# Streams hold no database session: a long-lived request must not pin a
+# pooled connection
+@router.get("/progress")
+async def progress_events(user_id: str = Depends(get_token_user_id)):
+    """
+    Stream the current user's progress and submission events
+    """
+    return event_stream(user_channel(user_id))
+
+@router.get("/cohort")
+async def cohort_events(
+    request: Request,
+    organization: Optional[str] = Query(None, max_length=100),
+    user_id: str = Depends(get_token_user_id)
+):
+    """
+    Stream progress and submission events for everyone in an organization
+    (admin only); defaults to the admin's own organization
+    """
+    db = await open_read_session(request)
+    try:
+        current_user = await load_active_user(user_id, db)
+    finally:
+        await db.close()
+
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can follow a cohort"
+        )
+    organization = organization or current_user.organization
+    if not organization:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No organization given"
+        )
+
+    return event_stream(cohort_channel(organization))
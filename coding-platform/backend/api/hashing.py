@@ -0,0 +1,108 @@
+"""
+Password hashing off the event loop
+bcrypt runs in a bounded thread pool with its own queue-depth limit
+"""
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Optional, Tuple
+import asyncio
+import os
+import time
+from loguru import logger
+
+# bcrypt cost factor; hashes with a different cost are upgraded on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Threads hashing concurrently; bcrypt releases the GIL, so each one uses a core
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+# Hash jobs (running + waiting) allowed per worker before new ones get a 503
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+@dataclass
+class HashingStats:
+    """
+    Password hashing activity for this worker process
+    """
+    pending: int = 0  # Jobs running or waiting for a thread
+    completed: int = 0
+    rejected: int = 0  # Jobs refused because the queue was full
+    rehashed: int = 0  # Hashes upgraded on login
+    wait_time: float = 0.0  # Seconds jobs spent waiting for a thread
+    hash_time: float = 0.0  # Seconds spent inside bcrypt
+
+    def as_dict(self) -> dict:
+        values = asdict(self)
+        values.update(
+            workers=PASSWORD_HASH_WORKERS,
+            queue_limit=PASSWORD_HASH_QUEUE_LIMIT,
+            avg_wait_ms=round(self.wait_time / self.completed * 1000, 2) if self.completed else 0.0,
+            avg_hash_ms=round(self.hash_time / self.completed * 1000, 2) if self.completed else 0.0,
+        )
+        return values
+
+stats = HashingStats()
+
+async def run_in_pool(func, *args):
+    """
+    Run a hashing function in the bcrypt pool
+
+    Raises 503 when PASSWORD_HASH_QUEUE_LIMIT jobs are already pending, so a
+    login storm sheds load instead of building an unbounded backlog.
+    """
+    if stats.pending >= PASSWORD_HASH_QUEUE_LIMIT:
+        stats.rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    submitted = time.perf_counter()
+
+    def timed():
+        started = time.perf_counter()
+        return func(*args), started, time.perf_counter()
+
+    # Stats are only updated on the event loop thread
+    stats.pending += 1
+    try:
+        result, started, finished = await asyncio.get_running_loop().run_in_executor(_executor, timed)
+    finally:
+        stats.pending -= 1
+
+    stats.completed += 1
+    stats.wait_time += started - submitted
+    stats.hash_time += finished - started
+    return result
+
+async def hash_password(password: str) -> str:
+    """Hash a password with the current bcrypt cost"""
+    return await run_in_pool(pwd_context.hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password against its hash
+
+    Returns (valid, new_hash). new_hash is set when the stored hash uses
+    outdated parameters and should replace it.
+    """
+    valid, new_hash = await run_in_pool(pwd_context.verify_and_update, plain_password, hashed_password)
+    if new_hash:
+        stats.rehashed += 1
+    return valid, new_hash
+
+def shutdown_hashing():
+    """
+    Stop the hashing threads
+    """
+    _executor.shutdown(wait=False, cancel_futures=True)
+    logger.info("Password hashing pool stopped")
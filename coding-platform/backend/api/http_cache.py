@@ -0,0 +1,137 @@
+"""
+HTTP conditional requests
+ETags, If-None-Match handling and Cache-Control for lesson and progress reads
+"""
+
+from fastapi import Request, Response, status
+from typing import Optional
+import hashlib
+import os
+from loguru import logger
+
+from api.serialization import json_response
+from database.cache import redis_client
+from database.ids import uuid7
+
+# Responses need a bearer token, so only the browser may store them; it
+# revalidates every time and usually gets a body-less 304 back
+LESSON_CACHE_CONTROL = os.getenv("LESSON_CACHE_CONTROL", "private, no-cache")
+PROGRESS_CACHE_CONTROL = os.getenv("PROGRESS_CACHE_CONTROL", "private, no-cache")
+
+# Lesson versions never change, so their URLs may be held indefinitely;
+# "public" would also let nginx share them across users
+VERSION_CACHE_CONTROL = os.getenv("VERSION_CACHE_CONTROL", "private, max-age=31536000, immutable")
+
+# Idle users' progress versions expire; a fresh one just costs a full response
+PROGRESS_VERSION_TTL = int(os.getenv("PROGRESS_VERSION_TTL", str(24 * 3600)))
+
+def make_etag(*parts) -> str:
+    """
+    Strong ETag from a representation's bytes or from the versions it depends on
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """
+    Weak comparison against If-None-Match, as RFC 9110 requires for GET
+
+    nginx marks ETags weak when it gzips a response, so a W/ prefix sent
+    back by the browser still matches.
+    """
+    header = request.headers.get("if-none-match")
+    if not header or etag is None:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+def cache_headers(etag: Optional[str], cache_control: str, vary: str = "Authorization") -> dict:
+    """Validator and caching headers shared by 200 and 304 responses"""
+    headers = {"Cache-Control": cache_control, "Vary": vary}
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
+def not_modified(etag: str, cache_control: str, vary: str = "Authorization") -> Response:
+    """
+    304 response; returning it directly skips response model serialization
+    """
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=cache_headers(etag, cache_control, vary)
+    )
+
+def negotiate_encoding(accept_encoding: Optional[str], available) -> str:
+    """
+    Best precomputed content-coding the client accepts: br, then gzip,
+    falling back to identity
+    """
+    weights = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    for coding in ("br", "gzip"):
+        if coding in available and weights.get(coding, weights.get("*", 0.0)) > 0:
+            return coding
+    return "identity"
+
+def conditional(request: Request, response: Response, etag: Optional[str], body, cache_control: str) -> Response:
+    """
+    Response for a GET endpoint: a 304 if the client's copy is current,
+    otherwise the JSON body (models or pre-encoded bytes) with validators
+    """
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    response.headers.update(cache_headers(etag, cache_control))
+    return json_response(body, response)
+
+def progress_version_key(user_id: str) -> str:
+    """Redis key holding a user's current progress version"""
+    return f"progress:version:{user_id}"
+
+def progress_views_key(user_id: str) -> str:
+    """Redis hash holding a user's cached progress views"""
+    return f"progress:views:{user_id}"
+
+async def progress_version(user_id: str) -> Optional[str]:
+    """
+    Current progress version for a user, or None if Redis is unavailable
+
+    Versions are random rather than counters, so a key that expired or was
+    evicted can never come back with a value an old ETag was built from.
+    """
+    key = progress_version_key(user_id)
+    try:
+        version = await redis_client.get(key)
+        if version is None:
+            await redis_client.set(key, uuid7(), nx=True, ex=PROGRESS_VERSION_TTL)
+            version = await redis_client.get(key)
+        return version
+    except Exception as e:
+        logger.warning(f"Progress version unavailable, skipping ETag: {e}")
+        return None
+
+async def bump_progress_version(user_id: str):
+    """
+    Invalidate a user's progress ETags and cached views; call after the
+    write is committed
+    """
+    try:
+        # The version goes first: a view built before the write can then
+        # no longer be stored against it (see api.progress_cache)
+        await redis_client.set(progress_version_key(user_id), uuid7(), ex=PROGRESS_VERSION_TTL)
+        await redis_client.delete(progress_views_key(user_id))
+    except Exception as e:
+        logger.warning(f"Could not bump progress version: {e}")
@@ -3,20 +3,47 @@ Lessons API endpoints
 Manages educational content and lessons
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, true
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import undefer_group
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import asyncio
+from loguru import logger
 
-from database.connection import get_db
+from database.connection import get_db, get_read_db, open_read_session
+from database.ids import EntityId
 from models.user import User
 from models.lesson import Lesson
-from api.auth import get_current_user
+from models.progress import UserProgress
+from models.submission import CodeSubmission
+from models.blob import ContentBlob
+from models.stats import LessonStats
+from api.auth import get_current_reader, get_current_user, get_token_user_id, load_active_user
+from api.catalog import get_catalog, publish_catalog_change
+from api.serialization import dump_json, json_response
+from api.http_cache import (
+    LESSON_CACHE_CONTROL, VERSION_CACHE_CONTROL,
+    cache_headers, conditional, etag_matches, make_etag, negotiate_encoding, not_modified
+)
+from api.pagination import NEXT_CURSOR_HEADER, LessonQuery, lesson_query
+from api.search import LESSON_SEARCH_BACKEND, search_lesson_ids
+from api.versions import get_version, version_etag
+from api.progress import ProgressResponse
+from database.blobs import decompress
+from database.content_sync import parse_jsonl, sync_lessons
+from database.lesson_stats import TOP_ERRORS_CAPACITY, TOP_ERRORS_REPORTED
+from database.sketches import QuantileSketch, TopK
+from database.versions import lesson_values, new_version, version_hash
 
 router = APIRouter()
 
+# Rendered content is negotiated per Accept-Encoding and needs a token
+CONTENT_VARY = "Accept-Encoding, Authorization"
+
 # Pydantic models
 class TestCaseModel(BaseModel):
     """Test case model"""
@@ -59,7 +86,9 @@ class LessonResponse(BaseModel):
     title: str
     slug: str
     description: Optional[str]
-    content: str
+    # Markdown is kept for the in-memory search index but not sent to
+    # learners: pages show the rendered HTML from /content or the bootstrap
+    content: str = Field(exclude=True)
     difficulty: Optional[str]
     order: int
     starter_code: Optional[str]
@@ -69,6 +98,27 @@ class LessonResponse(BaseModel):
     estimated_time: Optional[int]
     tags: Optional[List[str]]
     is_published: bool
+    version: int  # Current version; /{id}/versions/{version} never changes
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class LessonSourceResponse(LessonResponse):
+    """Lesson response with its Markdown, returned to admin editors"""
+    content: str
+
+class LessonVersionResponse(BaseModel):
+    """Immutable lesson version model"""
+    lesson_id: str
+    number: int
+    title: str
+    description: Optional[str]
+    content: str
+    starter_code: Optional[str]
+    test_cases: Optional[List[Dict[str, str]]]
+    test_suite_version: int
+    language: Optional[str]
     created_at: datetime
 
     class Config:
@@ -89,40 +139,136 @@ class LessonListItem(BaseModel):
     class Config:
         from_attributes = True
 
+class SubmissionSummary(BaseModel):
+    """Latest submission for a lesson, enough to restore the editor"""
+    id: str
+    status: Optional[str]
+    tests_passed: int
+    tests_failed: int
+    lesson_version: Optional[int]
+    code: Optional[str]
+    created_at: datetime
+
+class ErrorCount(BaseModel):
+    """A normalized error message and how often it occurred"""
+    message: str
+    count: int
+
+class LessonStatsResponse(BaseModel):
+    """Aggregated statistics over a lesson's graded submissions"""
+    lesson_id: str
+    submissions: int
+    pass_rate: float  # Percentage of graded runs passing every test
+    learners: int
+    learners_passed: int
+    attempts_to_first_pass: Optional[float]  # Mean over learners who passed
+    median_runtime: Optional[float]  # Seconds, within 2%
+    p90_runtime: Optional[float]
+    common_errors: List[ErrorCount]
+    updated_at: Optional[datetime]
+    reconciled_at: Optional[datetime]
+
+PROGRESS_COLUMNS = (
+    "id", "user_id", "lesson_id", "is_completed", "attempts", "best_score",
+    "started_at", "completed_at", "last_attempt_at",
+)
+
+async def load_learner_state(db: AsyncSession, user_id: str, lesson_id: str):
+    """
+    The user's active flag, progress row and latest submission for a lesson
+    in one round trip, or None if the user does not exist
+
+    Progress and the submission are LATERAL subqueries outer-joined to the
+    user row, and a submission's code blob is joined in as well.
+    """
+    progress = (
+        select(*(getattr(UserProgress, name).label(f"progress_{name}") for name in PROGRESS_COLUMNS))
+        .where(UserProgress.user_id == User.id, UserProgress.lesson_id == lesson_id)
+        .limit(1)
+        .lateral("progress")
+    )
+    latest = (
+        select(
+            CodeSubmission.id, CodeSubmission.status, CodeSubmission.tests_passed,
+            CodeSubmission.tests_failed, CodeSubmission.lesson_version,
+            CodeSubmission.code, CodeSubmission.code_ref, CodeSubmission.created_at
+        )
+        .where(CodeSubmission.user_id == User.id, CodeSubmission.lesson_id == lesson_id)
+        .order_by(CodeSubmission.created_at.desc())
+        .limit(1)
+        .lateral("latest")
+    )
+    result = await db.execute(
+        select(
+            User.is_active, progress,
+            *(column.label(f"submission_{column.name}") for column in latest.c),
+            ContentBlob.codec, ContentBlob.data
+        )
+        .select_from(User)
+        .outerjoin(progress, true())
+        .outerjoin(latest, true())
+        .outerjoin(ContentBlob, ContentBlob.hash == latest.c.code_ref)
+        .where(User.id == user_id)
+    )
+    return result.one_or_none()
+
 # API Endpoints
+# Published lessons are served from the per-worker catalog: no database
+# access, and the token is verified without a user lookup
 @router.get("", response_model=List[LessonListItem])
 async def get_lessons(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    query: LessonQuery = Depends(lesson_query),
+    user_id: str = Depends(get_token_user_id)
 ):
     """
-    Get all published lessons (sorted by order)
+    Get a page of published lessons (sorted by order), optionally filtered
+    by difficulty, language and tags; X-Next-Cursor continues the listing
     """
-    result = await db.execute(
-        select(Lesson)
-        .where(Lesson.is_published == True)
-        .order_by(Lesson.order)
-    )
-    lessons = result.scalars().all()
-
-    return [LessonListItem.from_orm(lesson) for lesson in lessons]
+    catalog = await get_catalog()
+    body, next_cursor = catalog.page(query)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return conditional(request, response, make_etag(body), body, LESSON_CACHE_CONTROL)
+
+# Declared before /{lesson_id}, which would otherwise claim the path
+@router.get("/search", response_model=List[LessonListItem])
+async def search_lessons(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    user_id: str = Depends(get_token_user_id)
+):
+    """
+    Search published lessons by title, description, tags and content, best
+    matches first
+    """
+    catalog = await get_catalog()
+    body = None
+    if LESSON_SEARCH_BACKEND == "postgres":
+        try:
+            body = catalog.select(await search_lesson_ids(db, q, limit))
+        except (OSError, DBAPIError, asyncio.TimeoutError) as e:
+            logger.warning(f"Database search failed, using the catalog index: {e}")
+    if body is None:
+        body = catalog.search(q, limit)
+    return conditional(request, response, make_etag(body), body, LESSON_CACHE_CONTROL)
 
 @router.get("/{lesson_id}", response_model=LessonResponse)
 async def get_lesson(
-    lesson_id: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    lesson_id: EntityId,
+    request: Request,
+    response: Response,
+    user_id: str = Depends(get_token_user_id)
 ):
     """
     Get lesson by ID
     """
-    result = await db.execute(
-        select(Lesson).where(
-            Lesson.id == lesson_id,
-            Lesson.is_published == True
-        )
-    )
-    lesson = result.scalar_one_or_none()
+    catalog = await get_catalog()
+    lesson = catalog.by_id.get(lesson_id)
 
     if not lesson:
         raise HTTPException(
@@ -130,24 +276,41 @@ async def get_lesson(
             detail="Lesson not found"
         )
 
-    return LessonResponse.from_orm(lesson)
+    return conditional(request, response, catalog.etags[lesson.id], catalog.bodies[lesson.id], LESSON_CACHE_CONTROL)
 
 @router.get("/slug/{slug}", response_model=LessonResponse)
 async def get_lesson_by_slug(
     slug: str,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    user_id: str = Depends(get_token_user_id)
 ):
     """
     Get lesson by slug
     """
-    result = await db.execute(
-        select(Lesson).where(
-            Lesson.slug == slug,
-            Lesson.is_published == True
+    catalog = await get_catalog()
+    lesson = catalog.by_slug.get(slug)
+
+    if not lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found"
         )
-    )
-    lesson = result.scalar_one_or_none()
+
+    return conditional(request, response, catalog.etags[lesson.id], catalog.bodies[lesson.id], LESSON_CACHE_CONTROL)
+
+@router.get("/slug/{slug}/bootstrap")
+async def get_lesson_bootstrap(
+    slug: str,
+    user_id: str = Depends(get_token_user_id),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Everything the lesson page needs: the lesson, its rendered HTML, the
+    user's progress and their latest submission, in one request and one query
+    """
+    catalog = await get_catalog()
+    lesson = catalog.by_slug.get(slug)
 
     if not lesson:
         raise HTTPException(
@@ -155,9 +318,180 @@ async def get_lesson_by_slug(
             detail="Lesson not found"
         )
 
-    return LessonResponse.from_orm(lesson)
+    row = await load_learner_state(db, user_id, lesson.id)
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not row.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    values = row._mapping
+    progress = None
+    if values["progress_id"] is not None:
+        progress = ProgressResponse.model_validate({name: values[f"progress_{name}"] for name in PROGRESS_COLUMNS})
+    submission = None
+    if values["submission_id"] is not None:
+        code = values["submission_code"]
+        if values["submission_code_ref"]:
+            # A missing blob leaves the code unknown, as in serialize_submissions
+            code = decompress(row.codec, row.data).decode("utf-8") if row.codec is not None else None
+        submission = SubmissionSummary(
+            id=values["submission_id"],
+            status=values["submission_status"],
+            tests_passed=values["submission_tests_passed"] or 0,
+            tests_failed=values["submission_tests_failed"] or 0,
+            lesson_version=values["submission_lesson_version"],
+            code=code,
+            created_at=values["submission_created_at"],
+        )
+
+    # The lesson is spliced in from the catalog's pre-encoded JSON
+    html = catalog.contents[lesson.id].encodings["identity"].decode("utf-8")
+    return json_response(
+        b'{"lesson":' + catalog.bodies[lesson.id]
+        + b',"content_html":' + dump_json(html)
+        + b',"progress":' + dump_json(progress)
+        + b',"latest_submission":' + dump_json(submission) + b"}"
+    )
 
-@router.post("", response_model=LessonResponse, status_code=status.HTTP_201_CREATED)
+@router.get("/{lesson_id}/content", response_class=Response)
+async def get_lesson_content(
+    lesson_id: EntityId,
+    request: Request,
+    user_id: str = Depends(get_token_user_id)
+):
+    """
+    Get a lesson's rendered HTML, sent byte-for-byte in the best
+    precompressed encoding the client accepts
+    """
+    catalog = await get_catalog()
+    content = catalog.contents.get(lesson_id)
+
+    if not content:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found"
+        )
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), content.encodings)
+    return content_response(request, content, encoding, content.etags[encoding], LESSON_CACHE_CONTROL)
+
+@router.get("/{lesson_id}/versions/{number}", response_model=LessonVersionResponse)
+async def get_lesson_version(
+    lesson_id: EntityId,
+    number: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    user_id: str = Depends(get_token_user_id)
+):
+    """
+    Get one immutable version of a lesson, cacheable indefinitely
+    """
+    etag = version_etag(lesson_id, number)
+    if etag_matches(request, etag):
+        return not_modified(etag, VERSION_CACHE_CONTROL)
+
+    version = await get_version(db, lesson_id, number)
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson version not found"
+        )
+
+    response.headers.update(cache_headers(etag, VERSION_CACHE_CONTROL))
+    return json_response(version.body, response)
+
+@router.get("/{lesson_id}/versions/{number}/content", response_class=Response)
+async def get_lesson_version_content(
+    lesson_id: EntityId,
+    number: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    user_id: str = Depends(get_token_user_id)
+):
+    """
+    Get the rendered HTML of one immutable version of a lesson
+    """
+    accept_encoding = request.headers.get("accept-encoding")
+    # Assume every encoding was stored, so a revalidation is answered
+    # without loading the version
+    etag = version_etag(lesson_id, number, negotiate_encoding(accept_encoding, ("identity", "gzip", "br")))
+    if etag_matches(request, etag):
+        return not_modified(etag, VERSION_CACHE_CONTROL, CONTENT_VARY)
+
+    version = await get_version(db, lesson_id, number)
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson version not found"
+        )
+
+    encoding = negotiate_encoding(accept_encoding, version.content.encodings)
+    etag = version_etag(lesson_id, number, encoding)
+    return content_response(request, version.content, encoding, etag, VERSION_CACHE_CONTROL)
+
+def content_response(request: Request, content, encoding: str, etag: str, cache_control: str) -> Response:
+    """
+    Rendered HTML in a precomputed encoding, or a 304 if the client has it
+    """
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control, CONTENT_VARY)
+
+    headers = cache_headers(etag, cache_control, CONTENT_VARY)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(
+        content=content.encodings[encoding],
+        media_type="text/html; charset=utf-8",
+        headers=headers
+    )
+
+@router.get("/{lesson_id}/stats", response_model=LessonStatsResponse)
+async def get_lesson_stats(
+    lesson_id: EntityId,
+    current_user: User = Depends(get_current_reader),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get pass rate, runtime, attempts and common errors for a lesson (admin only),
+    read from the incrementally maintained lesson_stats row
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can view lesson statistics"
+        )
+
+    stats = await db.get(LessonStats, lesson_id)
+    if not stats:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No statistics for this lesson"
+        )
+
+    runtime = QuantileSketch.from_json(stats.runtime_sketch)
+    errors = TopK.from_json(TOP_ERRORS_CAPACITY, stats.top_errors)
+    return json_response(LessonStatsResponse(
+        lesson_id=stats.lesson_id,
+        submissions=stats.submissions,
+        pass_rate=round(stats.passed / stats.submissions * 100, 2) if stats.submissions else 0.0,
+        learners=stats.learners,
+        learners_passed=stats.learners_passed,
+        attempts_to_first_pass=(
+            round(stats.first_pass_attempts / stats.learners_passed, 2) if stats.learners_passed else None
+        ),
+        median_runtime=runtime.quantile(0.5),
+        p90_runtime=runtime.quantile(0.9),
+        common_errors=[ErrorCount(message=message, count=count) for message, count in errors.top(TOP_ERRORS_REPORTED)],
+        updated_at=stats.updated_at,
+        reconciled_at=stats.reconciled_at
+    ))
+
+@router.post("", response_model=LessonSourceResponse, status_code=status.HTTP_201_CREATED)
 async def create_lesson(
     lesson_data: LessonCreate,
     db: AsyncSession = Depends(get_db),
@@ -174,7 +508,7 @@ async def create_lesson(
         )
 
     # Check if slug already exists
-    result = await db.execute(select(Lesson).where(Lesson.slug == lesson_data.slug))
+    result = await db.execute(select(Lesson.id).where(Lesson.slug == lesson_data.slug))
     if result.scalar_one_or_none():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -194,18 +528,64 @@ async def create_lesson(
         test_cases=lesson_data.test_cases,
         language=lesson_data.language,
         estimated_time=lesson_data.estimated_time,
-        tags=lesson_data.tags
+        tags=lesson_data.tags,
+        version=1,
+        test_suite_version=1
     )
 
     db.add(new_lesson)
+    await db.flush()
+    db.add(new_version(new_lesson))
     await db.commit()
-    await db.refresh(new_lesson)
+    # Only reload server-generated columns; a full refresh would expire the
+    # deferred body columns and lazy-load them outside the async context
+    await db.refresh(new_lesson, ["created_at"])
+    await publish_catalog_change()
+
+    return json_response(LessonSourceResponse.model_validate(new_lesson), status_code=status.HTTP_201_CREATED)
+
+@router.post("/sync")
+async def sync_content_pack(
+    request: Request,
+    dry_run: bool = False,
+    unpublish_missing: bool = False,
+    user_id: str = Depends(get_token_user_id)
+):
+    """
+    Sync lessons from a JSONL content pack in the request body (admin only);
+    only lessons whose content changed are written
+    """
+    # The admin check uses a short session: the sync renders and writes on
+    # its own connections, and must not keep this one in a transaction
+    db = await open_read_session(request)
+    try:
+        current_user = await load_active_user(user_id, db)
+    finally:
+        await db.close()
 
-    return LessonResponse.from_orm(new_lesson)
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can sync lessons"
+        )
+
+    try:
+        lessons = parse_jsonl((await request.body()).decode("utf-8"), "request")
+        report = await sync_lessons(lessons, dry_run, unpublish_missing)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    if report.changed and not dry_run:
+        await publish_catalog_change()
+
+    return json_response(report)
 
-@router.put("/{lesson_id}", response_model=LessonResponse)
+@router.put("/{lesson_id}", response_model=LessonSourceResponse)
 async def update_lesson(
-    lesson_id: str,
+    lesson_id: EntityId,
     lesson_data: LessonUpdate,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -220,8 +600,14 @@ async def update_lesson(
             detail="Only administrators can update lessons"
         )
 
-    # Get lesson
-    result = await db.execute(select(Lesson).where(Lesson.id == lesson_id))
+    # Get lesson, locked so concurrent edits and content syncs number
+    # versions one after another
+    result = await db.execute(
+        select(Lesson)
+        .options(undefer_group("body"), undefer_group("rendered"))
+        .where(Lesson.id == lesson_id)
+        .with_for_update()
+    )
     lesson = result.scalar_one_or_none()
 
     if not lesson:
@@ -230,19 +616,32 @@ async def update_lesson(
             detail="Lesson not found"
         )
 
+    previous_hash = version_hash(lesson_values(lesson))
+
     # Update fields
-    update_data = lesson_data.dict(exclude_unset=True)
+    update_data = lesson_data.model_dump(exclude_unset=True)
+    if "test_cases" in update_data and update_data["test_cases"] != lesson.test_cases:
+        # Stored submissions reference test cases by index within a version
+        lesson.test_suite_version += 1
     for field, value in update_data.items():
         setattr(lesson, field, value)
+    # Diverged from any content pack; the next sync rewrites it
+    lesson.content_hash = None
+
+    # Versions are immutable: a content change is a new one
+    if version_hash(lesson_values(lesson)) != previous_hash:
+        lesson.version += 1
+        db.add(new_version(lesson))
 
     await db.commit()
-    await db.refresh(lesson)
+    await db.refresh(lesson, ["updated_at"])
+    await publish_catalog_change()
 
-    return LessonResponse.from_orm(lesson)
+    return json_response(LessonSourceResponse.model_validate(lesson))
 
 @router.delete("/{lesson_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_lesson(
-    lesson_id: str,
+    lesson_id: EntityId,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -268,5 +667,6 @@ async def delete_lesson(
 
     await db.delete(lesson)
     await db.commit()
+    await publish_catalog_change()
 
     return None
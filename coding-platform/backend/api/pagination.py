@@ -0,0 +1,92 @@
+"""
+Lesson listing filters and keyset pagination
+Pages are ordered by (order, id) and continued with an opaque cursor
+"""
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import tuple_
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+import base64
+import binascii
+import os
+import orjson
+
+from database.ids import canonical_id
+from models.lesson import Lesson
+
+# Response header carrying the cursor for the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+LESSON_PAGE_SIZE = int(os.getenv("LESSON_PAGE_SIZE", "100"))
+MAX_LESSON_PAGE_SIZE = 500
+
+@dataclass
+class LessonQuery:
+    """
+    Filters and position of one page of published lessons
+    """
+    difficulty: Optional[str] = None
+    language: Optional[str] = None
+    tags: List[str] = field(default_factory=list)  # Lessons must carry all of them
+    after: Optional[Tuple[int, str]] = None  # (order, id) of the previous page's last lesson
+    limit: int = LESSON_PAGE_SIZE
+
+    def facets(self) -> List[Tuple[str, str]]:
+        """Requested (facet, value) pairs"""
+        facets = [(name, value) for name, value in (("difficulty", self.difficulty), ("language", self.language)) if value]
+        return facets + [("tag", tag) for tag in self.tags]
+
+    def cache_key(self) -> str:
+        """Stable description of the query, for ETags"""
+        return repr((self.difficulty, self.language, sorted(self.tags), self.after, self.limit))
+
+def encode_cursor(order: int, lesson_id: str) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([order, lesson_id])).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """
+    Sort key encoded in a cursor; malformed cursors are a 400
+    """
+    try:
+        order, lesson_id = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(order), canonical_id(str(lesson_id))
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def lesson_query(
+    difficulty: Optional[str] = None,
+    language: Optional[str] = None,
+    tag: List[str] = Query([]),
+    cursor: Optional[str] = None,
+    limit: int = Query(LESSON_PAGE_SIZE, ge=1, le=MAX_LESSON_PAGE_SIZE)
+) -> LessonQuery:
+    """
+    Dependency reading lesson filters and the page position from the query string
+    """
+    return LessonQuery(
+        difficulty=difficulty,
+        language=language,
+        tags=tag,
+        after=decode_cursor(cursor) if cursor else None,
+        limit=limit,
+    )
+
+def lesson_filters(query: LessonQuery) -> list:
+    """
+    WHERE clauses for a lesson query, matching the partial indexes on
+    published lessons and the GIN index on tags
+    """
+    clauses = [Lesson.is_published == True]
+    if query.difficulty:
+        clauses.append(Lesson.difficulty == query.difficulty)
+    if query.language:
+        clauses.append(Lesson.language == query.language)
+    if query.tags:
+        clauses.append(Lesson.tags.contains(query.tags))
+    if query.after:
+        clauses.append(tuple_(Lesson.order, Lesson.id) > tuple_(*query.after))
+    return clauses
@@ -3,18 +3,25 @@ Progress API endpoints
 Tracks user progress through lessons
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func, case
+from sqlalchemy.dialects.postgresql import insert
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
-from database.connection import get_db
+from database.connection import get_db, get_read_db
+from database.ids import EntityId
 from models.user import User
 from models.progress import UserProgress
 from models.lesson import Lesson
-from api.auth import get_current_user
+from api.auth import get_current_user, get_current_reader, get_token_user_id, load_active_user
+from api.pagination import NEXT_CURSOR_HEADER, LessonQuery, encode_cursor, lesson_filters, lesson_query
+from api.serialization import json_response
+from api.events import publish_events
+from api.http_cache import bump_progress_version
+from api.progress_cache import cached_progress_view
 
 router = APIRouter()
 
@@ -60,94 +67,202 @@ class OverallProgress(BaseModel):
     average_score: float
     completion_rate: float
 
+def progress_event(user: User, lesson_id: str, progress: Optional[ProgressResponse]) -> dict:
+    """
+    Live event for a progress change; progress is None after a reset
+    """
+    return {"user_id": user.id, "username": user.username, "lesson_id": lesson_id, "progress": progress}
+
+def graded_score(tests_passed: int, tests_failed: int) -> int:
+    """
+    Percentage of a lesson's test cases that passed
+    """
+    total = tests_passed + tests_failed
+    return round(tests_passed * 100 / total) if total else 0
+
+async def upsert_progress(
+    db: AsyncSession,
+    user_id: str,
+    lesson_id: str,
+    score: int,
+    completed: bool,
+    attempted: bool
+) -> ProgressResponse:
+    """
+    Create or update the user's progress for the lesson in one
+    INSERT ... ON CONFLICT, inside the caller's transaction
+
+    Scores and completion only ever improve; attempted counts an attempt.
+    The caller commits and bumps the progress version.
+    """
+    now = func.now()
+    stmt = insert(UserProgress).values(
+        user_id=user_id,
+        lesson_id=lesson_id,
+        is_completed=completed,
+        attempts=1 if attempted else 0,
+        best_score=score,
+        completed_at=now if completed else None,
+        last_attempt_at=now if attempted else None
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_user_progress_user_lesson",
+        set_={
+            "attempts": func.coalesce(UserProgress.attempts, 0) + stmt.excluded.attempts,
+            "best_score": func.greatest(UserProgress.best_score, stmt.excluded.best_score),
+            "is_completed": UserProgress.is_completed.is_(True) | stmt.excluded.is_completed,
+            "completed_at": func.coalesce(UserProgress.completed_at, stmt.excluded.completed_at),
+            "last_attempt_at": func.coalesce(stmt.excluded.last_attempt_at, UserProgress.last_attempt_at),
+        }
+    ).returning(*UserProgress.__table__.c)
+
+    result = await db.execute(stmt)
+    return ProgressResponse.model_validate(result.one())
+
+async def record_graded_attempt(
+    db: AsyncSession,
+    user_id: str,
+    lesson_id: str,
+    tests_passed: int,
+    tests_failed: int
+) -> ProgressResponse:
+    """
+    Count a graded run against the user's progress for the lesson
+    """
+    return await upsert_progress(
+        db,
+        user_id,
+        lesson_id,
+        score=graded_score(tests_passed, tests_failed),
+        completed=tests_failed == 0 and tests_passed > 0,
+        attempted=True
+    )
+
 # API Endpoints
+# Views are served from the per-user cache, or checked against their ETag
+# from the token alone, before the user lookup; either way a repeat read
+# does not touch the database
 @router.get("/overview", response_model=OverallProgress)
 async def get_progress_overview(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    user_id: str = Depends(get_token_user_id),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get overall progress statistics for current user
     """
-    # Get all published lessons
-    lessons_result = await db.execute(
-        select(Lesson).where(Lesson.is_published == True)
-    )
-    total_lessons = len(lessons_result.scalars().all())
+    async def build():
+        current_user = await load_active_user(user_id, db)
 
-    # Get user progress
-    progress_result = await db.execute(
-        select(UserProgress).where(UserProgress.user_id == current_user.id)
-    )
-    progress_records = progress_result.scalars().all()
-
-    completed_lessons = sum(1 for p in progress_records if p.is_completed)
-    in_progress_lessons = len(progress_records) - completed_lessons
-    total_attempts = sum(p.attempts for p in progress_records)
-
-    # Calculate average score
-    avg_score = 0.0
-    if progress_records:
-        avg_score = sum(p.best_score for p in progress_records) / len(progress_records)
-
-    # Calculate completion rate
-    completion_rate = 0.0
-    if total_lessons > 0:
-        completion_rate = (completed_lessons / total_lessons) * 100
-
-    return OverallProgress(
-        total_lessons=total_lessons,
-        completed_lessons=completed_lessons,
-        in_progress_lessons=in_progress_lessons,
-        total_attempts=total_attempts,
-        average_score=round(avg_score, 2),
-        completion_rate=round(completion_rate, 2)
-    )
+        # Count published lessons
+        lessons_result = await db.execute(
+            select(func.count(Lesson.id)).where(Lesson.is_published == True)
+        )
+        total_lessons = lessons_result.scalar_one()
+
+        # Aggregate user progress in the database instead of loading every row
+        progress_result = await db.execute(
+            select(
+                func.count(UserProgress.id),
+                func.count(case((UserProgress.is_completed == True, 1))),
+                func.coalesce(func.sum(UserProgress.attempts), 0),
+                func.avg(UserProgress.best_score),
+            ).where(UserProgress.user_id == current_user.id)
+        )
+        progress_count, completed_lessons, total_attempts, avg_score = progress_result.one()
+
+        in_progress_lessons = progress_count - completed_lessons
+
+        # Calculate average score
+        avg_score = float(avg_score or 0.0)
+
+        # Calculate completion rate
+        completion_rate = 0.0
+        if total_lessons > 0:
+            completion_rate = (completed_lessons / total_lessons) * 100
+
+        overview = OverallProgress(
+            total_lessons=total_lessons,
+            completed_lessons=completed_lessons,
+            in_progress_lessons=in_progress_lessons,
+            total_attempts=total_attempts,
+            average_score=round(avg_score, 2),
+            completion_rate=round(completion_rate, 2)
+        )
+        return overview, {}
+
+    return await cached_progress_view(request, response, user_id, "overview", build)
 
 @router.get("/lessons", response_model=List[LessonProgressItem])
 async def get_all_lessons_with_progress(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    query: LessonQuery = Depends(lesson_query),
+    user_id: str = Depends(get_token_user_id),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Get all lessons with user progress information
+    Get a page of lessons with user progress information, filtered and
+    paged like GET /api/lessons
     """
-    # Get all published lessons
-    lessons_result = await db.execute(
-        select(Lesson)
-        .where(Lesson.is_published == True)
-        .order_by(Lesson.order)
-    )
-    lessons = lessons_result.scalars().all()
+    async def build():
+        current_user = await load_active_user(user_id, db)
+
+        # Fetch published lessons joined with this user's progress as plain rows,
+        # selecting only the columns the response needs; one extra row tells
+        # whether another page follows
+        result = await db.execute(
+            select(
+                Lesson.id,
+                Lesson.title,
+                Lesson.slug,
+                Lesson.difficulty,
+                Lesson.order,
+                UserProgress.id.label("progress_id"),
+                UserProgress.is_completed,
+                UserProgress.attempts,
+                UserProgress.best_score,
+            )
+            .outerjoin(
+                UserProgress,
+                and_(
+                    UserProgress.lesson_id == Lesson.id,
+                    UserProgress.user_id == current_user.id
+                )
+            )
+            .where(*lesson_filters(query))
+            .order_by(Lesson.order, Lesson.id)
+            .limit(query.limit + 1)
+        )
+        rows = result.all()
+        headers = {}
+        if len(rows) > query.limit:
+            rows = rows[:query.limit]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].order, rows[-1].id)
+
+        items = [
+            LessonProgressItem(
+                lesson_id=row.id,
+                lesson_title=row.title,
+                lesson_slug=row.slug,
+                difficulty=row.difficulty,
+                is_completed=bool(row.is_completed),
+                attempts=row.attempts or 0,
+                best_score=row.best_score or 0,
+                progress_id=row.progress_id
+            )
+            for row in rows
+        ]
+        return items, headers
 
-    # Get user progress for all lessons
-    progress_result = await db.execute(
-        select(UserProgress).where(UserProgress.user_id == current_user.id)
-    )
-    progress_records = {p.lesson_id: p for p in progress_result.scalars().all()}
-
-    # Combine lesson and progress data
-    result = []
-    for lesson in lessons:
-        progress = progress_records.get(lesson.id)
-        result.append(LessonProgressItem(
-            lesson_id=lesson.id,
-            lesson_title=lesson.title,
-            lesson_slug=lesson.slug,
-            difficulty=lesson.difficulty,
-            is_completed=progress.is_completed if progress else False,
-            attempts=progress.attempts if progress else 0,
-            best_score=progress.best_score if progress else 0,
-            progress_id=progress.id if progress else None
-        ))
-
-    return result
+    return await cached_progress_view(request, response, user_id, f"lessons:{query.cache_key()}", build)
 
 @router.get("/lesson/{lesson_id}", response_model=ProgressResponse)
 async def get_lesson_progress(
-    lesson_id: str,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    lesson_id: EntityId,
+    current_user: User = Depends(get_current_reader),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get progress for a specific lesson
@@ -168,21 +283,30 @@ async def get_lesson_progress(
             detail="Progress not found for this lesson"
         )
 
-    return ProgressResponse.from_orm(progress)
+    return json_response(ProgressResponse.model_validate(progress))
 
 @router.post("/lesson/{lesson_id}", response_model=ProgressResponse)
 async def update_lesson_progress(
-    lesson_id: str,
+    lesson_id: EntityId,
     progress_data: ProgressUpdate,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Update or create progress for a lesson
+    Start progress for a lesson
+
+    Attempts, scores and completion come from graded runs; only
+    administrators may set a score or completion here.
     """
+    if (progress_data.score or progress_data.is_completed) and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Scores and completion are recorded from graded runs"
+        )
+
     # Verify lesson exists
     lesson_result = await db.execute(
-        select(Lesson).where(Lesson.id == lesson_id)
+        select(Lesson.id).where(Lesson.id == lesson_id)
     )
     lesson = lesson_result.scalar_one_or_none()
 
@@ -192,49 +316,23 @@ async def update_lesson_progress(
             detail="Lesson not found"
         )
 
-    # Get or create progress record
-    progress_result = await db.execute(
-        select(UserProgress).where(
-            and_(
-                UserProgress.user_id == current_user.id,
-                UserProgress.lesson_id == lesson_id
-            )
-        )
+    progress_response = await upsert_progress(
+        db,
+        current_user.id,
+        lesson_id,
+        score=progress_data.score or 0,
+        completed=bool(progress_data.is_completed),
+        attempted=False
     )
-    progress = progress_result.scalar_one_or_none()
-
-    if not progress:
-        # Create new progress record
-        progress = UserProgress(
-            user_id=current_user.id,
-            lesson_id=lesson_id,
-            attempts=1,
-            best_score=progress_data.score or 0,
-            last_attempt_at=datetime.utcnow()
-        )
-        db.add(progress)
-    else:
-        # Update existing progress
-        progress.attempts += 1
-        progress.last_attempt_at = datetime.utcnow()
-
-        # Update best score if current is better
-        if progress_data.score and progress_data.score > progress.best_score:
-            progress.best_score = progress_data.score
-
-    # Mark as completed if specified
-    if progress_data.is_completed and not progress.is_completed:
-        progress.is_completed = True
-        progress.completed_at = datetime.utcnow()
-
     await db.commit()
-    await db.refresh(progress)
+    await bump_progress_version(current_user.id)
 
-    return ProgressResponse.from_orm(progress)
+    await publish_events(current_user, [("progress", progress_event(current_user, lesson_id, progress_response))])
+    return json_response(progress_response)
 
 @router.delete("/lesson/{lesson_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def reset_lesson_progress(
-    lesson_id: str,
+    lesson_id: EntityId,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -254,5 +352,7 @@ async def reset_lesson_progress(
     if progress:
         await db.delete(progress)
         await db.commit()
+        await bump_progress_version(current_user.id)
+        await publish_events(current_user, [("progress", progress_event(current_user, lesson_id, None))])
 
     return None
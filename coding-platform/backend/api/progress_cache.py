@@ -0,0 +1,158 @@
+"""
+Per-user progress view cache
+Composed progress responses live in Redis until the user's next progress write
+"""
+
+from fastapi import Request, Response
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import os
+import orjson
+from loguru import logger
+
+from api.catalog import get_catalog
+from api.http_cache import (
+    PROGRESS_CACHE_CONTROL, cache_headers, etag_matches, make_etag, not_modified,
+    progress_version, progress_version_key, progress_views_key
+)
+from api.serialization import dump_json, json_response
+from database.cache import redis_client
+
+# Cached views also go when the user's progress version is bumped
+PROGRESS_CACHE_TTL = int(os.getenv("PROGRESS_CACHE_TTL", "3600"))
+
+# On a miss one request per user and view builds it; concurrent ones wait
+# up to this long for that result before building their own
+PROGRESS_FILL_TIMEOUT = float(os.getenv("PROGRESS_FILL_TIMEOUT", "2.0"))
+FILL_POLL_INTERVAL = 0.05
+
+# KEYS[1]: progress version, KEYS[2]: views hash; ARGV: version the view
+# was built at, view name, entry, TTL. Entries built before a write bumped
+# the version are dropped instead of outliving it.
+STORE_VIEW_LUA = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return 1
+"""
+
+store_view_script = redis_client.register_script(STORE_VIEW_LUA)
+
+Builder = Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]]
+
+@dataclass
+class CachedView:
+    """A composed progress response and what it was built from"""
+    catalog_etag: str
+    etag: Optional[str]
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def encode(self) -> str:
+        # orjson never emits a raw newline, so the body can go last as is
+        return "\n".join((
+            self.catalog_etag, self.etag or "", orjson.dumps(self.headers).decode(), self.body.decode()
+        ))
+
+    @classmethod
+    def decode(cls, raw: str) -> Optional["CachedView"]:
+        parts = raw.split("\n", 3)
+        if len(parts) != 4:
+            return None
+        catalog_etag, etag, headers, body = parts
+        return cls(catalog_etag, etag or None, body.encode(), orjson.loads(headers))
+
+def fill_key(user_id: str, view: str) -> str:
+    """Redis key held while one request builds a view"""
+    return f"progress:fill:{user_id}:{view}"
+
+async def get_view(user_id: str, view: str, catalog_etag: str) -> Optional[CachedView]:
+    """
+    Cached view, unless it is missing or predates a catalog change
+    """
+    try:
+        raw = await redis_client.hget(progress_views_key(user_id), view)
+    except Exception as e:
+        logger.warning(f"Progress cache unavailable: {e}")
+        return None
+    cached = CachedView.decode(raw) if raw else None
+    if cached is None or cached.catalog_etag != catalog_etag:
+        return None
+    return cached
+
+async def claim_fill(user_id: str, view: str, catalog_etag: str) -> Tuple[Optional[CachedView], bool]:
+    """
+    Take the right to build a missing view, or wait for whoever has it
+
+    Returns the view if another request stored it in time, and whether
+    this request holds the fill lock.
+    """
+    try:
+        if await redis_client.set(fill_key(user_id, view), "1", nx=True, px=int(PROGRESS_FILL_TIMEOUT * 1000)):
+            return None, True
+    except Exception as e:
+        logger.warning(f"Progress cache unavailable: {e}")
+        return None, False
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + PROGRESS_FILL_TIMEOUT
+    while loop.time() < deadline:
+        await asyncio.sleep(FILL_POLL_INTERVAL)
+        cached = await get_view(user_id, view, catalog_etag)
+        if cached:
+            return cached, False
+    return None, False
+
+async def store_view(user_id: str, version: str, view: str, cached: CachedView, release: bool):
+    """
+    Store a built view if the progress version is still the one it was built at
+    """
+    try:
+        await store_view_script(
+            keys=[progress_version_key(user_id), progress_views_key(user_id)],
+            args=[version, view, cached.encode(), PROGRESS_CACHE_TTL]
+        )
+        if release:
+            await redis_client.delete(fill_key(user_id, view))
+    except Exception as e:
+        logger.warning(f"Could not cache progress view: {e}")
+
+async def cached_progress_view(
+    request: Request,
+    response: Response,
+    user_id: str,
+    view: str,
+    build: Builder
+) -> Response:
+    """
+    Progress view from the cache, built by build() on a miss
+
+    A hit is one HGET and answers both 200s and 304s. build returns the
+    body and any extra headers to store with it.
+    """
+    catalog = await get_catalog()
+    cached = await get_view(user_id, view, catalog.list_etag)
+
+    if cached is None:
+        version = await progress_version(user_id)
+        etag = make_etag(view, user_id, version, catalog.list_etag) if version else None
+        if etag_matches(request, etag):
+            return not_modified(etag, PROGRESS_CACHE_CONTROL)
+
+        owner = False
+        if version:
+            cached, owner = await claim_fill(user_id, view, catalog.list_etag)
+        if cached is None:
+            body, headers = await build()
+            cached = CachedView(catalog.list_etag, etag, dump_json(body), headers)
+            if version:
+                await store_view(user_id, version, view, cached, owner)
+
+    if etag_matches(request, cached.etag):
+        return not_modified(cached.etag, PROGRESS_CACHE_CONTROL)
+    response.headers.update(cached.headers)
+    response.headers.update(cache_headers(cached.etag, PROGRESS_CACHE_CONTROL))
+    return json_response(cached.body, response)
@@ -0,0 +1,183 @@
+"""
+Execution-time quotas per user and per organization
+Sandbox seconds are counted in Redis over rolling windows shared by all workers
+"""
+
+from fastapi import HTTPException, status
+from dataclasses import dataclass
+from typing import Dict, List
+import math
+import os
+import time
+from loguru import logger
+
+from api.ratelimit import Rate, parse_rate
+from database.cache import redis_client
+
+# Sandbox seconds allowed per rolling window, e.g. "600/hour"
+EXECUTION_QUOTA_USER = parse_rate(os.getenv("EXECUTION_QUOTA_USER", "600/hour"))
+EXECUTION_QUOTA_ORGANIZATION = parse_rate(os.getenv("EXECUTION_QUOTA_ORGANIZATION", "18000/hour"))
+
+# Below this fraction of a remaining budget, lesson test runs are skipped
+EXECUTION_QUOTA_DEGRADE_RATIO = float(os.getenv("EXECUTION_QUOTA_DEGRADE_RATIO", "0.2"))
+
+# Each window is tracked as this many fixed buckets; the oldest one rolls off
+QUOTA_BUCKETS = 12
+
+@dataclass
+class QuotaUsage:
+    """
+    Seconds consumed by one user or organization in the current window
+    """
+    scope: str  # user, organization
+    owner: str
+    used: float
+    limit: int
+    window: int  # seconds
+    retry_after: int = 0  # Seconds until usage drops back under the limit
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self.limit - self.used)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.used >= self.limit
+
+    @property
+    def low(self) -> bool:
+        return self.remaining < self.limit * EXECUTION_QUOTA_DEGRADE_RATIO
+
+    def as_dict(self) -> dict:
+        return {
+            "scope": self.scope,
+            "owner": self.owner,
+            "used_seconds": round(self.used, 3),
+            "limit_seconds": self.limit,
+            "remaining_seconds": round(self.remaining, 3),
+            "window_seconds": self.window,
+        }
+
+@dataclass
+class QuotaCheck:
+    """
+    Outcome of the pre-execution check
+    """
+    usages: List[QuotaUsage]
+
+    @property
+    def run_tests(self) -> bool:
+        """Test runs multiply sandbox time, so they stop first when a budget runs low"""
+        return not any(usage.low for usage in self.usages)
+
+def bucket_seconds(rate: Rate) -> float:
+    return rate.period / QUOTA_BUCKETS
+
+def usage_key(scope: str, owner: str, rate: Rate, bucket: int) -> str:
+    return f"quota:{scope}:{owner}:{rate.period}:{bucket}"
+
+def top_key(scope: str, rate: Rate, bucket: int) -> str:
+    return f"quota:top:{scope}:{rate.period}:{bucket}"
+
+def window_buckets(rate: Rate, now: float) -> List[int]:
+    """Bucket numbers covering the rolling window, oldest first"""
+    current = int(now // bucket_seconds(rate))
+    return list(range(current - QUOTA_BUCKETS + 1, current + 1))
+
+def quota_scopes(user) -> Dict[str, tuple]:
+    """Budgets that apply to a user: (owner, rate) by scope"""
+    scopes = {"user": (str(user.id), EXECUTION_QUOTA_USER)}
+    if user.organization:
+        scopes["organization"] = (user.organization, EXECUTION_QUOTA_ORGANIZATION)
+    return scopes
+
+def summarize(scope: str, owner: str, rate: Rate, buckets: List[int], values: List, now: float) -> QuotaUsage:
+    """
+    Total a window's buckets and work out when enough of them expire
+    """
+    amounts = [float(value or 0) for value in values]
+    usage = QuotaUsage(scope, owner, sum(amounts), rate.count, rate.period)
+
+    if usage.exhausted:
+        size = bucket_seconds(rate)
+        left = usage.used
+        for bucket, amount in zip(buckets, amounts):
+            left -= amount
+            if left < rate.count:
+                # The bucket leaves the window once the window start passes its end
+                usage.retry_after = max(1, math.ceil((bucket + QUOTA_BUCKETS) * size - now))
+                break
+    return usage
+
+async def get_usage(scopes: Dict[str, tuple]) -> List[QuotaUsage]:
+    """
+    Current usage for several (scope -> (owner, rate)) budgets in one round trip
+    """
+    now = time.time()
+    plan = []
+    keys = []
+    for scope, (owner, rate) in scopes.items():
+        buckets = window_buckets(rate, now)
+        plan.append((scope, owner, rate, buckets))
+        keys.extend(usage_key(scope, owner, rate, bucket) for bucket in buckets)
+
+    values = await redis_client.mget(keys)
+    return [
+        summarize(scope, owner, rate, buckets, values[i * QUOTA_BUCKETS:(i + 1) * QUOTA_BUCKETS], now)
+        for i, (scope, owner, rate, buckets) in enumerate(plan)
+    ]
+
+async def check_execution_quota(user) -> QuotaCheck:
+    """
+    Check a user's budgets before scheduling an execution
+
+    Raises 429 when any budget is used up; the returned check tells the
+    caller whether test runs should be skipped. Redis errors fail open.
+    """
+    try:
+        usages = await get_usage(quota_scopes(user))
+    except Exception as e:
+        logger.warning(f"Quota check unavailable, allowing execution: {e}")
+        return QuotaCheck([])
+
+    for usage in usages:
+        if usage.exhausted:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Execution time quota exhausted for this {usage.scope}",
+                headers={"Retry-After": str(usage.retry_after)},
+            )
+    return QuotaCheck(usages)
+
+async def charge_execution_quota(user, seconds: float):
+    """
+    Charge measured sandbox seconds to all of a user's budgets
+    """
+    if seconds <= 0:
+        return
+
+    now = time.time()
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for scope, (owner, rate) in quota_scopes(user).items():
+                bucket = int(now // bucket_seconds(rate))
+                expire = rate.period + math.ceil(bucket_seconds(rate))
+                key = usage_key(scope, owner, rate, bucket)
+                pipe.incrbyfloat(key, seconds)
+                pipe.expire(key, expire)
+                # Per-bucket rankings back the admin usage report
+                pipe.zincrby(top_key(scope, rate, bucket), seconds, owner)
+                pipe.expire(top_key(scope, rate, bucket), expire)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not charge execution quota: {e}")
+
+async def top_consumers(scope: str, limit: int = 20) -> List[QuotaUsage]:
+    """
+    Heaviest users or organizations over the current window
+    """
+    rate = EXECUTION_QUOTA_USER if scope == "user" else EXECUTION_QUOTA_ORGANIZATION
+    keys = [top_key(scope, rate, bucket) for bucket in window_buckets(rate, time.time())]
+    ranked = await redis_client.zunion(keys, withscores=True)
+    ranked = sorted(ranked, key=lambda item: item[1], reverse=True)[:limit]
+    return [QuotaUsage(scope, owner, used, rate.count, rate.period) for owner, used in ranked]
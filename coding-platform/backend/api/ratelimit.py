@@ -0,0 +1,120 @@
+"""
+Redis-backed rate limiting shared by all workers
+Token buckets are updated atomically by a Lua script
+"""
+
+from fastapi import HTTPException, Request, Response, status
+from dataclasses import dataclass
+from typing import Callable, Optional
+import math
+import os
+import re
+from loguru import logger
+
+from database.cache import redis_client
+
+# Default limit for code execution, kept for existing deployments
+RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "10"))
+
+RATE_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+RATE_RE = re.compile(r"^\s*(\d+)\s*/\s*(second|minute|hour|day)\s*$")
+
+# KEYS[1]: bucket hash; ARGV: capacity, refill rate (tokens per ms), cost.
+# Returns {allowed, tokens left, ms until the request could succeed, ms until full}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = math.ceil((cost - tokens) / rate)
+end
+
+local full_in = math.ceil((capacity - tokens) / rate)
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], full_in + 1000)
+return {allowed, math.floor(tokens), retry_after, full_in}
+"""
+
+token_bucket = redis_client.register_script(TOKEN_BUCKET_LUA)
+
+@dataclass(frozen=True)
+class Rate:
+    """A limit of count requests per period seconds"""
+    count: int
+    period: int
+
+    def __str__(self):
+        return f"{self.count}/{self.period}s"
+
+def parse_rate(spec: str) -> Rate:
+    """
+    Parse a limit such as "10/minute"
+    """
+    match = RATE_RE.match(spec)
+    if not match:
+        raise ValueError(f"Invalid rate limit {spec!r}, expected e.g. '10/minute'")
+    return Rate(int(match.group(1)), RATE_PERIODS[match.group(2)])
+
+def client_ip(request: Request) -> str:
+    """
+    Client address as seen by uvicorn
+
+    Behind nginx, FORWARDED_ALLOW_IPS must list the proxy address (pinned
+    to 172.25.0.10 in docker-compose) so uvicorn resolves the real client
+    from X-Forwarded-For; otherwise every client shares nginx's bucket.
+    """
+    return request.client.host if request.client else "unknown"
+
+class RateLimit:
+    """
+    Route dependency enforcing a token bucket per client
+
+    The limit is read from RATE_LIMIT_<NAME> (e.g. RATE_LIMIT_LOGIN=5/minute).
+    Clients get `count` requests as a burst, refilled evenly over the period.
+    When Redis is unavailable requests are allowed (fail open).
+    """
+
+    def __init__(self, name: str, default: str, key_func: Optional[Callable[[Request], str]] = None):
+        self.name = name
+        self.rate = parse_rate(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+        self.key_func = key_func or (lambda request: f"ip:{client_ip(request)}")
+
+    async def __call__(self, request: Request, response: Response):
+        key = f"ratelimit:{self.name}:{self.key_func(request)}"
+        try:
+            allowed, remaining, retry_after_ms, full_in_ms = await token_bucket(
+                keys=[key],
+                args=[self.rate.count, self.rate.count / (self.rate.period * 1000), 1]
+            )
+        except Exception as e:
+            logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+            return
+
+        headers = {
+            "X-RateLimit-Limit": str(self.rate.count),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(math.ceil(full_in_ms / 1000)),
+        }
+        if not allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(retry_after_ms / 1000)))
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded, please slow down",
+                headers=headers,
+            )
+        response.headers.update(headers)
@@ -0,0 +1,124 @@
+"""
+Lesson search
+Ranked full-text search backed by a Postgres tsvector, with an in-memory
+inverted index over the catalog as fallback
+"""
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List
+import heapq
+import math
+import os
+import re
+
+from models.lesson import Lesson
+
+# postgres: ranked tsvector query, falling back to memory on errors; memory: catalog index only
+LESSON_SEARCH_BACKEND = os.getenv("LESSON_SEARCH_BACKEND", "postgres")
+
+# Text search configuration; must match the one in the search_vector column
+SEARCH_CONFIG = "english"
+
+# Field weights for the in-memory index, mirroring the tsvector's A/B/C labels
+FIELD_WEIGHTS = {"title": 1.0, "tags": 0.4, "description": 0.4, "content": 0.1}
+
+# Shorter terms only match whole words, so one letter cannot expand to half
+# the vocabulary
+PREFIX_MIN_LENGTH = 3
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+class SearchIndex:
+    """
+    Inverted index from terms to weighted lesson positions in a catalog snapshot
+    """
+
+    def __init__(self, lessons):
+        postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        for position, lesson in enumerate(lessons):
+            fields = {
+                "title": lesson.title,
+                "tags": " ".join(lesson.tags or []),
+                "description": lesson.description,
+                "content": lesson.content,
+            }
+            for name, text in fields.items():
+                for term in tokenize(text):
+                    scores = postings[term]
+                    scores[position] = scores.get(position, 0.0) + FIELD_WEIGHTS[name]
+
+        # Frequencies are damped once here rather than on every query
+        self.postings = {
+            term: {position: math.log1p(weight) for position, weight in scores.items()}
+            for term, scores in postings.items()
+        }
+        self.vocabulary = sorted(self.postings)
+        self.size = len(lessons)
+
+    def matches(self, term: str) -> Dict[int, float]:
+        """Positions containing the term, or a word it prefixes"""
+        if len(term) < PREFIX_MIN_LENGTH:
+            return self.postings.get(term, {})
+
+        start = bisect_left(self.vocabulary, term)
+        end = bisect_left(self.vocabulary, term + "\U0010ffff", start)
+        words = self.vocabulary[start:end]
+        if len(words) == 1:
+            return self.postings[words[0]]
+
+        matched: Dict[int, float] = {}
+        for word in words:
+            for position, score in self.postings[word].items():
+                if score > matched.get(position, 0.0):
+                    matched[position] = score
+        return matched
+
+    def search(self, text: str, limit: int) -> List[int]:
+        """
+        Positions of lessons containing every query term, best first
+
+        Each term contributes its damped, field-weighted frequency scaled
+        by inverse document frequency.
+        """
+        terms = list(dict.fromkeys(tokenize(text)))
+        if not terms:
+            return []
+
+        per_term = [self.matches(term) for term in terms]
+        if not all(per_term):
+            return []
+        if len(per_term) == 1:
+            # One term: its idf is a constant factor and cannot change the order
+            scores = per_term[0]
+        else:
+            common = per_term[0].keys()
+            for matched in per_term[1:]:
+                common = common & matched.keys()
+            weighted = [(matched, math.log(1 + self.size / len(matched))) for matched in per_term]
+            scores = {
+                position: sum(matched[position] * idf for matched, idf in weighted)
+                for position in common
+            }
+
+        # Equal scores keep catalog order, i.e. (order, id)
+        return heapq.nsmallest(limit, scores, key=lambda position: (-scores[position], position))
+
+async def search_lesson_ids(db: AsyncSession, text: str, limit: int) -> List[str]:
+    """
+    Ids of published lessons matching a web-style query, best first
+    """
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+    rank = func.ts_rank_cd(Lesson.search_vector, query)
+    result = await db.execute(
+        select(Lesson.id)
+        .where(Lesson.is_published == True, Lesson.search_vector.bool_op("@@")(query))
+        .order_by(rank.desc(), Lesson.order, Lesson.id)
+        .limit(limit)
+    )
+    return list(result.scalars())
@@ -0,0 +1,44 @@
+"""
+JSON serialization
+Models validated once in the endpoint are encoded with orjson and returned as is
+"""
+
+from fastapi import Response
+from pydantic import BaseModel
+from typing import Any, Optional
+import orjson
+
+JSON_MEDIA_TYPE = "application/json"
+
+def _encode_model(obj: Any):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dump_json(data: Any) -> bytes:
+    """
+    Encode validated models (or lists and dicts of them) to JSON bytes
+    """
+    # Z suffix for UTC, matching Pydantic's own JSON output
+    return orjson.dumps(data, default=_encode_model, option=orjson.OPT_UTC_Z)
+
+def json_response(
+    data: Any,
+    response: Optional[Response] = None,
+    status_code: int = 200
+) -> Response:
+    """
+    Response for validated models or pre-encoded JSON bytes
+
+    Returning a Response makes FastAPI skip its response_model validation
+    and encoding, which would otherwise run a second time. Headers that
+    dependencies set on the injected response are carried over.
+    """
+    body = data if isinstance(data, bytes) else dump_json(data)
+    headers = None
+    if response is not None:
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name != "content-length"
+        }
+    return Response(content=body, status_code=status_code, headers=headers, media_type=JSON_MEDIA_TYPE)
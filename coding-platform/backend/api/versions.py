@@ -0,0 +1,70 @@
+"""
+Immutable lesson versions
+A version never changes, so workers keep recently read ones encoded in memory
+"""
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer_group
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+import os
+
+from api.catalog import RenderedContent, rendered_content
+from api.http_cache import make_etag
+from api.serialization import dump_json
+from models.lesson import Lesson
+from models.version import LessonVersion
+
+# Versions held per worker, least recently used evicted first
+VERSION_CACHE_SIZE = int(os.getenv("VERSION_CACHE_SIZE", "1000"))
+
+@dataclass(frozen=True)
+class VersionEntry:
+    """
+    A version's encoded JSON and rendered content
+    """
+    body: bytes
+    content: RenderedContent
+
+_cache: "OrderedDict[tuple, VersionEntry]" = OrderedDict()
+
+def version_etag(lesson_id: str, number: int, *parts) -> str:
+    """ETag known from the URL alone, so revalidation never reads the version"""
+    return make_etag("version", lesson_id, number, *parts)
+
+async def get_version(db: AsyncSession, lesson_id: str, number: int) -> Optional[VersionEntry]:
+    """
+    A version of a published lesson, from memory or the database
+    """
+    from api.lessons import LessonVersionResponse
+
+    key = (lesson_id, number)
+    entry = _cache.get(key)
+    if entry is not None:
+        _cache.move_to_end(key)
+        return entry
+
+    result = await db.execute(
+        select(LessonVersion)
+        .options(undefer_group("body"), undefer_group("rendered"))
+        .join(Lesson, Lesson.id == LessonVersion.lesson_id)
+        .where(
+            LessonVersion.lesson_id == lesson_id,
+            LessonVersion.number == number,
+            Lesson.is_published == True
+        )
+    )
+    version = result.scalar_one_or_none()
+    if version is None:
+        return None
+
+    entry = VersionEntry(
+        body=dump_json(LessonVersionResponse.model_validate(version)),
+        content=rendered_content(version),
+    )
+    _cache[key] = entry
+    if len(_cache) > VERSION_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return entry
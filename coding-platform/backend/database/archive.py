@@ -0,0 +1,155 @@
+"""
+Archival of old code_submissions partitions to compressed NDJSON files
+Usage: python -m database.archive archive|restore YYYY-MM
+"""
+
+from sqlalchemy import select, table, column
+from sqlalchemy.dialects.postgresql import insert
+from datetime import date, datetime
+from pathlib import Path
+from typing import List
+import asyncio
+import gzip
+import json
+import os
+import sys
+from loguru import logger
+
+from database.connection import engine
+from database.partitions import (
+    PARENT_TABLE,
+    add_months,
+    create_partition,
+    drop_partition,
+    list_partitions,
+    month_start,
+    partition_name,
+)
+from models.submission import CodeSubmission
+
+ARCHIVE_DIR = Path(os.getenv("SUBMISSION_ARCHIVE_DIR", "archive/submissions"))
+
+# Months of submissions kept online; older partitions are archived
+SUBMISSION_RETENTION_MONTHS = int(os.getenv("SUBMISSION_RETENTION_MONTHS", "12"))
+
+# Rows per server-side cursor fetch and per restore INSERT
+ARCHIVE_BATCH_SIZE = 1000
+
+def archive_path(month: date) -> Path:
+    """Archive file for a month's partition"""
+    return ARCHIVE_DIR / f"{partition_name(month)}.ndjson.gz"
+
+def encode_row(row) -> str:
+    """Serialize a submission row as one JSON line"""
+    return json.dumps(
+        {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in row._mapping.items()
+        },
+        separators=(",", ":")
+    )
+
+def decode_row(line: str) -> dict:
+    """Parse one archived JSON line back into insertable values"""
+    values = json.loads(line)
+    values["created_at"] = datetime.fromisoformat(values["created_at"])
+    return values
+
+async def archive_month(month: date) -> Path:
+    """
+    Stream a month's partition to disk, then drop it
+
+    Rows are read through a server-side cursor in ARCHIVE_BATCH_SIZE chunks
+    and written to a temporary gzip file, so memory stays bounded regardless
+    of partition size. The partition is only dropped once the file is
+    complete and synced.
+    """
+    name = partition_name(month)
+    partition = table(name, *(column(c.name, c.type) for c in CodeSubmission.__table__.columns))
+
+    path = archive_path(month)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    count = 0
+    async with engine.connect() as conn:
+        result = await conn.stream(
+            select(partition).execution_options(yield_per=ARCHIVE_BATCH_SIZE)
+        )
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as archive:
+            async for rows in result.partitions():
+                for row in rows:
+                    archive.write(encode_row(row) + "\n")
+                count += len(rows)
+
+    with open(tmp_path, "rb") as archive:
+        os.fsync(archive.fileno())
+    os.replace(tmp_path, path)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(drop_partition, month)
+
+    logger.info(f"Archived {count} rows from {name} to {path}")
+    return path
+
+async def archive_expired_partitions(retention_months: int = SUBMISSION_RETENTION_MONTHS) -> List[Path]:
+    """
+    Archive every partition older than the retention window
+    """
+    cutoff = add_months(month_start(), -retention_months)
+
+    async with engine.connect() as conn:
+        partitions = await conn.run_sync(list_partitions)
+
+    return [
+        await archive_month(month)
+        for _, month in partitions
+        if month < cutoff
+    ]
+
+async def restore_month(month: date) -> int:
+    """
+    Re-attach an archived month by recreating its partition and reloading rows
+
+    Restored rows are archived again by the next maintenance run unless the
+    retention window is widened.
+    """
+    path = archive_path(month)
+    if not path.exists():
+        raise FileNotFoundError(f"No archive for {month:%Y-%m} at {path}")
+
+    statement = insert(CodeSubmission.__table__).on_conflict_do_nothing()
+    count = 0
+
+    async with engine.begin() as conn:
+        await conn.run_sync(create_partition, month)
+
+        batch = []
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            for line in archive:
+                batch.append(decode_row(line))
+                if len(batch) >= ARCHIVE_BATCH_SIZE:
+                    await conn.execute(statement, batch)
+                    count += len(batch)
+                    batch = []
+        if batch:
+            await conn.execute(statement, batch)
+            count += len(batch)
+
+    logger.info(f"Restored {count} rows into {partition_name(month)}")
+    return count
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ("archive", "restore"):
+        print("Usage: python -m database.archive archive|restore YYYY-MM", file=sys.stderr)
+        sys.exit(2)
+
+    command, month = sys.argv[1], date.fromisoformat(f"{sys.argv[2]}-01")
+    try:
+        if command == "archive":
+            print(f"✓ Archived {PARENT_TABLE} for {month:%Y-%m} to {asyncio.run(archive_month(month))}")
+        else:
+            print(f"✓ Restored {asyncio.run(restore_month(month))} rows for {month:%Y-%m}")
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
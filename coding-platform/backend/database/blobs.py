@@ -0,0 +1,101 @@
+"""
+Content-addressed blob storage
+Large text fields are compressed and stored once per unique content hash
+"""
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Hashable, Iterable, Mapping, Optional, Tuple
+import hashlib
+import os
+import zlib
+
+from models.blob import ContentBlob
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available as a fallback codec
+    zstandard = None
+
+# Values shorter than this (in bytes) stay inline on the owning row
+BLOB_MIN_SIZE = int(os.getenv("BLOB_MIN_SIZE", "256"))
+
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest used as the blob key"""
+    return hashlib.sha256(data).hexdigest()
+
+def compress(data: bytes) -> Tuple[str, bytes]:
+    """Compress data with the best available codec"""
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return "zlib", zlib.compress(data, ZLIB_LEVEL)
+
+def decompress(codec: str, data: bytes) -> bytes:
+    """Decompress a stored payload"""
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed blobs")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown blob codec: {codec}")
+
+async def externalize(db: AsyncSession, fields: Mapping[Hashable, Optional[str]]) -> Dict[Any, str]:
+    """
+    Move large values into the blob store
+
+    Every value of at least BLOB_MIN_SIZE bytes is written with a single
+    INSERT ... ON CONFLICT DO NOTHING. Returns a mapping of field key to
+    blob hash for the values that were moved; the rest should stay inline.
+    """
+    refs = {}
+    rows = {}
+
+    for field, value in fields.items():
+        if value is None:
+            continue
+        data = value.encode("utf-8")
+        if len(data) < BLOB_MIN_SIZE:
+            continue
+
+        digest = content_hash(data)
+        refs[field] = digest
+        if digest not in rows:
+            codec, payload = compress(data)
+            rows[digest] = {
+                "hash": digest,
+                "codec": codec,
+                "data": payload,
+                "size": len(data),
+            }
+
+    if rows:
+        await db.execute(
+            insert(ContentBlob)
+            .values(list(rows.values()))
+            .on_conflict_do_nothing(index_elements=[ContentBlob.hash])
+        )
+
+    return refs
+
+async def load_texts(db: AsyncSession, hashes: Iterable[Optional[str]]) -> Dict[str, str]:
+    """
+    Fetch and decompress blobs by hash in one query
+    """
+    wanted = {h for h in hashes if h}
+    if not wanted:
+        return {}
+
+    result = await db.execute(
+        select(ContentBlob.hash, ContentBlob.codec, ContentBlob.data)
+        .where(ContentBlob.hash.in_(wanted))
+    )
+
+    return {
+        row.hash: decompress(row.codec, row.data).decode("utf-8")
+        for row in result
+    }
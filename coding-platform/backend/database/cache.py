@@ -0,0 +1,20 @@
+"""
+Shared Redis client for cross-worker state
+"""
+
+import redis.asyncio as redis
+import os
+from loguru import logger
+
+# Get Redis URL from environment
+REDIS_URL = os.getenv("REDIS_URL", "redis://:redis_password@redis:6379/0")
+
+# Connections are opened lazily from the client's pool on first use
+redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+
+async def close_redis():
+    """
+    Close Redis connections
+    """
+    await redis_client.aclose()
+    logger.info("Redis connections closed")
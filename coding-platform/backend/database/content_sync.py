@@ -0,0 +1,382 @@
+"""
+Content-pack sync: bring lessons in line with a directory of Markdown files
+or a JSONL file, writing only the lessons whose content changed
+Usage: python -m database.content_sync PATH [--dry-run] [--unpublish-missing]
+"""
+
+from sqlalchemy import and_, case, cast, func, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import orjson
+import yaml
+from loguru import logger
+
+from database.connection import engine
+from database.ids import uuid7
+from database.rendering import render_content
+from database.versions import version_hash, version_row
+from models.lesson import Lesson
+from models.version import LessonVersion
+
+# Rows per INSERT ... ON CONFLICT batch, well under asyncpg's bind parameter limit
+SYNC_BATCH_SIZE = 1000
+
+# Rendering is CPU-bound; larger syncs from the command line spread it over
+# worker processes, while the API renders on its thread pool rather than
+# forking a server worker
+RENDER_WORKERS = int(os.getenv("CONTENT_SYNC_RENDER_WORKERS", "0")) or os.cpu_count()
+RENDER_INLINE_LIMIT = 20
+
+# Lesson columns a content pack controls; everything else is left to the database
+PACK_FIELDS = (
+    "title", "slug", "description", "content", "difficulty", "order", "starter_code",
+    "solution_code", "test_cases", "language", "estimated_time", "tags", "is_published",
+)
+
+FRONT_MATTER_DELIMITER = "---"
+
+class ExistingLesson(NamedTuple):
+    """What the diff needs to know about a lesson already in the database"""
+    id: str
+    content_hash: Optional[str]
+    is_published: bool
+    version: int
+    version_hash: Optional[str]  # Of the current version
+
+@dataclass
+class SyncReport:
+    """
+    What a sync changed, or would change on a dry run
+    """
+    dry_run: bool
+    created: List[str] = field(default_factory=list)  # Slugs
+    updated: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    missing: List[str] = field(default_factory=list)  # In the database but not the pack
+    unpublished: List[str] = field(default_factory=list)  # Missing lessons hidden by this sync
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.created or self.updated or self.unpublished)
+
+def lesson_hash(lesson: dict) -> str:
+    """Digest of a lesson's pack fields, stored to detect changes without reading content"""
+    return hashlib.blake2b(orjson.dumps(lesson, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+def normalize_lesson(entry: dict, source: str) -> dict:
+    """
+    Validate one pack entry the way the create endpoint would, and add its hash
+    """
+    from api.lessons import LessonCreate
+
+    try:
+        lesson = LessonCreate.model_validate(entry).model_dump()
+    except ValueError as e:
+        raise ValueError(f"{source}: {e}") from e
+    lesson["is_published"] = bool(entry.get("is_published", True))
+    lesson = {name: lesson[name] for name in PACK_FIELDS}
+    lesson["content_hash"] = lesson_hash(lesson)
+    return lesson
+
+def parse_markdown(path: Path) -> dict:
+    """
+    Lesson from a Markdown file: YAML front matter between --- lines, then
+    the lesson content; the slug defaults to the file name
+    """
+    text = path.read_text(encoding="utf-8")
+    entry = {}
+    lines = text.split("\n")
+    if lines[0].strip() == FRONT_MATTER_DELIMITER:
+        try:
+            end = next(i for i, line in enumerate(lines[1:], 1) if line.strip() == FRONT_MATTER_DELIMITER)
+        except StopIteration:
+            raise ValueError(f"{path}: front matter is not closed")
+        entry = yaml.safe_load("\n".join(lines[1:end])) or {}
+        if not isinstance(entry, dict):
+            raise ValueError(f"{path}: front matter must be a mapping")
+        text = "\n".join(lines[end + 1:]).lstrip("\n")
+    entry.setdefault("slug", path.stem)
+    entry["content"] = text
+    return entry
+
+def parse_jsonl(text: str, source: str = "<jsonl>") -> List[dict]:
+    """
+    Lessons from JSON Lines, one lesson object per non-empty line
+    """
+    lessons = []
+    for number, line in enumerate(text.splitlines(), 1):
+        if line.strip():
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{source}:{number}: {e}") from e
+            lessons.append(normalize_lesson(entry, f"{source}:{number}"))
+    return lessons
+
+def load_pack(path: Path) -> List[dict]:
+    """
+    Lessons from a content pack: a JSONL file, or a directory of .md files
+    """
+    if path.is_dir():
+        return [normalize_lesson(parse_markdown(file), str(file)) for file in sorted(path.rglob("*.md"))]
+    return parse_jsonl(path.read_text(encoding="utf-8"), str(path))
+
+def diff_lessons(lessons: List[dict], existing: Dict[str, ExistingLesson], report: SyncReport) -> List[dict]:
+    """
+    Lessons that need writing, with their ids and version numbers set, and
+    the report filled in
+
+    Lessons edited outside a pack have no stored hash and are rewritten.
+    Only changes to versioned fields start a new version.
+    """
+    seen = set()
+    changed = []
+    for lesson in lessons:
+        slug = lesson["slug"]
+        if slug in seen:
+            raise ValueError(f"Duplicate slug in content pack: {slug}")
+        seen.add(slug)
+
+        current = existing.get(slug)
+        if current is None:
+            report.created.append(slug)
+            lesson.update(id=uuid7(), version=1, new_version=True)
+            changed.append(lesson)
+        elif current.content_hash != lesson["content_hash"]:
+            report.updated.append(slug)
+            new_version = current.version_hash != version_hash(lesson)
+            lesson.update(
+                id=current.id,
+                version=current.version + 1 if new_version else current.version,
+                new_version=new_version,
+            )
+            changed.append(lesson)
+        else:
+            report.unchanged += 1
+
+    report.missing = sorted(slug for slug in existing if slug not in seen)
+    return changed
+
+async def render_lessons(lessons: List[dict], workers: int = 0):
+    """
+    Fill in the rendered columns the Lesson model would compute on write
+
+    Large batches use that many worker processes, or with workers=0 one
+    task on the event loop's default thread pool.
+    """
+    loop = asyncio.get_running_loop()
+    contents = [lesson["content"] for lesson in lessons]
+    if len(contents) <= RENDER_INLINE_LIMIT:
+        rendered = [render_content(content) for content in contents]
+    elif workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = await asyncio.gather(*(loop.run_in_executor(pool, render_content, c) for c in contents))
+    else:
+        rendered = await loop.run_in_executor(None, lambda: [render_content(content) for content in contents])
+
+    for lesson, (html, gzipped, brotlied) in zip(lessons, rendered):
+        lesson["content_html"], lesson["content_gzip"], lesson["content_br"] = html, gzipped, brotlied
+
+def upsert_statement():
+    """
+    Bulk INSERT ... ON CONFLICT (slug) that updates pack fields in place
+
+    Used for lessons that exist and are locked. Ids are kept, and the test
+    suite version is bumped only when the test cases actually differ.
+    """
+    table = Lesson.__table__
+    statement = insert(table)
+    excluded = statement.excluded
+    columns = [name for name in PACK_FIELDS if name != "slug"]
+    columns += ["content_hash", "content_html", "content_gzip", "content_br", "version"]
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.slug],
+        set_={
+            **{name: excluded[name] for name in columns},
+            "test_suite_version": case(
+                (
+                    cast(table.c.test_cases, JSONB).is_distinct_from(cast(excluded.test_cases, JSONB)),
+                    table.c.test_suite_version + 1,
+                ),
+                else_=table.c.test_suite_version,
+            ),
+            "updated_at": func.now(),
+        },
+    ).returning(table.c.slug, table.c.test_suite_version)
+
+def create_statement():
+    """
+    Bulk INSERT of new lessons that skips slugs created since the diff
+    """
+    table = Lesson.__table__
+    return (
+        insert(table)
+        .on_conflict_do_nothing(index_elements=[table.c.slug])
+        .returning(table.c.slug, table.c.test_suite_version)
+    )
+
+def batches(items: list):
+    for start in range(0, len(items), SYNC_BATCH_SIZE):
+        yield items[start:start + SYNC_BATCH_SIZE]
+
+async def load_existing(conn, slugs: Optional[List[str]] = None, lock: bool = False) -> Dict[str, ExistingLesson]:
+    """
+    Lessons by slug with their current version's hash; lock=True holds
+    the lesson rows until the transaction ends
+    """
+    query = (
+        select(
+            Lesson.slug, Lesson.id, Lesson.content_hash, Lesson.is_published,
+            Lesson.version, LessonVersion.content_hash
+        )
+        .outerjoin(LessonVersion, and_(
+            LessonVersion.lesson_id == Lesson.id,
+            LessonVersion.number == Lesson.version
+        ))
+    )
+    if lock:
+        query = query.with_for_update(of=Lesson.__table__)
+
+    existing = {}
+    for batch in batches(slugs) if slugs is not None else [None]:
+        result = await conn.execute(query if batch is None else query.where(Lesson.slug.in_(batch)))
+        existing.update({row[0]: ExistingLesson(*row[1:]) for row in result})
+    return existing
+
+async def sync_lessons(
+    lessons: List[dict],
+    dry_run: bool = False,
+    unpublish_missing: bool = False,
+    render_workers: int = 0
+) -> SyncReport:
+    """
+    Apply a content pack in one transaction, touching only changed lessons
+
+    render_workers > 0 renders large packs in that many processes; only the
+    command line does, since the API must not fork its server worker.
+    """
+    report = SyncReport(dry_run=dry_run)
+
+    async with engine.connect() as conn:
+        existing = await load_existing(conn)
+
+    changed = diff_lessons(lessons, existing, report)
+    if unpublish_missing:
+        report.unpublished = [slug for slug in report.missing if existing[slug].is_published]
+    if dry_run or not report.changed:
+        return report
+
+    # Rendered before the transaction opens, so it holds no locks meanwhile
+    await render_lessons(changed, render_workers)
+
+    table = Lesson.__table__
+    columns = set(table.c.keys())
+
+    def values(batch: List[dict]) -> List[dict]:
+        return [
+            {"test_suite_version": 1, **{name: value for name, value in lesson.items() if name in columns}}
+            for lesson in batch
+        ]
+
+    async with engine.begin() as conn:
+        # Ids and version numbers are planned again against the locked rows:
+        # an admin edit or another sync may have landed since the first read
+        slugs = [lesson["slug"] for lesson in changed]
+        planned = SyncReport(dry_run=False)
+        changed = diff_lessons(changed, await load_existing(conn, slugs, lock=True), planned)
+
+        test_suite_versions = {}
+        new_slugs = set(planned.created)
+        created = [lesson for lesson in changed if lesson["slug"] in new_slugs]
+        for batch in batches(created):
+            result = await conn.execute(create_statement(), values(batch))
+            test_suite_versions.update(result.all())
+
+        # Slugs created concurrently since the lock are now committed rows:
+        # lock them and write over them as updates
+        raced = [lesson for lesson in created if lesson["slug"] not in test_suite_versions]
+        if raced:
+            raced_slugs = {lesson["slug"] for lesson in raced}
+            racing = SyncReport(dry_run=False)
+            changed = [lesson for lesson in changed if lesson["slug"] not in raced_slugs]
+            changed += diff_lessons(raced, await load_existing(conn, list(raced_slugs), lock=True), racing)
+            planned.created = [slug for slug in planned.created if slug not in raced_slugs]
+            planned.updated += racing.updated
+            planned.unchanged += racing.unchanged
+
+        updated_slugs = set(planned.updated)
+        updated = [lesson for lesson in changed if lesson["slug"] in updated_slugs]
+        for batch in batches(updated):
+            result = await conn.execute(upsert_statement(), values(batch))
+            test_suite_versions.update(result.all())
+
+        # A new version records the test suite version the write settled on
+        versions = [
+            version_row(lesson["id"], lesson["version"], {
+                **lesson, "test_suite_version": test_suite_versions[lesson["slug"]]
+            })
+            for lesson in changed
+            if lesson["new_version"]
+        ]
+        for batch in batches(versions):
+            await conn.execute(insert(LessonVersion.__table__), batch)
+
+        if report.unpublished:
+            await conn.execute(
+                update(table)
+                .where(table.c.slug.in_(report.unpublished))
+                .values(is_published=False, updated_at=func.now())
+            )
+
+    report.created, report.updated = planned.created, planned.updated
+    report.unchanged += planned.unchanged
+
+    logger.info(
+        f"Content sync: {len(report.created)} created, {len(report.updated)} updated, "
+        f"{report.unchanged} unchanged, {len(report.unpublished)} unpublished"
+    )
+    return report
+
+async def sync_pack(path: Path, dry_run: bool = False, unpublish_missing: bool = False) -> SyncReport:
+    """
+    Sync a content pack from disk and announce the change to every worker
+    """
+    from api.catalog import publish_catalog_change
+
+    report = await sync_lessons(load_pack(path), dry_run, unpublish_missing, RENDER_WORKERS)
+    if report.changed and not dry_run:
+        await publish_catalog_change()
+    return report
+
+def print_report(report: SyncReport):
+    prefix = "Would " if report.dry_run else ""
+    for label, slugs in (("create", report.created), ("update", report.updated), ("unpublish", report.unpublished)):
+        for slug in slugs:
+            print(f"  {prefix}{label}: {slug}")
+    print(
+        f"✓ {len(report.created)} created, {len(report.updated)} updated, {report.unchanged} unchanged, "
+        f"{len(report.missing)} not in pack, {len(report.unpublished)} unpublished"
+        + (" (dry run, nothing written)" if report.dry_run else "")
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync lessons from a content pack")
+    parser.add_argument("path", type=Path, help="Directory of Markdown lessons or a JSONL file")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing")
+    parser.add_argument("--unpublish-missing", action="store_true", help="Unpublish lessons not in the pack")
+    args = parser.parse_args()
+
+    try:
+        print_report(asyncio.run(sync_pack(args.path, args.dry_run, args.unpublish_missing)))
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,59 @@
+"""
+Time-ordered UUID primary keys
+New rows get UUIDv7 values, so inserts append to the right of the B-tree
+"""
+
+from pydantic import AfterValidator
+from typing import Annotated
+import secrets
+import threading
+import time
+import uuid
+
+# Highest value of the 12-bit rand_a field used as a per-millisecond counter
+_COUNTER_MAX = 0xFFF
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+def uuid7() -> str:
+    """
+    Generate a UUIDv7 (RFC 9562) string
+
+    The first 48 bits are the Unix time in milliseconds. rand_a holds a
+    counter seeded randomly each millisecond, so ids created by one process
+    are strictly increasing even within the same millisecond.
+    """
+    global _last_ms, _counter
+
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            # Leave headroom so the counter rarely overflows within a millisecond
+            _counter = secrets.randbits(11)
+        else:
+            ms = _last_ms
+            _counter += 1
+            if _counter > _COUNTER_MAX:
+                ms += 1
+                _counter = secrets.randbits(11)
+        _last_ms = ms
+        counter = _counter
+
+    value = (
+        (ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | counter << 64
+        | 0b10 << 62
+        | secrets.randbits(62)
+    )
+    return str(uuid.UUID(int=value))
+
+def canonical_id(value: str) -> str:
+    """Validate a UUID string and return it in canonical form"""
+    return str(uuid.UUID(value))
+
+# Request field / path parameter type for ids; malformed values are a 422
+# instead of a database error
+EntityId = Annotated[str, AfterValidator(canonical_id)]
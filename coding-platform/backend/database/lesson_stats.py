@@ -0,0 +1,249 @@
+"""
+Per-lesson statistics
+Folds graded submissions into lesson_stats and reconciles it with the raw rows
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+import math
+import os
+import re
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from database.blobs import load_texts
+from database.connection import AsyncSessionLocal
+from database.sketches import QuantileSketch, TopK
+from models.stats import LessonStats
+from models.submission import CodeSubmission
+
+# Error messages tracked per lesson; the top few are reported
+TOP_ERRORS_CAPACITY = int(os.getenv("LESSON_STATS_TOP_ERRORS", "32"))
+TOP_ERRORS_REPORTED = 5
+ERROR_MAX_LENGTH = 200
+
+QUOTED_RE = re.compile(r"'[^'\n]*'|\"[^\"\n]*\"")
+NUMBER_RE = re.compile(r"\b\d+(\.\d+)?\b")
+
+# A graded run executed the lesson's test cases; it passes if all passed
+GRADED = and_(
+    CodeSubmission.lesson_id.is_not(None),
+    CodeSubmission.tests_passed + CodeSubmission.tests_failed > 0,
+)
+PASSED = and_(CodeSubmission.tests_failed == 0, CodeSubmission.tests_passed > 0)
+
+def normalize_error(error: Optional[str]) -> Optional[str]:
+    """
+    Group key for an error message: the last line of the output (the
+    exception for a Python traceback) with literals replaced
+    """
+    lines = [line.strip() for line in (error or "").splitlines() if line.strip()]
+    if not lines:
+        return None
+    message = NUMBER_RE.sub("N", QUOTED_RE.sub("'?'", lines[-1]))
+    return message[:ERROR_MAX_LENGTH]
+
+@dataclass
+class Aggregates:
+    """The values of a lesson_stats row, as sketches"""
+    submissions: int = 0
+    passed: int = 0
+    learners: int = 0
+    learners_passed: int = 0
+    first_pass_attempts: int = 0
+    runtime: QuantileSketch = field(default_factory=QuantileSketch)
+    errors: TopK = field(default_factory=lambda: TopK(TOP_ERRORS_CAPACITY))
+
+    COUNTERS = ("submissions", "passed", "learners", "learners_passed", "first_pass_attempts")
+
+    @classmethod
+    def from_row(cls, stats: Optional[LessonStats]) -> "Aggregates":
+        if stats is None:
+            return cls()
+        return cls(
+            **{name: getattr(stats, name) for name in cls.COUNTERS},
+            runtime=QuantileSketch.from_json(stats.runtime_sketch),
+            errors=TopK.from_json(TOP_ERRORS_CAPACITY, stats.top_errors),
+        )
+
+    def counts(self) -> dict:
+        """Everything but the top errors, which are approximate by design"""
+        values = {name: getattr(self, name) for name in self.COUNTERS}
+        values["runtime_sketch"] = self.runtime.to_json()
+        return values
+
+    def apply_to(self, stats: LessonStats):
+        for name, value in self.counts().items():
+            setattr(stats, name, value)
+        stats.top_errors = self.errors.to_json()
+
+async def lock_stats(db: AsyncSession, lesson_id: str) -> LessonStats:
+    """
+    The lesson's stats row, created if missing and locked until commit
+    """
+    query = select(LessonStats).where(LessonStats.lesson_id == lesson_id).with_for_update()
+    stats = (await db.execute(query)).scalar_one_or_none()
+    if stats is None:
+        await db.execute(insert(LessonStats).values(lesson_id=lesson_id).on_conflict_do_nothing())
+        stats = (await db.execute(query)).scalar_one()
+    return stats
+
+async def record_graded_submission(
+    db: AsyncSession,
+    lesson_id: str,
+    progress,
+    passed: bool,
+    execution_time: float,
+    error: Optional[str]
+):
+    """
+    Fold a graded run into its lesson's statistics, in the caller's transaction
+
+    progress is the learner's progress as updated by the same run: its
+    first graded attempt makes them a new learner, and a first pass sets
+    completed_at to the same timestamp as last_attempt_at.
+    """
+    stats = await lock_stats(db, lesson_id)
+    aggregates = Aggregates.from_row(stats)
+
+    aggregates.submissions += 1
+    if passed:
+        aggregates.passed += 1
+    if progress.attempts == 1:
+        aggregates.learners += 1
+    if passed and progress.completed_at == progress.last_attempt_at:
+        aggregates.learners_passed += 1
+        aggregates.first_pass_attempts += progress.attempts
+    aggregates.runtime.add(execution_time)
+    message = normalize_error(error)
+    if message:
+        aggregates.errors.add(message)
+
+    aggregates.apply_to(stats)
+
+async def compute_aggregates(db: AsyncSession) -> Dict[str, Aggregates]:
+    """
+    Statistics for every lesson recomputed from code_submissions
+
+    Three grouped scans; runtimes are bucketed by the database and only
+    distinct error texts are fetched.
+    """
+    lessons: Dict[str, Aggregates] = {}
+
+    def lesson(lesson_id: str) -> Aggregates:
+        return lessons.setdefault(lesson_id, Aggregates())
+
+    # Counters: each learner's runs numbered in order, up to their first pass
+    ranked = (
+        select(
+            CodeSubmission.lesson_id,
+            CodeSubmission.user_id,
+            func.row_number().over(
+                partition_by=(CodeSubmission.lesson_id, CodeSubmission.user_id),
+                order_by=(CodeSubmission.created_at, CodeSubmission.id)
+            ).label("attempt"),
+            PASSED.label("passed"),
+        )
+        .where(GRADED)
+        .subquery()
+    )
+    learners = (
+        select(
+            ranked.c.lesson_id,
+            func.count().label("runs"),
+            func.count().filter(ranked.c.passed).label("passes"),
+            func.min(ranked.c.attempt).filter(ranked.c.passed).label("first_pass"),
+        )
+        .group_by(ranked.c.lesson_id, ranked.c.user_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            learners.c.lesson_id,
+            func.sum(learners.c.runs),
+            func.sum(learners.c.passes),
+            func.count(),
+            func.count(learners.c.first_pass),
+            func.coalesce(func.sum(learners.c.first_pass), 0),
+        ).group_by(learners.c.lesson_id)
+    )
+    for lesson_id, *counters in result:
+        for name, value in zip(Aggregates.COUNTERS, counters):
+            setattr(lesson(lesson_id), name, int(value))
+
+    # Runtimes, bucketed exactly as QuantileSketch.key does
+    clamped = func.least(func.greatest(CodeSubmission.execution_time, QuantileSketch.MIN_VALUE), QuantileSketch.MAX_VALUE)
+    buckets = (
+        select(
+            CodeSubmission.lesson_id,
+            func.ceil(func.ln(clamped) / math.log(QuantileSketch.GAMMA)).label("bucket"),
+        )
+        .where(GRADED, CodeSubmission.execution_time.is_not(None))
+        .subquery()
+    )
+    result = await db.execute(
+        select(buckets.c.lesson_id, buckets.c.bucket, func.count())
+        .group_by(buckets.c.lesson_id, buckets.c.bucket)
+    )
+    for lesson_id, key, count in result:
+        lesson(lesson_id).runtime.buckets[int(key)] += count
+
+    # Errors: blobs are deduplicated, so equal long messages share a ref
+    result = await db.execute(
+        select(CodeSubmission.lesson_id, CodeSubmission.error, CodeSubmission.error_ref, func.count())
+        .where(GRADED, or_(CodeSubmission.error != "", CodeSubmission.error_ref.is_not(None)))
+        .group_by(CodeSubmission.lesson_id, CodeSubmission.error, CodeSubmission.error_ref)
+    )
+    rows = result.all()
+    texts = await load_texts(db, [row.error_ref for row in rows])
+    counts: Dict[str, Counter] = {}
+    for lesson_id, error, error_ref, count in rows:
+        message = normalize_error(texts.get(error_ref) if error_ref else error)
+        if message:
+            counts.setdefault(lesson_id, Counter())[message] += count
+    for lesson_id, messages in counts.items():
+        lesson(lesson_id).errors = TopK.from_counts(TOP_ERRORS_CAPACITY, messages)
+
+    return lessons
+
+async def reconcile_lesson_stats() -> dict:
+    """
+    Correct lesson_stats against code_submissions
+
+    The raw aggregates and the stats rows are read in one REPEATABLE READ
+    snapshot. Each row is then set to the recomputed value plus whatever
+    was recorded since the snapshot, so runs during the scan are kept and
+    rows are locked only briefly. Top errors are replaced outright.
+    """
+    async with AsyncSessionLocal() as db:
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        snapshot = {
+            stats.lesson_id: Aggregates.from_row(stats)
+            for stats in (await db.execute(select(LessonStats))).scalars()
+        }
+        recomputed = await compute_aggregates(db)
+
+    corrected = 0
+    async with AsyncSessionLocal() as db:
+        for lesson_id in recomputed.keys() | snapshot.keys():
+            stats = await lock_stats(db, lesson_id)
+            live = Aggregates.from_row(stats)
+            seen = snapshot.get(lesson_id, Aggregates())
+            target = recomputed.get(lesson_id, Aggregates())
+
+            for name in Aggregates.COUNTERS:
+                setattr(target, name, getattr(target, name) + getattr(live, name) - getattr(seen, name))
+            live.runtime.subtract(seen.runtime)
+            target.runtime.merge(live.runtime)
+
+            if Aggregates.from_row(stats).counts() != target.counts():
+                corrected += 1
+            target.apply_to(stats)
+            stats.reconciled_at = func.now()
+            await db.commit()
+
+    logger.info(f"Lesson stats reconciled: {len(recomputed)} lessons, {corrected} corrected")
+    return {"lessons": len(recomputed), "corrected": corrected}
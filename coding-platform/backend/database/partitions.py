@@ -0,0 +1,92 @@
+"""
+Monthly range partitions for code_submissions
+Helpers take a sync Connection; async callers use conn.run_sync()
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+import os
+import re
+
+PARENT_TABLE = "code_submissions"
+
+# Number of future months that always have a partition ready
+PARTITION_PREMAKE_MONTHS = int(os.getenv("PARTITION_PREMAKE_MONTHS", "3"))
+
+PARTITION_NAME_RE = re.compile(rf"^{PARENT_TABLE}_p(\d{{4}})_(\d{{2}})$")
+
+def month_start(value: Optional[datetime] = None) -> date:
+    """First day of the month containing value (default: now, UTC)"""
+    value = value or datetime.now(timezone.utc)
+    return date(value.year, value.month, 1)
+
+def add_months(month: date, count: int) -> date:
+    """Shift a month start by count months"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    """Partition table name for a month, e.g. code_submissions_p2026_10"""
+    return f"{PARENT_TABLE}_p{month.year:04d}_{month.month:02d}"
+
+def partition_month(name: str) -> Optional[date]:
+    """Month covered by a partition name, or None for foreign tables"""
+    match = PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+def create_partition(conn: Connection, month: date):
+    """
+    Create the partition for a month if it does not exist
+    """
+    conn.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" '
+        f'PARTITION OF {PARENT_TABLE} '
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+    ))
+
+def ensure_partitions(
+    conn: Connection,
+    first_month: Optional[date] = None,
+    months_ahead: int = PARTITION_PREMAKE_MONTHS
+):
+    """
+    Make sure partitions exist from first_month (default: current month)
+    through months_ahead months into the future
+    """
+    current = month_start()
+    month = first_month or current
+    last = add_months(current, months_ahead)
+
+    while month <= last:
+        create_partition(conn, month)
+        month = add_months(month, 1)
+
+def list_partitions(conn: Connection) -> List[Tuple[str, date]]:
+    """
+    Attached monthly partitions as (name, month), oldest first
+    """
+    result = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:parent AS regclass)"
+    ), {"parent": PARENT_TABLE})
+
+    partitions = []
+    for (name,) in result:
+        month = partition_month(name)
+        if month:
+            partitions.append((name, month))
+    return sorted(partitions, key=lambda p: p[1])
+
+def drop_partition(conn: Connection, month: date):
+    """
+    Detach and drop a month's partition
+    """
+    name = partition_name(month)
+    conn.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{name}"'))
+    conn.execute(text(f'DROP TABLE "{name}"'))
@@ -0,0 +1,100 @@
+"""
+Per-request SQL instrumentation
+Counts queries, round trips, rows and database time through engine events
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from typing import Iterator, Optional
+import time
+
+@dataclass
+class QueryStats:
+    """
+    SQL activity recorded for one request or tracked block
+
+    round_trips counts statements plus transaction control (BEGIN, COMMIT,
+    ROLLBACK) sent by the driver; it does not include connection setup,
+    which is counted separately.
+    """
+    queries: int = 0
+    round_trips: int = 0
+    rows: int = 0
+    connections: int = 0
+    db_time: float = 0.0
+
+    def as_header(self) -> str:
+        """Compact representation for the X-DB-Stats response header"""
+        return (
+            f"queries={self.queries}; round_trips={self.round_trips}; "
+            f"rows={self.rows}; connections={self.connections}; "
+            f"db_ms={self.db_time * 1000:.1f}"
+        )
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Record SQL activity for the enclosed block
+
+    Tasks spawned inside the block share the same QueryStats object, so
+    work done by FastAPI dependencies and handlers is included.
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def _sends_transaction_control(conn) -> bool:
+    """Whether BEGIN/COMMIT/ROLLBACK reach the server on this connection"""
+    return not conn._is_autocommit_isolation()
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None or not conn.info.get("query_start"):
+        return
+
+    stats.db_time += time.perf_counter() - conn.info["query_start"].pop()
+    stats.queries += 1
+    stats.round_trips += 1
+    if cursor.description is not None and cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+@event.listens_for(Engine, "begin")
+def _begin(conn):
+    stats = _current_stats.get()
+    if stats is not None and _sends_transaction_control(conn):
+        stats.round_trips += 1
+
+@event.listens_for(Engine, "commit")
+def _commit(conn):
+    stats = _current_stats.get()
+    if stats is not None and _sends_transaction_control(conn):
+        stats.round_trips += 1
+
+@event.listens_for(Engine, "rollback")
+def _rollback(conn):
+    stats = _current_stats.get()
+    if stats is not None and _sends_transaction_control(conn):
+        stats.round_trips += 1
+
+@event.listens_for(Engine, "engine_connect")
+def _engine_connect(conn):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.connections += 1
@@ -0,0 +1,65 @@
+"""
+Lesson content rendering
+Markdown is rendered to sanitized, highlighted HTML and precompressed once at write time
+"""
+
+from typing import Optional, Tuple
+import gzip
+import markdown
+import nh3
+
+try:
+    import brotli
+except ImportError:  # gzip alone is still served when brotli is unavailable
+    brotli = None
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11  # Slowest, smallest; paid once per lesson write
+
+MARKDOWN_EXTENSIONS = ["fenced_code", "codehilite", "tables", "sane_lists", "nl2br"]
+MARKDOWN_CONFIG = {
+    # Pygments emits token classes; the frontend stylesheet colours them
+    "codehilite": {"css_class": "highlight", "guess_lang": False},
+}
+
+# nh3's defaults plus the class attributes Pygments needs
+ALLOWED_ATTRIBUTES = {
+    **nh3.ALLOWED_ATTRIBUTES,
+    "code": {"class"},
+    "div": {"class"},
+    "pre": {"class"},
+    "span": {"class"},
+}
+
+def render_markdown(source: str) -> str:
+    """
+    Render lesson Markdown to HTML that is safe to insert into the page
+    """
+    html = markdown.markdown(
+        source,
+        extensions=MARKDOWN_EXTENSIONS,
+        extension_configs=MARKDOWN_CONFIG,
+        output_format="html",
+    )
+    return nh3.clean(html, attributes=ALLOWED_ATTRIBUTES)
+
+def compress_html(html: str) -> Tuple[bytes, Optional[bytes]]:
+    """
+    gzip and brotli encodings of rendered HTML
+
+    gzip output uses a fixed mtime so identical HTML always produces
+    identical bytes.
+    """
+    data = html.encode("utf-8")
+    gzipped = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    brotlied = brotli.compress(data, quality=BROTLI_QUALITY) if brotli is not None else None
+    return gzipped, brotlied
+
+def render_content(source: Optional[str]) -> Tuple[Optional[str], Optional[bytes], Optional[bytes]]:
+    """
+    (html, gzip, br) for a lesson's Markdown content
+    """
+    if source is None:
+        return None, None, None
+    html = render_markdown(source)
+    return (html, *compress_html(html))
@@ -1,17 +1,16 @@
 """
 Seed script to populate the database with sample Python lessons
-Run this after the application is deployed
+Run this after the application is deployed; re-running syncs changed lessons
 """
 
 import asyncio
 import sys
 from sqlalchemy import select
 from database.connection import AsyncSessionLocal, init_db
-from models.lesson import Lesson
+from database.content_sync import normalize_lesson, sync_lessons
 from models.user import User
-from passlib.context import CryptContext
+from api.hashing import pwd_context
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # Sample lessons data
 SAMPLE_LESSONS = [
@@ -411,27 +410,15 @@ async def seed_lessons():
         # Create admin user
         await create_admin_user(session)
 
-        # Check if lessons already exist
-        result = await session.execute(select(Lesson))
-        existing_lessons = result.scalars().all()
+    # Synced rather than inserted, so re-running updates changed sample
+    # lessons and leaves the rest alone
+    lessons = [normalize_lesson(lesson, lesson["slug"]) for lesson in SAMPLE_LESSONS]
+    report = await sync_lessons(lessons)
+    for slug in report.created + report.updated:
+        print(f"  ✓ Synced: {slug}")
 
-        if existing_lessons:
-            print(f"✓ Database already contains {len(existing_lessons)} lessons")
-            print("Skipping lesson creation...")
-            return
-
-        # Create sample lessons
-        print(f"\nCreating {len(SAMPLE_LESSONS)} sample lessons...")
-
-        for lesson_data in SAMPLE_LESSONS:
-            lesson = Lesson(**lesson_data)
-            session.add(lesson)
-            print(f"  ✓ Created: {lesson_data['title']}")
-
-        await session.commit()
-
-        print(f"\n✓ Successfully created {len(SAMPLE_LESSONS)} lessons!")
-        print("\nYou can now access the platform and start learning!")
+    print(f"\n✓ {len(report.created)} lessons created, {len(report.updated)} updated, {report.unchanged} unchanged")
+    print("\nYou can now access the platform and start learning!")
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,104 @@
+"""
+Streaming summaries
+Mergeable quantile sketches and top-k heavy hitters stored as JSON
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import math
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch) with relative error ALPHA
+
+    A value counts towards bucket ceil(log_gamma(value)). Buckets are plain
+    counts, so sketches merge (and subtract) exactly, and values are clamped
+    to [MIN_VALUE, MAX_VALUE] so the number of buckets stays bounded.
+    """
+    ALPHA = 0.02
+    GAMMA = (1 + ALPHA) / (1 - ALPHA)
+    MIN_VALUE = 0.001
+    MAX_VALUE = 60.0
+
+    def __init__(self, buckets: Optional[Dict[int, int]] = None):
+        self.buckets = Counter(buckets or {})
+
+    @classmethod
+    def key(cls, value: float) -> int:
+        value = min(max(value, cls.MIN_VALUE), cls.MAX_VALUE)
+        return math.ceil(math.log(value) / math.log(cls.GAMMA))
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def add(self, value: float, count: int = 1):
+        self.buckets[self.key(value)] += count
+
+    def merge(self, other: "QuantileSketch"):
+        self.buckets.update(other.buckets)
+
+    def subtract(self, other: "QuantileSketch"):
+        self.buckets.subtract(other.buckets)
+        self.buckets = +self.buckets  # Drops empty buckets
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Value at quantile q (0-1), within ALPHA of the true one; None if empty
+        """
+        count = self.count
+        if not count:
+            return None
+        rank = q * (count - 1)
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                break
+        return 2 * self.GAMMA ** key / (self.GAMMA + 1)
+
+    def to_json(self) -> Dict[str, int]:
+        return {str(key): count for key, count in self.buckets.items()}
+
+    @classmethod
+    def from_json(cls, data: Optional[Dict[str, int]]) -> "QuantileSketch":
+        return cls({int(key): count for key, count in (data or {}).items()})
+
+class TopK:
+    """
+    SpaceSaving heavy hitters
+
+    Keeps at most capacity counters. When a new item arrives at a full
+    table it replaces the smallest counter and inherits its count, so a
+    count may overestimate by at most the recorded error; any item more
+    frequent than total / capacity is guaranteed to be present.
+    """
+    def __init__(self, capacity: int, counters: Optional[Dict[str, List[int]]] = None):
+        self.capacity = capacity
+        self.counters = dict(counters or {})  # item -> [count, error]
+
+    def add(self, item: str, count: int = 1):
+        if item in self.counters:
+            self.counters[item][0] += count
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [count, 0]
+        else:
+            smallest = min(self.counters, key=lambda key: self.counters[key][0])
+            floor = self.counters.pop(smallest)[0]
+            self.counters[item] = [floor + count, floor]
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        ranked = sorted(self.counters.items(), key=lambda entry: -entry[1][0])
+        return [(item, count) for item, (count, _) in ranked[:n]]
+
+    def to_json(self) -> Dict[str, List[int]]:
+        return self.counters
+
+    @classmethod
+    def from_json(cls, capacity: int, data: Optional[Dict[str, List[int]]]) -> "TopK":
+        return cls(capacity, {item: list(entry) for item, entry in (data or {}).items()})
+
+    @classmethod
+    def from_counts(cls, capacity: int, counts: Counter) -> "TopK":
+        """Exact table from complete counts, as a reconcile builds it"""
+        return cls(capacity, {item: [count, 0] for item, count in counts.most_common(capacity)})
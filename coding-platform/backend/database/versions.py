@@ -0,0 +1,49 @@
+"""
+Lesson versioning
+Snapshots of the fields that make up a lesson's content, taken on every change
+"""
+
+from typing import Any, Dict
+import hashlib
+import orjson
+
+from models.version import LessonVersion
+
+# Fields whose change makes a new version; metadata such as order, tags or
+# publication does not
+VERSIONED_FIELDS = ("title", "description", "content", "starter_code", "test_cases", "language")
+
+# Rendered with the content and copied into each version
+RENDERED_FIELDS = ("content_html", "content_gzip", "content_br")
+
+def version_hash(values: Dict[str, Any]) -> str:
+    """Digest of the versioned fields of a lesson, given as a mapping"""
+    fields = {name: values.get(name) for name in VERSIONED_FIELDS}
+    return hashlib.blake2b(orjson.dumps(fields, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+def version_row(lesson_id: str, number: int, values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Insertable lesson_versions values for a lesson's fields (versioned,
+    rendered and test_suite_version)
+    """
+    row = {name: values.get(name) for name in VERSIONED_FIELDS + RENDERED_FIELDS}
+    row.update(
+        lesson_id=lesson_id,
+        number=number,
+        content_hash=version_hash(values),
+        test_suite_version=values["test_suite_version"],
+    )
+    return row
+
+def lesson_values(lesson) -> Dict[str, Any]:
+    """
+    Versioned and rendered fields of a Lesson, which must have its body
+    and rendered columns loaded
+    """
+    values = {name: getattr(lesson, name) for name in VERSIONED_FIELDS + RENDERED_FIELDS}
+    values["test_suite_version"] = lesson.test_suite_version
+    return values
+
+def new_version(lesson) -> LessonVersion:
+    """Version row for a lesson's current state, numbered lesson.version"""
+    return LessonVersion(**version_row(lesson.id, lesson.version, lesson_values(lesson)))
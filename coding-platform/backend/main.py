@@ -5,24 +5,25 @@ Provides API endpoints for authentication, code execution, and lesson management
 
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.exceptions import RequestValidationError
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 from contextlib import asynccontextmanager
 import os
 from loguru import logger
 
 # Import routers
-from api import auth, code_execution, lessons, progress
+from api import auth, code_execution, events, lessons, progress
+from api.catalog import start_catalog, stop_catalog
+from api.hashing import shutdown_hashing, stats as hashing_stats
 from database.connection import init_db, close_db
+from database.cache import close_redis
+from database.query_stats import track_queries
 
 # Configure logger
 logger.add("logs/app.log", rotation="500 MB", retention="10 days", level="INFO")
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Debug mode exposes per-request SQL statistics
+DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -33,10 +34,15 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Coding Platform API...")
     await init_db()
     logger.info("Database initialized successfully")
+    await start_catalog()
     yield
     # Shutdown
     logger.info("Shutting down Coding Platform API...")
+    await stop_catalog()
+    await events.hub.close()
     await close_db()
+    await close_redis()
+    shutdown_hashing()
     logger.info("Database connections closed")
 
 # Initialize FastAPI app
@@ -45,14 +51,11 @@ app = FastAPI(
     description="API for interactive coding education with secure code execution",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc"
 )
 
-# Add rate limiter to app state
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # CORS Configuration
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
 app.add_middleware(
@@ -78,6 +81,21 @@ async def add_security_headers(request: Request, call_next):
     response.headers["Content-Security-Policy"] = "default-src 'self'"
     return response
 
+# SQL Round-Trip Instrumentation (debug only)
+@app.middleware("http")
+async def add_query_stats(request: Request, call_next):
+    """
+    Report queries, round trips, rows and DB time for each request
+    """
+    if not DEBUG:
+        return await call_next(request)
+
+    with track_queries() as stats:
+        response = await call_next(request)
+    response.headers["X-DB-Stats"] = stats.as_header()
+    logger.debug(f"{request.method} {request.url.path} {stats.as_header()}")
+    return response
+
 # Exception Handlers
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -110,7 +128,8 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "coding-platform-api",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "password_hashing": hashing_stats.as_dict()
     }
 
 # Root Endpoint
@@ -131,6 +150,7 @@ app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(code_execution.router, prefix="/api/code", tags=["Code Execution"])
 app.include_router(lessons.router, prefix="/api/lessons", tags=["Lessons"])
 app.include_router(progress.router, prefix="/api/progress", tags=["Progress"])
+app.include_router(events.router, prefix="/api/events", tags=["Events"])
 
 if __name__ == "__main__":
     import uvicorn
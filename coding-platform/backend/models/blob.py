@@ -0,0 +1,25 @@
+"""
+Content blob model for deduplicated, compressed submission payloads
+"""
+
+from sqlalchemy import Column, String, DateTime, Integer, LargeBinary
+from sqlalchemy.sql import func
+from database.connection import Base
+
+class ContentBlob(Base):
+    """
+    Immutable, content-addressed storage for large text fields
+
+    Rows are keyed by the SHA-256 of the uncompressed bytes, so identical
+    starter code, outputs and error messages are stored exactly once.
+    """
+    __tablename__ = "content_blobs"
+
+    hash = Column(String(64), primary_key=True)  # sha256 hex of uncompressed data
+    codec = Column(String(10), nullable=False)  # zstd, zlib
+    data = Column(LargeBinary, nullable=False)  # Compressed payload
+    size = Column(Integer, nullable=False)  # Uncompressed size in bytes
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<ContentBlob {self.hash[:12]} size={self.size}>"
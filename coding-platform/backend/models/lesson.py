@@ -2,39 +2,90 @@
 Lesson model for storing course content
 """
 
-from sqlalchemy import Column, String, Text, DateTime, Integer, JSON, Boolean
-from sqlalchemy.sql import func
+from sqlalchemy import (
+    Column, String, Text, DateTime, Integer, JSON, Boolean, Index, LargeBinary, Uuid, Computed, ForeignKeyConstraint
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import deferred, validates
+from sqlalchemy.sql import func, text
 from database.connection import Base
-import uuid
+from database.ids import uuid7
+from database.rendering import render_content
+
+# Weighted document for full-text search: title A, description and tags B,
+# content C. The "english" configuration must match api.search.SEARCH_CONFIG.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(jsonb_to_tsvector('english', coalesce(tags, '[]'::jsonb), '[\"string\"]'), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+)
 
 class Lesson(Base):
     """
     Lesson model for storing educational content
     """
     __tablename__ = "lessons"
+    # Listings page through published lessons by (order, id), optionally
+    # narrowed by difficulty, language or tags
+    __table_args__ = (
+        Index("ix_lessons_published_order", "order", "id", postgresql_where=text("is_published")),
+        Index("ix_lessons_difficulty_order", "difficulty", "order", "id", postgresql_where=text("is_published")),
+        Index("ix_lessons_language_order", "language", "order", "id", postgresql_where=text("is_published")),
+        Index("ix_lessons_tags", "tags", postgresql_using="gin", postgresql_ops={"tags": "jsonb_path_ops"}),
+        Index("ix_lessons_search", "search_vector", postgresql_using="gin"),
+        # Points at the current version; deferred so a lesson and its first
+        # version can be inserted in either order within a transaction
+        ForeignKeyConstraint(
+            ["id", "version"], ["lesson_versions.lesson_id", "lesson_versions.number"],
+            name="fk_lessons_current_version",
+            use_alter=True, deferrable=True, initially="DEFERRED",
+        ),
+    )
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=uuid7)
     title = Column(String(200), nullable=False)
     slug = Column(String(200), unique=True, nullable=False, index=True)
     description = Column(Text)
-    content = Column(Text, nullable=False)  # Markdown content
+    # Heavy columns are deferred so list queries never pull them from Postgres;
+    # detail endpoints load the "body" group explicitly with undefer_group().
+    content = deferred(Column(Text, nullable=False), group="body")  # Markdown content
+    # Rendered from content by the validator below, so views never render or
+    # compress; only the catalog loads the "rendered" group
+    content_html = deferred(Column(Text), group="rendered")  # Sanitized, highlighted HTML
+    content_gzip = deferred(Column(LargeBinary), group="rendered")
+    content_br = deferred(Column(LargeBinary), group="rendered")
     difficulty = Column(String(50))  # beginner, intermediate, advanced
-    order = Column(Integer, default=0)  # For sorting lessons
+    order = Column(Integer, nullable=False, default=0)  # For sorting lessons
 
     # Code exercise
-    starter_code = Column(Text)  # Initial code template
-    solution_code = Column(Text)  # Model solution (hidden from students)
-    test_cases = Column(JSON)  # Array of test cases with input/expected output
+    starter_code = deferred(Column(Text), group="body")  # Initial code template
+    solution_code = deferred(Column(Text))  # Model solution (hidden from students)
+    test_cases = deferred(Column(JSON), group="body")  # Array of test cases with input/expected output
+    test_suite_version = Column(Integer, nullable=False, default=1)  # Bumped whenever test_cases change
+    version = Column(Integer, nullable=False, default=1)  # Current lesson_versions.number
+
+    # Digest of the content-pack fields as last synced; NULL once edited through the API
+    content_hash = deferred(Column(String(32)))
 
     # Metadata
     language = Column(String(50), default="python")
     estimated_time = Column(Integer)  # minutes
-    tags = Column(JSON)  # Array of tags
+    tags = Column(JSONB)  # Array of tags
+
+    # Generated by Postgres on every insert and update, so it never drifts
+    # from the columns it indexes; only search queries reference it
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR, persisted=True)), group="search")
 
     # Status
     is_published = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    @validates("content")
+    def _render_content(self, key, value):
+        self.content_html, self.content_gzip, self.content_br = render_content(value)
+        return value
+
     def __repr__(self):
         return f"<Lesson {self.title}>"
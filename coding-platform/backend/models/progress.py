@@ -2,20 +2,24 @@
 User progress model for tracking lesson completion
 """
 
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Integer
+from sqlalchemy import Column, DateTime, Boolean, ForeignKey, Integer, UniqueConstraint, Uuid
 from sqlalchemy.sql import func
 from database.connection import Base
-import uuid
+from database.ids import uuid7
 
 class UserProgress(Base):
     """
     Track user progress through lessons
     """
     __tablename__ = "user_progress"
+    __table_args__ = (
+        # One row per learner and lesson; graded runs upsert against it
+        UniqueConstraint("user_id", "lesson_id", name="uq_user_progress_user_lesson"),
+    )
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    lesson_id = Column(String, ForeignKey("lessons.id", ondelete="CASCADE"), nullable=False)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=uuid7)
+    user_id = Column(Uuid(as_uuid=False), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    lesson_id = Column(Uuid(as_uuid=False), ForeignKey("lessons.id", ondelete="CASCADE"), nullable=False)
 
     # Progress tracking
     is_completed = Column(Boolean, default=False)
@@ -0,0 +1,37 @@
+"""
+Lesson statistics model for incrementally maintained aggregates
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, Uuid
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from database.connection import Base
+
+class LessonStats(Base):
+    """
+    Streaming aggregates over a lesson's graded submissions
+
+    Updated in the transaction that inserts each graded submission and
+    reconciled against code_submissions by tasks.stats, so reading a
+    lesson's statistics never scans submissions.
+    """
+    __tablename__ = "lesson_stats"
+
+    lesson_id = Column(Uuid(as_uuid=False), ForeignKey("lessons.id", ondelete="CASCADE"), primary_key=True)
+
+    # Counters
+    submissions = Column(Integer, nullable=False, server_default="0")  # Graded runs
+    passed = Column(Integer, nullable=False, server_default="0")  # Runs passing every test case
+    learners = Column(Integer, nullable=False, server_default="0")  # Users with a graded run
+    learners_passed = Column(Integer, nullable=False, server_default="0")  # Users who passed at least once
+    first_pass_attempts = Column(Integer, nullable=False, server_default="0")  # Runs up to each first pass, summed
+
+    # Sketches (database/sketches.py)
+    runtime_sketch = Column(JSONB)  # QuantileSketch of execution_time
+    top_errors = Column(JSONB)  # TopK of normalized error messages
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    reconciled_at = Column(DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<LessonStats lesson={self.lesson_id} submissions={self.submissions}>"
@@ -2,28 +2,42 @@
 Code submission model for tracking user code executions
 """
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON, Integer, Float
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, JSON, Integer, Float, Index, Uuid
 from sqlalchemy.sql import func
 from database.connection import Base
-import uuid
+from database.ids import uuid7
 
 class CodeSubmission(Base):
     """
     Store code submissions and execution results
+
+    The table is range-partitioned by month on created_at (see
+    database/partitions.py), so created_at is part of the primary key.
     """
     __tablename__ = "code_submissions"
+    __table_args__ = (
+        Index("ix_code_submissions_user_created", "user_id", "created_at"),
+        # Latest submission per user and lesson, for the lesson page
+        Index("ix_code_submissions_user_lesson_created", "user_id", "lesson_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    lesson_id = Column(String, ForeignKey("lessons.id", ondelete="CASCADE"), nullable=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=uuid7)
+    user_id = Column(Uuid(as_uuid=False), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    lesson_id = Column(Uuid(as_uuid=False), ForeignKey("lessons.id", ondelete="CASCADE"), nullable=True)
 
     # Code details
-    code = Column(Text, nullable=False)
+    # Large values live in content_blobs and are referenced by *_ref;
+    # exactly one of each inline column / ref pair is set
+    code = Column(Text)
+    code_ref = Column(String(64))
     language = Column(String(50), default="python")
 
     # Execution results
     output = Column(Text)
+    output_ref = Column(String(64))
     error = Column(Text)
+    error_ref = Column(String(64))
     execution_time = Column(Float)  # seconds
     memory_used = Column(Integer)  # bytes
     exit_code = Column(Integer)
@@ -32,10 +46,13 @@ class CodeSubmission(Base):
     tests_passed = Column(Integer, default=0)
     tests_failed = Column(Integer, default=0)
     test_results = Column(JSON)  # Detailed test results
+    test_results_ref = Column(String(64))  # Blob holding the JSON-encoded results
+    test_suite_version = Column(Integer)  # Lesson.test_suite_version the results refer to
+    lesson_version = Column(Integer)  # lesson_versions.number the code ran against
 
     # Status
     status = Column(String(50))  # pending, running, success, error, timeout
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
 
     def __repr__(self):
         return f"<CodeSubmission {self.id} status={self.status}>"
@@ -2,10 +2,15 @@
 User model for authentication and user management
 """
 
-from sqlalchemy import Column, String, DateTime, Boolean, Integer
+from sqlalchemy import Column, String, DateTime, Boolean, Integer, Uuid
+from sqlalchemy.orm import validates
 from sqlalchemy.sql import func
 from database.connection import Base
-import uuid
+from database.ids import uuid7
+
+def normalize_login(value: str) -> str:
+    """Case-insensitive form of a username or email"""
+    return value.strip().lower()
 
 class User(Base):
     """
@@ -13,11 +18,16 @@ class User(Base):
     """
     __tablename__ = "users"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    email = Column(String(255), unique=True, nullable=False, index=True)
-    username = Column(String(100), unique=True, nullable=False, index=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=uuid7)
+    email = Column(String(255), nullable=False)
+    username = Column(String(100), nullable=False)
+    # Lowercased copies kept in sync by the validators below; their unique
+    # indexes enforce case-insensitive uniqueness and serve login lookups
+    email_normalized = Column(String(255), unique=True, nullable=False, index=True)
+    username_normalized = Column(String(100), unique=True, nullable=False, index=True)
     hashed_password = Column(String(255), nullable=False)
     full_name = Column(String(200))
+    organization = Column(String(100), index=True)  # Cohort sharing an execution quota
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -28,5 +38,15 @@ class User(Base):
     total_submissions = Column(Integer, default=0)
     successful_submissions = Column(Integer, default=0)
 
+    @validates("email")
+    def _normalize_email(self, key, value):
+        self.email_normalized = normalize_login(value)
+        return value
+
+    @validates("username")
+    def _normalize_username(self, key, value):
+        self.username_normalized = normalize_login(value)
+        return value
+
     def __repr__(self):
         return f"<User {self.username}>"
@@ -0,0 +1,38 @@
+"""
+Lesson version model for immutable snapshots of lesson content
+"""
+
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, JSON, LargeBinary, Uuid
+from sqlalchemy.orm import deferred
+from sqlalchemy.sql import func
+from database.connection import Base
+
+class LessonVersion(Base):
+    """
+    One published state of a lesson's content and test cases
+
+    Rows are never updated: a content or test-case change writes a new
+    version and moves lessons.version to it, so anything keyed by
+    (lesson_id, number) can be cached forever.
+    """
+    __tablename__ = "lesson_versions"
+
+    lesson_id = Column(Uuid(as_uuid=False), ForeignKey("lessons.id", ondelete="CASCADE"), primary_key=True)
+    number = Column(Integer, primary_key=True)  # 1, 2, ... per lesson
+    content_hash = Column(String(32), nullable=False)  # Digest of the versioned fields
+
+    title = Column(String(200), nullable=False)
+    description = Column(Text)
+    content = deferred(Column(Text, nullable=False), group="body")
+    content_html = deferred(Column(Text), group="rendered")
+    content_gzip = deferred(Column(LargeBinary), group="rendered")
+    content_br = deferred(Column(LargeBinary), group="rendered")
+    starter_code = deferred(Column(Text), group="body")
+    test_cases = deferred(Column(JSON), group="body")
+    test_suite_version = Column(Integer, nullable=False)
+    language = Column(String(50))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<LessonVersion {self.lesson_id} v{self.number}>"
@@ -3,6 +3,7 @@ Celery configuration for async task processing
 """
 
 from celery import Celery
+from celery.schedules import crontab
 import os
 
 # Redis configuration
@@ -12,7 +13,8 @@ REDIS_URL = os.getenv("REDIS_URL", "redis://:redis_password@redis:6379/0")
 celery_app = Celery(
     "coding_platform",
     broker=REDIS_URL,
-    backend=REDIS_URL
+    backend=REDIS_URL,
+    include=["tasks.storage", "tasks.stats"]
 )
 
 # Celery configuration
@@ -27,6 +29,16 @@ celery_app.conf.update(
     task_soft_time_limit=25 * 60,  # 25 minutes
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
+    beat_schedule={
+        "maintain-submission-partitions": {
+            "task": "tasks.storage.maintain_submission_partitions",
+            "schedule": crontab(hour=3, minute=0),
+        },
+        "reconcile-lesson-stats": {
+            "task": "tasks.stats.reconcile_lesson_stats",
+            "schedule": crontab(hour=4, minute=0),
+        },
+    },
 )
 
 # Auto-discover tasks
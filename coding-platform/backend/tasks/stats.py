@@ -0,0 +1,25 @@
+"""
+Lesson statistics tasks
+Run directly with: python -m tasks.stats
+"""
+
+import asyncio
+import sys
+
+from tasks.celery_app import celery_app
+from database.lesson_stats import reconcile_lesson_stats as reconcile_lesson_stats_async
+
+@celery_app.task(name="tasks.stats.reconcile_lesson_stats")
+def reconcile_lesson_stats():
+    """
+    Celery entry point for the periodic lesson_stats reconcile
+    """
+    return asyncio.run(reconcile_lesson_stats_async())
+
+if __name__ == "__main__":
+    try:
+        stats = asyncio.run(reconcile_lesson_stats_async())
+        print(f"✓ Reconciled {stats['lessons']} lessons, {stats['corrected']} corrected")
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
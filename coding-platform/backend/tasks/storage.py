@@ -0,0 +1,123 @@
+"""
+Storage maintenance tasks
+Run directly with: python -m tasks.storage
+"""
+
+import asyncio
+import json
+import sys
+from typing import Optional, Tuple
+from sqlalchemy import select, update
+from loguru import logger
+
+from tasks.celery_app import celery_app
+from database.connection import AsyncSessionLocal, engine
+from database.blobs import externalize
+from database.partitions import ensure_partitions
+from database.archive import archive_expired_partitions
+from models.submission import CodeSubmission
+
+BACKFILL_BATCH_SIZE = 500
+
+async def backfill_blob_batch(after_id: Optional[str], batch_size: int) -> Tuple[int, int, Optional[str]]:
+    """
+    Externalize one batch of submissions ordered by id
+
+    Returns (rows scanned, rows updated, last id seen).
+    """
+    query = (
+        select(
+            CodeSubmission.id,
+            CodeSubmission.created_at,
+            CodeSubmission.code,
+            CodeSubmission.output,
+            CodeSubmission.error,
+            CodeSubmission.test_results,
+        )
+        .order_by(CodeSubmission.id)
+        .limit(batch_size)
+    )
+    if after_id is not None:
+        query = query.where(CodeSubmission.id > after_id)
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(query)
+        rows = result.all()
+        if not rows:
+            return 0, 0, None
+
+        fields = {}
+        for row in rows:
+            key = (row.id, row.created_at)
+            fields[(key, "code")] = row.code
+            fields[(key, "output")] = row.output
+            fields[(key, "error")] = row.error
+            if row.test_results is not None:
+                fields[(key, "test_results")] = json.dumps(row.test_results)
+
+        # One blob INSERT for the whole batch
+        refs = await externalize(session, fields)
+
+        updates = {}
+        for ((submission_id, created_at), field), digest in refs.items():
+            values = updates.setdefault(
+                submission_id,
+                {"id": submission_id, "created_at": created_at}
+            )
+            values[field] = None
+            values[f"{field}_ref"] = digest
+
+        if updates:
+            await session.execute(update(CodeSubmission), list(updates.values()))
+        await session.commit()
+
+        return len(rows), len(updates), rows[-1].id
+
+async def backfill_submission_blobs_async(batch_size: int = BACKFILL_BATCH_SIZE) -> dict:
+    """
+    Move large inline submission fields of existing rows into content_blobs
+    """
+    scanned = updated = 0
+    last_id = None
+
+    while True:
+        batch_scanned, batch_updated, last_id = await backfill_blob_batch(last_id, batch_size)
+        if not batch_scanned:
+            break
+        scanned += batch_scanned
+        updated += batch_updated
+        logger.info(f"Blob backfill: scanned {scanned} submissions, updated {updated}")
+
+    return {"scanned": scanned, "updated": updated}
+
+@celery_app.task(name="tasks.storage.backfill_submission_blobs")
+def backfill_submission_blobs(batch_size: int = BACKFILL_BATCH_SIZE):
+    """
+    Celery entry point for the submission blob backfill
+    """
+    return asyncio.run(backfill_submission_blobs_async(batch_size))
+
+async def maintain_submission_partitions_async() -> dict:
+    """
+    Pre-create upcoming partitions and archive expired ones
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(ensure_partitions)
+
+    archived = await archive_expired_partitions()
+    return {"archived": [str(path) for path in archived]}
+
+@celery_app.task(name="tasks.storage.maintain_submission_partitions")
+def maintain_submission_partitions():
+    """
+    Celery entry point for daily partition maintenance
+    """
+    return asyncio.run(maintain_submission_partitions_async())
+
+if __name__ == "__main__":
+    try:
+        stats = asyncio.run(backfill_submission_blobs_async())
+        print(f"✓ Backfill complete: {stats['updated']} of {stats['scanned']} submissions updated")
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -4,7 +4,8 @@ Pytest configuration for testing
 
 import pytest
 import asyncio
-from typing import Generator
+from contextlib import contextmanager
+from typing import Generator, Optional
 
 @pytest.fixture(scope="session")
 def event_loop() -> Generator:
@@ -12,3 +13,26 @@ def event_loop() -> Generator:
     loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
     loop.close()
+
+@pytest.fixture
+def query_budget():
+    """
+    Assert that a block of requests stays within a SQL budget
+
+    Usage:
+        with query_budget(queries=2, round_trips=2):
+            await client.get("/api/lessons", headers=headers)
+    """
+    from database.query_stats import track_queries
+
+    @contextmanager
+    def budget(queries: Optional[int] = None, round_trips: Optional[int] = None, rows: Optional[int] = None):
+        with track_queries() as stats:
+            yield stats
+        for name, limit in (("queries", queries), ("round_trips", round_trips), ("rows", rows)):
+            actual = getattr(stats, name)
+            assert limit is None or actual <= limit, (
+                f"{name} budget exceeded: {actual} > {limit} ({stats.as_header()})"
+            )
+
+    return budget
@@ -0,0 +1,51 @@
+"""
+Idle event stream footprint
+Opens many idle progress streams on one worker, one channel per user, and
+reports memory per stream and the time to fan an event out to all of them.
+Needs a reachable Redis (REDIS_URL).
+
+Usage: python tests/events_benchmark.py [--streams 10000]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.events import hub, stream, user_channel
+
+async def run(streams: int):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    generators = [stream(user_channel(f"bench-{i}")) for i in range(streams)]
+    for generator in generators:
+        await generator.__anext__()  # Subscribes and yields the preamble
+    pending = [asyncio.create_task(generator.__anext__()) for generator in generators]
+    await asyncio.sleep(0.5)
+
+    used = tracemalloc.get_traced_memory()[0] - before
+    print(f"{streams} idle streams: {used / 2**20:.1f} MiB, {used / streams / 1024:.2f} KiB per stream")
+
+    start = time.perf_counter()
+    for i in range(streams):
+        hub.dispatch(user_channel(f"bench-{i}"), "event: progress\ndata: {}\n\n")
+    await asyncio.gather(*pending)
+    print(f"Delivered one event to every stream in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for generator in generators:
+        await generator.aclose()
+    await hub.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--streams", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(run(args.streams))
+
+if __name__ == "__main__":
+    main()
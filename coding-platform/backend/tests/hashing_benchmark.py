@@ -0,0 +1,81 @@
+"""
+Event-loop latency under concurrent logins
+Compares bcrypt verification inline on the event loop with the hashing pool.
+
+Usage: python tests/hashing_benchmark.py [--logins 40] [--concurrency 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api import hashing
+from api.hashing import pwd_context, verify_password
+
+# How often the probe task asks to be woken up
+PROBE_INTERVAL = 0.005
+
+async def probe(lags: list, done: asyncio.Event):
+    """Record how late the event loop wakes a sleeping task"""
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+async def inline_login(password: str, hashed: str):
+    """Verification as previously done, blocking the loop"""
+    pwd_context.verify(password, hashed)
+
+async def pooled_login(password: str, hashed: str):
+    await verify_password(password, hashed)
+
+async def run(login, logins: int, concurrency: int) -> dict:
+    hashed = pwd_context.hash("benchmark-password")
+    semaphore = asyncio.Semaphore(concurrency)
+    lags = []
+    done = asyncio.Event()
+
+    async def one():
+        async with semaphore:
+            await login("benchmark-password", hashed)
+
+    probe_task = asyncio.create_task(probe(lags, done))
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    return {
+        "logins/s": logins / elapsed,
+        "lag p50": statistics.median(lags_ms),
+        "lag p99": lags_ms[int(len(lags_ms) * 0.99)],
+        "lag max": lags_ms[-1],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    # Keep the queue limit out of the way; this measures latency, not shedding
+    hashing.PASSWORD_HASH_QUEUE_LIMIT = args.logins
+
+    print(
+        f"bcrypt rounds={hashing.BCRYPT_ROUNDS}, pool workers={hashing.PASSWORD_HASH_WORKERS}, "
+        f"{args.logins} logins, concurrency {args.concurrency}"
+    )
+    print(f"{'mode':<8}{'logins/s':>10}{'lag p50':>10}{'lag p99':>10}{'lag max':>10}   (lag in ms)")
+    for name, login in (("inline", inline_login), ("pool", pooled_login)):
+        result = asyncio.run(run(login, args.logins, args.concurrency))
+        print(f"{name:<8}" + "".join(f"{value:>10.1f}" for value in result.values()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+In-memory lesson search latency
+Builds a catalog of synthetic lessons and times catalog searches, the path
+used when Postgres search is disabled or unavailable.
+
+Usage: python tests/search_benchmark.py [--lessons 10000] [--queries 2000]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.catalog import build_snapshot
+from api.lessons import LessonResponse
+
+WORDS = (
+    "variable loop function class object list dictionary tuple set string "
+    "recursion iterator generator decorator closure module package exception "
+    "file async await thread process sort search tree graph queue stack heap "
+    "hash binary pointer memory type test debug format parse regex json api"
+).split()
+
+QUERIES = ["loop", "recursion tree", "dict", "async await", "json parse", "sort", "gen", "heap queue"]
+
+def make_lessons(count: int, rng: random.Random) -> List[LessonResponse]:
+    def words(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    return [
+        LessonResponse(
+            id=f"0190a0b0-0000-7000-8000-{i:012d}",
+            title=words(3).title(),
+            slug=f"lesson-{i}",
+            description=words(12),
+            content=f"# Lesson {i}\n\n" + words(300),
+            difficulty="beginner",
+            order=i,
+            starter_code=None,
+            test_cases=None,
+            language="python",
+            estimated_time=15,
+            tags=rng.sample(WORDS, 3),
+            is_published=True,
+            version=1,
+            created_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        )
+        for i in range(count)
+    ]
+
+def run(lessons: int, queries: int):
+    rng = random.Random(0)
+    snapshot = build_snapshot(0, make_lessons(lessons, rng))
+
+    start = time.perf_counter()
+    index = snapshot.search_index
+    print(f"{lessons} lessons, {len(index.vocabulary)} terms, index built in {time.perf_counter() - start:.2f}s")
+
+    timings = []
+    for i in range(queries):
+        start = time.perf_counter()
+        snapshot.search(QUERIES[i % len(QUERIES)], 20)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{queries} searches: p50 {statistics.median(timings):.2f} ms, p99 {p99:.2f} ms, max {timings[-1]:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lessons", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.lessons, args.queries)
+
+if __name__ == "__main__":
+    main()
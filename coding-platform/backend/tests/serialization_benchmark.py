@@ -0,0 +1,135 @@
+"""
+Response serialization throughput
+Compares response_model validation with the stdlib encoder against validate-once
+orjson responses for the lesson list and the lessons-with-progress list.
+
+Usage: python tests/serialization_benchmark.py [--lessons 50] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse
+from httpx import AsyncClient
+
+from api import catalog
+from api.auth import create_access_token, get_token_user_id
+from api.catalog import build_snapshot
+from api.lessons import LessonListItem, LessonResponse
+from api.pagination import MAX_LESSON_PAGE_SIZE, LessonQuery
+from api.progress import LessonProgressItem
+from api.serialization import json_response
+
+ProgressRow = namedtuple(
+    "ProgressRow",
+    "id title slug difficulty progress_id is_completed attempts best_score"
+)
+
+def make_lessons(count: int) -> List[LessonResponse]:
+    return [
+        LessonResponse(
+            id=f"0190a0b0-0000-7000-8000-{i:012d}",
+            title=f"Lesson {i}",
+            slug=f"lesson-{i}",
+            description="Practice loops, functions and data structures " * 2,
+            content="# Lesson\n\nSome text.\n\n```python\nprint('hi')\n```\n",
+            difficulty="beginner",
+            order=i,
+            starter_code="# Write your code here\n",
+            test_cases=[{"input": "", "expected_output": "hi"}],
+            language="python",
+            estimated_time=15,
+            tags=["basics", "loops"],
+            is_published=True,
+            version=1,
+            created_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        )
+        for i in range(count)
+    ]
+
+def make_rows(count: int) -> List[ProgressRow]:
+    return [
+        ProgressRow(f"0190a0b0-0000-7000-8000-{i:012d}", f"Lesson {i}", f"lesson-{i}", "beginner",
+                    None if i % 2 else f"0190a0b1-0000-7000-8000-{i:012d}", i % 3 == 0, i % 5, 80)
+        for i in range(count)
+    ]
+
+def progress_items(rows) -> List[LessonProgressItem]:
+    """The handler's own work, shared by both variants"""
+    return [
+        LessonProgressItem(
+            lesson_id=row.id,
+            lesson_title=row.title,
+            lesson_slug=row.slug,
+            difficulty=row.difficulty,
+            is_completed=bool(row.is_completed),
+            attempts=row.attempts or 0,
+            best_score=row.best_score or 0,
+            progress_id=row.progress_id
+        )
+        for row in rows
+    ]
+
+def build_app(rows) -> FastAPI:
+    """Both variants of both endpoints behind the same token-only auth"""
+    app = FastAPI()
+
+    @app.get("/before/lessons", response_model=List[LessonListItem], response_class=JSONResponse)
+    async def lessons_before(user_id: str = Depends(get_token_user_id)):
+        return (await catalog.get_catalog()).summaries
+
+    @app.get("/after/lessons", response_model=List[LessonListItem])
+    async def lessons_after(user_id: str = Depends(get_token_user_id)):
+        body, _ = (await catalog.get_catalog()).page(LessonQuery(limit=MAX_LESSON_PAGE_SIZE))
+        return json_response(body)
+
+    @app.get("/before/progress", response_model=List[LessonProgressItem], response_class=JSONResponse)
+    async def progress_before(user_id: str = Depends(get_token_user_id)):
+        return progress_items(rows)
+
+    @app.get("/after/progress", response_model=List[LessonProgressItem])
+    async def progress_after(user_id: str = Depends(get_token_user_id)):
+        return json_response(progress_items(rows))
+
+    return app
+
+async def measure(client: AsyncClient, path: str, requests: int, headers: dict) -> float:
+    for _ in range(min(50, requests)):
+        await client.get(path, headers=headers)
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get(path, headers=headers)
+        assert response.status_code == 200, response.text
+    return requests / (time.perf_counter() - start)
+
+async def run(lessons: int, requests: int):
+    catalog._snapshot = build_snapshot(0, make_lessons(lessons))
+    app = build_app(make_rows(lessons))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'benchmark'})}"}
+
+    print(f"{lessons} lessons, {requests} sequential requests per variant")
+    print(f"{'endpoint':<12}{'before req/s':>14}{'after req/s':>14}{'speedup':>10}")
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+        for endpoint in ("lessons", "progress"):
+            before = await measure(client, f"/before/{endpoint}", requests, headers)
+            after = await measure(client, f"/after/{endpoint}", requests, headers)
+            print(f"{endpoint:<12}{before:>14.0f}{after:>14.0f}{after / before:>9.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lessons", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.lessons, args.requests))
+
+if __name__ == "__main__":
+    main()
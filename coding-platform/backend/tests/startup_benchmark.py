@@ -0,0 +1,63 @@
+"""
+Worker startup benchmark
+Times `import main` and the lifespan startup in fresh interpreters, the way
+uvicorn starts each worker.
+
+Usage: python tests/startup_benchmark.py [--runs 10] [--no-db]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Runs inside each child process and prints its timings as JSON
+WORKER_SCRIPT = """
+import asyncio, json, sys, time
+
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def startup():
+    async with main.lifespan(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(startup()) if sys.argv[1] == "db" else imported
+print(json.dumps({"import": imported - start, "lifespan": ready - imported, "total": ready - start}))
+"""
+
+def run_once(with_db: bool) -> dict:
+    """Start one fresh interpreter and return its timings in seconds"""
+    result = subprocess.run(
+        [sys.executable, "-c", WORKER_SCRIPT, "db" if with_db else "nodb"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--no-db", action="store_true", help="only time the import")
+    args = parser.parse_args()
+
+    samples = [run_once(not args.no_db) for _ in range(args.runs)]
+
+    print(f"{'phase':<10}{'min':>10}{'median':>10}{'max':>10}   (ms, {args.runs} runs)")
+    for phase in ("import", "lifespan", "total"):
+        values = [sample[phase] * 1000 for sample in samples]
+        print(f"{phase:<10}{min(values):>10.1f}{statistics.median(values):>10.1f}{max(values):>10.1f}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except subprocess.CalledProcessError as e:
+        print(f"Error: worker failed to start\n{e.stderr}", file=sys.stderr)
+        sys.exit(1)
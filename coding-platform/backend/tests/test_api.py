@@ -103,6 +103,35 @@ async def test_register_duplicate_user():
         # Second attempt should fail
         assert response.status_code == 400
 
+@pytest.mark.asyncio
+async def test_register_duplicate_is_case_insensitive():
+    """Test that usernames and emails differing only in case are duplicates"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.post("/api/auth/register", json=TEST_USER)
+
+        response = await client.post("/api/auth/register", json={
+            **TEST_USER, "email": TEST_USER["email"].upper(), "username": "otheruser"
+        })
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Email already registered"
+
+        response = await client.post("/api/auth/register", json={
+            **TEST_USER, "email": "other@example.com", "username": TEST_USER["username"].upper()
+        })
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Username already taken"
+
+@pytest.mark.asyncio
+async def test_login_by_email_ignores_case():
+    """Test login with a differently cased email"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.post("/api/auth/register", json=TEST_USER)
+        response = await client.post(
+            "/api/auth/login",
+            data={"username": TEST_USER["email"].upper(), "password": TEST_USER["password"]}
+        )
+        assert response.status_code == 200
+
 # Helper function to get auth token
 async def get_auth_token():
     """Get authentication token for tests"""
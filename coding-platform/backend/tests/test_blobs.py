@@ -0,0 +1,109 @@
+"""
+Tests for the content blob store and compact submission encoding
+"""
+
+import json
+import pytest
+import uuid
+import zlib
+from database import blobs
+from database.blobs import BLOB_MIN_SIZE, compress, decompress, externalize, load_texts
+from database.connection import AsyncSessionLocal
+from models.submission import CodeSubmission
+from api.code_execution import expand_test_results, serialize_submissions, store_test_results
+
+TEST_CASES = [
+    {"description": "Greets", "input": "", "expected_output": "hello\n"},
+    {"description": "Counts", "input": "3", "expected_output": "1 2 3"},
+]
+
+def large_text(label: str) -> str:
+    """Unique text over the inline threshold, with non-ASCII characters"""
+    return f"{label} {uuid.uuid4()} ✓ " + "line\n" * BLOB_MIN_SIZE
+
+def test_compress_round_trip(monkeypatch):
+    """Test that both codecs restore the original bytes"""
+    data = large_text("codec").encode()
+    codec, payload = compress(data)
+    assert decompress(codec, payload) == data
+
+    monkeypatch.setattr(blobs, "zstandard", None)
+    assert compress(data)[0] == "zlib"
+    assert decompress("zlib", zlib.compress(data)) == data
+    with pytest.raises(ValueError):
+        decompress("lz4", payload)
+
+@pytest.mark.asyncio
+async def test_externalize_round_trip():
+    """Test that large values come back unchanged and small ones stay inline"""
+    code, output = large_text("code"), large_text("output")
+    async with AsyncSessionLocal() as db:
+        refs = await externalize(db, {"code": code, "output": output, "error": "short", "stdin": None})
+        await db.commit()
+
+        assert set(refs) == {"code", "output"}
+        texts = await load_texts(db, refs.values())
+        assert texts == {refs["code"]: code, refs["output"]: output}
+
+@pytest.mark.asyncio
+async def test_equal_values_share_one_blob():
+    """Test that equal values are stored once, also across submissions"""
+    output = large_text("shared")
+    async with AsyncSessionLocal() as db:
+        first = await externalize(db, {"output": output, ("0", "output"): output})
+        await db.commit()
+        second = await externalize(db, {"output": output})
+        await db.commit()
+
+    assert first["output"] == first[("0", "output")] == second["output"]
+
+@pytest.mark.asyncio
+async def test_missing_refs_are_skipped():
+    """Test that unknown or empty refs resolve to nothing"""
+    async with AsyncSessionLocal() as db:
+        assert await load_texts(db, []) == {}
+        assert await load_texts(db, [None, "0" * 64]) == {}
+
+def test_compact_test_results_round_trip():
+    """Test that stored results expand to the same report as fresh ones"""
+    results = [
+        {"test": 0, "passed": True, "output": None, "error": None, "time": 0.01},
+        {"test": 1, "passed": False, "output": large_text("actual"), "error": "Traceback", "time": 0.02},
+    ]
+    refs = {(1, "output"): "ref-1"}
+    stored = store_test_results(results, refs)
+    assert "output" not in stored[1] and stored[1]["output_ref"] == "ref-1"
+
+    fresh = expand_test_results(results, TEST_CASES)
+    assert expand_test_results(stored, TEST_CASES, {"ref-1": results[1]["output"]}) == fresh
+    # Passing cases report the expected output instead of storing a copy
+    assert fresh[0]["actual_output"] == "hello"
+    assert fresh[1]["input"] == "3"
+
+    # After the suite changed, inputs are unknown but outcomes remain
+    stale = expand_test_results(stored, None, {"ref-1": results[1]["output"]})
+    assert stale[1]["input"] is None and stale[1]["passed"] is False
+
+@pytest.mark.asyncio
+async def test_serialize_submissions_resolves_refs():
+    """Test that submissions read back their externalized and inline fields"""
+    code = large_text("code")
+    results = [{"test": 0, "passed": False, "output": large_text("case"), "error": "", "time": 0.0}]
+
+    async with AsyncSessionLocal() as db:
+        refs = await externalize(db, {"code": code, (0, "output"): results[0]["output"]})
+        stored_results = json.dumps(store_test_results(results, refs))
+        refs.update(await externalize(db, {"test_results": stored_results + " " * BLOB_MIN_SIZE}))
+        await db.commit()
+
+        submission = CodeSubmission(
+            code_ref=refs["code"], output="ok", test_results_ref=refs["test_results"],
+            tests_passed=0, tests_failed=1, status="success",
+        )
+        missing = CodeSubmission(code_ref="0" * 64, test_results_ref="1" * 64, status="success")
+        serialized, broken = await serialize_submissions(db, [submission, missing])
+
+    assert serialized["code"] == code
+    assert serialized["output"] == "ok"
+    assert serialized["test_results"][0]["actual_output"] == results[0]["output"]
+    assert broken["code"] is None and broken["test_results"] is None
@@ -0,0 +1,80 @@
+"""
+Tests for the lesson page bootstrap endpoint
+"""
+
+import pytest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from httpx import AsyncClient
+from main import app
+from api import catalog, lessons
+from api.auth import create_access_token
+from tests.test_catalog import LESSON, make_snapshot
+
+USER_ID = "0190a0b0-0000-7000-8000-00000000aaaa"
+
+def learner_row(**values):
+    """A load_learner_state row with no progress and no submission"""
+    mapping = {f"progress_{name}": None for name in lessons.PROGRESS_COLUMNS}
+    mapping.update({
+        f"submission_{name}": None
+        for name in ("id", "status", "tests_passed", "tests_failed", "lesson_version", "code", "code_ref", "created_at")
+    })
+    mapping.update({"is_active": True, "codec": None, "data": None, **values})
+    return SimpleNamespace(_mapping=mapping, **mapping)
+
+@pytest.mark.asyncio
+async def test_bootstrap_combines_lesson_progress_and_submission(monkeypatch):
+    """Test that one request returns the lesson, progress and latest code"""
+    now = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    rows = {
+        "fresh": learner_row(),
+        "returning": learner_row(
+            progress_id="0190a0b0-0000-7000-8000-00000000bbbb", progress_user_id=USER_ID,
+            progress_lesson_id=LESSON.id, progress_is_completed=False, progress_attempts=2,
+            progress_best_score=50, progress_started_at=now,
+            submission_id="0190a0b0-0000-7000-8000-00000000cccc", submission_status="success",
+            submission_tests_passed=1, submission_tests_failed=1, submission_lesson_version=1,
+            submission_code="print(1)", submission_created_at=now,
+        ),
+        # Code externalized to a blob that is no longer there
+        "missing_blob": learner_row(
+            submission_id="0190a0b0-0000-7000-8000-00000000dddd", submission_status="success",
+            submission_tests_passed=1, submission_tests_failed=0, submission_lesson_version=1,
+            submission_code_ref="0" * 64, submission_created_at=now,
+        ),
+    }
+    state = {"row": rows["fresh"]}
+
+    async def load_learner_state(db, user_id, lesson_id):
+        assert (user_id, lesson_id) == (USER_ID, LESSON.id)
+        return state["row"]
+
+    monkeypatch.setattr(lessons, "load_learner_state", load_learner_state)
+    monkeypatch.setattr(catalog, "_snapshot", make_snapshot(1))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': USER_ID})}"}
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        data = (await client.get("/api/lessons/slug/variables/bootstrap", headers=headers)).json()
+        assert data["lesson"]["id"] == LESSON.id
+        # The rendered HTML is inlined; the raw markdown is not sent
+        assert "content" not in data["lesson"]
+        assert "<h1>Variables</h1>" in data["content_html"]
+        assert data["progress"] is None and data["latest_submission"] is None
+
+        state["row"] = rows["returning"]
+        data = (await client.get("/api/lessons/slug/variables/bootstrap", headers=headers)).json()
+        assert data["progress"]["best_score"] == 50
+        assert data["latest_submission"]["code"] == "print(1)"
+
+        state["row"] = rows["missing_blob"]
+        data = (await client.get("/api/lessons/slug/variables/bootstrap", headers=headers)).json()
+        assert data["latest_submission"]["id"] == "0190a0b0-0000-7000-8000-00000000dddd"
+        assert data["latest_submission"]["code"] is None
+
+        state["row"] = learner_row(is_active=False)
+        response = await client.get("/api/lessons/slug/variables/bootstrap", headers=headers)
+        assert response.status_code == 400
+
+        response = await client.get("/api/lessons/slug/missing/bootstrap", headers=headers)
+        assert response.status_code == 404
@@ -0,0 +1,98 @@
+"""
+Tests for the in-memory lesson catalog
+"""
+
+import pytest
+from datetime import datetime
+from httpx import AsyncClient
+from main import app
+from api import catalog
+from api.auth import create_access_token
+from api.catalog import CatalogSnapshot
+from api.lessons import LessonResponse, LessonSourceResponse
+from api.serialization import dump_json
+
+LESSON = LessonResponse(
+    id="0190a0b0-0000-7000-8000-000000000001",
+    title="Variables",
+    slug="variables",
+    description=None,
+    content="# Variables",
+    difficulty="beginner",
+    order=1,
+    starter_code=None,
+    test_cases=None,
+    language="python",
+    estimated_time=10,
+    tags=["basics"],
+    is_published=True,
+    version=1,
+    created_at=datetime(2026, 1, 1),
+)
+
+def make_snapshot(version: int) -> CatalogSnapshot:
+    return catalog.build_snapshot(version, [LESSON])
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Record catalog loads instead of reading the database"""
+    calls = []
+
+    async def load_snapshot(version):
+        calls.append(version)
+        return make_snapshot(version)
+
+    monkeypatch.setattr(catalog, "load_snapshot", load_snapshot)
+    monkeypatch.setattr(catalog, "_snapshot", None)
+    return calls
+
+@pytest.mark.asyncio
+async def test_reload_only_on_version_change(loads):
+    """Test that an announced version the worker already has is a no-op"""
+    await catalog.reload_catalog(3)
+    await catalog.reload_catalog(3)
+    await catalog.reload_catalog(4)
+
+    assert loads == [3, 4]
+    assert (await catalog.get_catalog()).version == 4
+
+@pytest.mark.asyncio
+async def test_publish_without_redis_reloads_locally(loads, monkeypatch):
+    """Test that an admin write still refreshes its own worker when Redis is down"""
+    async def incr(key):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(catalog.redis_client, "incr", incr)
+    monkeypatch.setattr(catalog.redis_client, "get", incr)
+    await catalog.reload_catalog(2)
+    await catalog.publish_catalog_change()
+
+    assert loads == [2, -1]
+
+@pytest.mark.asyncio
+async def test_lessons_served_from_catalog(loads, monkeypatch):
+    """Test that lesson reads need only a valid token and the catalog"""
+    monkeypatch.setattr(catalog, "_snapshot", make_snapshot(1))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'someone'})}"}
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/api/lessons/slug/variables", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["id"] == LESSON.id
+        assert "content" not in response.json()
+
+        response = await client.get("/api/lessons", headers=headers)
+        assert [item["slug"] for item in response.json()] == ["variables"]
+
+        response = await client.get("/api/lessons/slug/missing", headers=headers)
+        assert response.status_code == 404
+
+        response = await client.get("/api/lessons")
+        assert response.status_code == 401
+
+    assert loads == []
+
+def test_only_admin_responses_carry_markdown():
+    """Test that the Markdown is left out of learner payloads but returned to editors"""
+    assert b'"content"' not in dump_json(LESSON)
+    assert b'"content":"# Variables"' in dump_json(LessonSourceResponse.model_validate(LESSON))
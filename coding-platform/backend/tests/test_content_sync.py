@@ -0,0 +1,147 @@
+"""
+Tests for content-pack sync
+"""
+
+import json
+import pytest
+import uuid
+from sqlalchemy import select
+from sqlalchemy.orm import undefer_group
+from database import content_sync
+from database.connection import AsyncSessionLocal
+from database.content_sync import ExistingLesson, SyncReport, diff_lessons, load_pack, parse_jsonl, sync_lessons
+from database.versions import new_version, version_hash
+from models.lesson import Lesson
+from models.version import LessonVersion
+
+LESSON_MARKDOWN = """---
+title: Loops
+order: 2
+tags: [basics, loops]
+test_cases:
+  - input: ""
+    expected_output: "0"
+---
+
+# Loops
+
+Repeat work.
+"""
+
+def test_markdown_pack_front_matter(tmp_path):
+    """Test that front matter becomes fields, the body content and the file name the slug"""
+    (tmp_path / "loops.md").write_text(LESSON_MARKDOWN)
+
+    [lesson] = load_pack(tmp_path)
+
+    assert lesson["slug"] == "loops"
+    assert lesson["title"] == "Loops"
+    assert lesson["tags"] == ["basics", "loops"]
+    assert lesson["test_cases"] == [{"input": "", "expected_output": "0"}]
+    assert lesson["content"] == "# Loops\n\nRepeat work.\n"
+    assert lesson["is_published"] is True
+
+def test_diff_writes_only_changes():
+    """Test that unchanged lessons are skipped, edits are detected by hash
+    and only content edits start a new version"""
+    lines = [
+        json.dumps({"title": "A", "slug": "a", "content": "one"}),
+        json.dumps({"title": "B", "slug": "b", "content": "two"}),
+        json.dumps({"title": "C", "slug": "c", "content": "three"}),
+        json.dumps({"title": "D", "slug": "d", "content": "four", "order": 9}),
+    ]
+    a, b, c, d = parse_jsonl("\n".join(lines))
+    existing = {
+        "a": ExistingLesson("id-a", a["content_hash"], True, 1, version_hash(a)),
+        "b": ExistingLesson("id-b", "stale", True, 2, "stale"),
+        "d": ExistingLesson("id-d", "stale", True, 3, version_hash(d)),
+        "gone": ExistingLesson("id-gone", None, True, 1, None),
+    }
+
+    report = SyncReport(dry_run=True)
+    changed = diff_lessons([a, b, c, d], existing, report)
+
+    assert [(lesson["slug"], lesson["version"], lesson["new_version"]) for lesson in changed] == [
+        ("b", 3, True), ("c", 1, True), ("d", 3, False)
+    ]
+    assert changed[0]["id"] == "id-b"
+    assert (report.created, report.updated, report.unchanged, report.missing) == (["c"], ["b", "d"], 1, ["gone"])
+
+def test_invalid_pack_names_the_line():
+    """Test that validation errors point at the offending entry"""
+    with pytest.raises(ValueError, match="pack.jsonl:2"):
+        parse_jsonl('{"title": "A", "slug": "a", "content": "x"}\n{"slug": "b"}', "pack.jsonl")
+
+@pytest.mark.asyncio
+async def test_large_renders_fork_only_when_asked(monkeypatch):
+    """Test that server syncs render on the thread pool and the CLI in processes"""
+    pools = []
+
+    class RecordingPool:
+        def __init__(self, max_workers):
+            pools.append(max_workers)
+
+        def __enter__(self):
+            return None  # run_in_executor(None, ...) uses the default thread pool
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(content_sync, "ProcessPoolExecutor", RecordingPool)
+    lessons = [{"content": f"# Lesson {i}"} for i in range(content_sync.RENDER_INLINE_LIMIT + 1)]
+
+    await content_sync.render_lessons(lessons)
+    assert pools == []
+    assert "<h1>Lesson 0</h1>" in lessons[0]["content_html"]
+
+    await content_sync.render_lessons(lessons, workers=2)
+    assert pools == [2]
+
+@pytest.mark.asyncio
+async def test_sync_replans_against_concurrent_writes(monkeypatch):
+    """Test that an admin edit and a new lesson landing mid-sync are written over, not collided with"""
+    suffix = uuid.uuid4().hex[:8]
+    edited, raced = f"edited-{suffix}", f"raced-{suffix}"
+
+    def pack(content):
+        return parse_jsonl("\n".join(
+            json.dumps({"title": slug, "slug": slug, "content": f"{content} {slug}"}) for slug in (edited, raced)
+        ))
+
+    await sync_lessons(pack("first")[:1])
+    render_lessons = content_sync.render_lessons
+
+    async def render_while_others_write(lessons, workers=0):
+        await render_lessons(lessons, workers)
+        async with AsyncSessionLocal() as db:
+            lesson = (await db.execute(
+                select(Lesson).options(undefer_group("body"), undefer_group("rendered")).where(Lesson.slug == edited)
+            )).scalar_one()
+            lesson.content = "admin edit"
+            lesson.version += 1
+            db.add(new_version(lesson))
+
+            other = Lesson(
+                title=raced, slug=raced, description=None, content="created elsewhere",
+                starter_code=None, test_cases=None, language="python",
+            )
+            db.add(other)
+            await db.flush()
+            db.add(new_version(other))
+            await db.commit()
+
+    monkeypatch.setattr(content_sync, "render_lessons", render_while_others_write)
+    report = await sync_lessons(pack("second"))
+
+    assert (report.created, sorted(report.updated)) == ([], sorted([edited, raced]))
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(Lesson.slug, Lesson.version, LessonVersion.content)
+            .join(LessonVersion, (LessonVersion.lesson_id == Lesson.id) & (LessonVersion.number == Lesson.version))
+            .where(Lesson.slug.in_([edited, raced]))
+            .order_by(Lesson.slug)
+        )).all()
+    assert [tuple(row) for row in rows] == [
+        (edited, 3, f"second {edited}"),
+        (raced, 2, f"second {raced}"),
+    ]
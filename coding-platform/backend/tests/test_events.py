@@ -0,0 +1,35 @@
+"""
+Tests for live progress events
+"""
+
+from api import events
+from api.events import RESYNC_FRAME, EventHub, Subscriber, event_frame
+
+def test_event_frame():
+    """Test that events are encoded as server-sent event frames"""
+    assert event_frame("progress", {"lesson_id": "l1"}) == 'event: progress\ndata: {"lesson_id":"l1"}\n\n'
+
+def test_fan_out_shares_frames():
+    """Test that one message reaches every local stream of its channel only"""
+    hub = EventHub()
+    first, second, other = Subscriber(), Subscriber(), Subscriber()
+    hub.subscribers = {"events:user:u1": {first, second}, "events:user:u2": {other}}
+
+    hub.dispatch("events:user:u1", event_frame("progress", {}))
+
+    assert first.frames[0] is second.frames[0]
+    assert first.ready.is_set() and not other.ready.is_set()
+    assert first.drain() == b"event: progress\ndata: {}\n\n"
+    assert not first.ready.is_set()
+
+def test_slow_stream_is_bounded(monkeypatch):
+    """Test that a stream that falls behind keeps only the newest frames and resyncs"""
+    monkeypatch.setattr(events, "EVENTS_BUFFER_SIZE", 2)
+    subscriber = Subscriber()
+
+    for i in range(5):
+        subscriber.push(f"{i}".encode())
+
+    assert subscriber.drain() == RESYNC_FRAME + b"34"
+    subscriber.push(b"5")
+    assert subscriber.drain() == b"5"
@@ -0,0 +1,40 @@
+"""
+Tests for pooled password hashing
+"""
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from api import hashing
+from api.hashing import hash_password, verify_password
+
+@pytest.mark.asyncio
+async def test_hash_and_verify():
+    """Test that hashes made in the pool verify"""
+    hashed = await hash_password("correct horse")
+
+    assert await verify_password("correct horse", hashed) == (True, None)
+    assert (await verify_password("wrong horse", hashed))[0] is False
+
+@pytest.mark.asyncio
+async def test_verify_upgrades_outdated_cost():
+    """Test that a hash with a different bcrypt cost is replaced on login"""
+    old_rounds = hashing.BCRYPT_ROUNDS - 1
+    hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=old_rounds).hash("correct horse")
+
+    valid, new_hash = await verify_password("correct horse", hashed)
+
+    assert valid
+    assert new_hash and f"${hashing.BCRYPT_ROUNDS:02d}$" in new_hash
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected(monkeypatch):
+    """Test that hashing sheds load with a 503 once the queue is full"""
+    monkeypatch.setattr(hashing, "PASSWORD_HASH_QUEUE_LIMIT", 0)
+    rejected = hashing.stats.rejected
+
+    with pytest.raises(HTTPException) as exc_info:
+        await hash_password("correct horse")
+
+    assert exc_info.value.status_code == 503
+    assert hashing.stats.rejected == rejected + 1
@@ -0,0 +1,71 @@
+"""
+Tests for ETags and conditional GETs
+"""
+
+import pytest
+from httpx import AsyncClient
+from starlette.requests import Request
+from main import app
+from api import catalog, http_cache
+from api.auth import create_access_token
+from api.http_cache import etag_matches, make_etag
+from tests.test_catalog import make_snapshot
+
+def make_request(if_none_match: str) -> Request:
+    return Request({"type": "http", "headers": [(b"if-none-match", if_none_match.encode())]})
+
+def test_etag_matches_weak_and_lists():
+    """Test If-None-Match comparison, including ETags weakened by nginx gzip"""
+    etag = make_etag(b"lesson body")
+
+    assert etag_matches(make_request(etag), etag)
+    assert etag_matches(make_request(f'"other", W/{etag}'), etag)
+    assert etag_matches(make_request("*"), etag)
+    assert not etag_matches(make_request('"other"'), etag)
+    assert not etag_matches(make_request(etag), None)
+
+@pytest.mark.asyncio
+async def test_lesson_revalidation_returns_304(monkeypatch):
+    """Test that a current ETag gets an empty 304 and a stale one the body"""
+    monkeypatch.setattr(catalog, "_snapshot", make_snapshot(1))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'someone'})}"}
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/api/lessons/slug/variables", headers=headers)
+        etag = response.headers["ETag"]
+        assert response.headers["Cache-Control"] == http_cache.LESSON_CACHE_CONTROL
+
+        response = await client.get(
+            "/api/lessons/slug/variables",
+            headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        response = await client.get(
+            "/api/lessons/slug/variables",
+            headers={**headers, "If-None-Match": '"stale"'}
+        )
+        assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_progress_version_changes_after_bump(monkeypatch):
+    """Test that a progress write gives the user's views a new version"""
+    store = {}
+
+    async def get(key):
+        return store.get(key)
+
+    async def set(key, value, nx=False, ex=None):
+        if not (nx and key in store):
+            store[key] = value
+
+    monkeypatch.setattr(http_cache.redis_client, "get", get)
+    monkeypatch.setattr(http_cache.redis_client, "set", set)
+
+    first = await http_cache.progress_version("u1")
+    assert await http_cache.progress_version("u1") == first
+
+    await http_cache.bump_progress_version("u1")
+    assert await http_cache.progress_version("u1") != first
@@ -0,0 +1,29 @@
+"""
+Tests for time-ordered primary keys
+"""
+
+import pytest
+import uuid
+from pydantic import TypeAdapter, ValidationError
+from database.ids import EntityId, uuid7
+
+def test_uuid7_is_version_7():
+    """Test that generated ids are valid RFC 9562 version 7 UUIDs"""
+    value = uuid.UUID(uuid7())
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+def test_uuid7_is_monotonic():
+    """Test that ids from one process sort in creation order"""
+    ids = [uuid7() for _ in range(10000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+def test_entity_id_validation():
+    """Test that request ids are canonicalized and malformed ids rejected"""
+    adapter = TypeAdapter(EntityId)
+    value = uuid7()
+    assert adapter.validate_python(value.upper()) == value
+
+    with pytest.raises(ValidationError):
+        adapter.validate_python("not-a-uuid")
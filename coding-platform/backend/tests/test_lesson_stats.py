@@ -0,0 +1,77 @@
+"""
+Tests for incrementally maintained lesson statistics
+"""
+
+import pytest
+import random
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from database import lesson_stats
+from database.lesson_stats import Aggregates, normalize_error, record_graded_submission
+from database.sketches import QuantileSketch, TopK
+from models.stats import LessonStats
+
+def test_quantile_sketch_is_accurate_and_mergeable():
+    """Test that quantiles stay within the relative error and sketches merge exactly"""
+    rng = random.Random(0)
+    values = [rng.lognormvariate(-2, 1) for _ in range(10000)]
+    left, right, whole = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(values):
+        (left if i % 2 else right).add(value)
+        whole.add(value)
+
+    left.merge(right)
+    assert left.buckets == whole.buckets
+
+    exact = sorted(values)[int(0.5 * (len(values) - 1))]
+    assert abs(whole.quantile(0.5) - exact) <= QuantileSketch.ALPHA * exact
+
+    whole.subtract(right)
+    assert whole.count == len(values) // 2
+    assert QuantileSketch().quantile(0.5) is None
+
+def test_top_k_keeps_heavy_hitters():
+    """Test that frequent items survive a stream of rare ones"""
+    top = TopK(4)
+    for i in range(1000):
+        top.add("NameError" if i % 3 == 0 else f"rare {i}")
+    top.add("NameError")
+
+    [(item, count)] = top.top(1)
+    assert item == "NameError" and count >= 335
+
+    exact = TopK.from_counts(2, Counter({"a": 5, "b": 3, "c": 1}))
+    assert exact.top(5) == [("a", 5), ("b", 3)]
+
+def test_errors_are_grouped_without_literals():
+    """Test that error messages differing only in names and numbers share a key"""
+    traceback = 'Traceback (most recent call last):\n  File "main.py", line 3\nNameError: name \'total\' is not defined\n'
+    assert normalize_error(traceback) == "NameError: name '?' is not defined"
+    assert normalize_error("IndexError: list index 7 out of range") == "IndexError: list index N out of range"
+    assert normalize_error("  \n") is None
+
+@pytest.mark.asyncio
+async def test_graded_runs_update_counters(monkeypatch):
+    """Test that a learner's failing then passing runs count one first pass after two attempts"""
+    stats = LessonStats(lesson_id="l1")
+    Aggregates().apply_to(stats)
+
+    async def lock_stats(db, lesson_id):
+        return stats
+
+    monkeypatch.setattr(lesson_stats, "lock_stats", lock_stats)
+    first, second = datetime(2026, 1, 1, tzinfo=timezone.utc), datetime(2026, 1, 2, tzinfo=timezone.utc)
+
+    runs = [
+        (SimpleNamespace(attempts=1, completed_at=None, last_attempt_at=first), False, "NameError: name 'x' is not defined"),
+        (SimpleNamespace(attempts=2, completed_at=second, last_attempt_at=second), True, ""),
+        (SimpleNamespace(attempts=3, completed_at=second, last_attempt_at=first), True, ""),
+    ]
+    for progress, passed, error in runs:
+        await record_graded_submission(None, "l1", progress, passed=passed, execution_time=0.05, error=error)
+
+    assert (stats.submissions, stats.passed, stats.learners) == (3, 2, 1)
+    assert (stats.learners_passed, stats.first_pass_attempts) == (1, 2)
+    assert TopK.from_json(4, stats.top_errors).top(1) == [("NameError: name '?' is not defined", 1)]
+    assert QuantileSketch.from_json(stats.runtime_sketch).count == 3
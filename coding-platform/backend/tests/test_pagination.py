@@ -0,0 +1,70 @@
+"""
+Tests for lesson filtering and keyset pagination
+"""
+
+import json
+import pytest
+from httpx import AsyncClient
+from main import app
+from api import catalog
+from api.auth import create_access_token
+from api.catalog import build_snapshot
+from api.pagination import LessonQuery, decode_cursor, encode_cursor
+from tests.test_catalog import LESSON
+
+def numbered_lesson(i: int, **fields):
+    """The catalog test lesson with the i-th id, overriding the given fields"""
+    return LESSON.model_copy(update={"id": f"0190a0b0-0000-7000-8000-00000000000{i}", **fields})
+
+def make_lessons():
+    lessons = []
+    for i in range(5):
+        lessons.append(numbered_lesson(
+            i,
+            slug=f"lesson-{i}",
+            order=i // 2,  # Ties on order are broken by id
+            difficulty="beginner" if i < 3 else "advanced",
+            tags=["basics", "loops"] if i % 2 else ["basics"],
+        ))
+    return lessons
+
+def slugs(body: bytes) -> list:
+    return [item["slug"] for item in json.loads(body)]
+
+def test_cursor_round_trip():
+    """Test that cursors decode to the sort key they encode"""
+    cursor = encode_cursor(3, LESSON.id)
+    assert decode_cursor(cursor) == (3, LESSON.id)
+
+def test_catalog_pages_follow_cursor():
+    """Test that pages tile the filtered listing without gaps or repeats"""
+    snapshot = build_snapshot(1, make_lessons())
+
+    body, cursor = snapshot.page(LessonQuery(limit=2))
+    assert slugs(body) == ["lesson-0", "lesson-1"]
+    body, cursor = snapshot.page(LessonQuery(limit=2, after=decode_cursor(cursor)))
+    assert slugs(body) == ["lesson-2", "lesson-3"]
+    body, cursor = snapshot.page(LessonQuery(limit=2, after=decode_cursor(cursor)))
+    assert slugs(body) == ["lesson-4"]
+    assert cursor is None
+
+    body, _ = snapshot.page(LessonQuery(difficulty="beginner", tags=["loops"]))
+    assert slugs(body) == ["lesson-1"]
+
+@pytest.mark.asyncio
+async def test_lessons_endpoint_pages(monkeypatch):
+    """Test the X-Next-Cursor header and cursor validation"""
+    monkeypatch.setattr(catalog, "_snapshot", build_snapshot(1, make_lessons()))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'someone'})}"}
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/api/lessons", params={"limit": 3}, headers=headers)
+        assert slugs(response.content) == ["lesson-0", "lesson-1", "lesson-2"]
+
+        cursor = response.headers["X-Next-Cursor"]
+        response = await client.get("/api/lessons", params={"limit": 3, "cursor": cursor}, headers=headers)
+        assert slugs(response.content) == ["lesson-3", "lesson-4"]
+        assert "X-Next-Cursor" not in response.headers
+
+        response = await client.get("/api/lessons", params={"cursor": "garbage"}, headers=headers)
+        assert response.status_code == 400
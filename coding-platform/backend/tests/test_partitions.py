@@ -0,0 +1,99 @@
+"""
+Tests for monthly submission partitions and their NDJSON archives
+"""
+
+import pytest
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from database import archive, partitions
+from database.archive import decode_row, encode_row
+from database.partitions import add_months, ensure_partitions, month_start, partition_month, partition_name
+
+class FakeConnection:
+    """Sync connection recording statements; catalog queries return the given tables"""
+    def __init__(self, tables=()):
+        self.tables = tables
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        return [(name,) for name in self.tables]
+
+    async def run_sync(self, fn, *args):
+        return fn(self, *args)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+def test_month_arithmetic():
+    """Test month starts and shifts across year boundaries"""
+    assert month_start(datetime(2026, 12, 31, 23, 59, tzinfo=timezone.utc)) == date(2026, 12, 1)
+    assert add_months(date(2026, 12, 1), 1) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 10, 1), 15) == date(2028, 1, 1)
+    assert add_months(date(2026, 10, 1), -22) == date(2024, 12, 1)
+
+def test_partition_names():
+    """Test that names and months map both ways and foreign tables are ignored"""
+    assert partition_name(date(2027, 1, 1)) == "code_submissions_p2027_01"
+    assert partition_month("code_submissions_p2027_01") == date(2027, 1, 1)
+    assert partition_month("code_submissions_legacy") is None
+    assert partition_month("code_submissions_p2027_1") is None
+
+def test_ensure_partitions_rolls_over_december(monkeypatch):
+    """Test the partitions maintenance pre-creates, with bounds into the next year"""
+    monkeypatch.setattr(partitions, "month_start", lambda: date(2026, 11, 1))
+    conn = FakeConnection()
+    ensure_partitions(conn, months_ahead=2)
+
+    assert [partition_month(sql.split('"')[1]) for sql in conn.statements] == [
+        date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1)
+    ]
+    assert "FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')" in conn.statements[1]
+
+@pytest.mark.asyncio
+async def test_expired_partitions_are_archived(monkeypatch):
+    """Test that only months before the retention window are archived and detached"""
+    monkeypatch.setattr(archive, "month_start", lambda: date(2026, 10, 1))
+    monkeypatch.setattr(archive, "engine", SimpleNamespace(connect=lambda: FakeConnection([
+        "code_submissions_p2026_10",
+        "code_submissions_p2025_10",
+        "code_submissions_p2025_09",
+        "code_submissions_legacy",
+        "code_submissions_p2024_12",
+    ])))
+    archived = []
+
+    async def archive_month(month):
+        archived.append(partition_name(month))
+        return month
+
+    monkeypatch.setattr(archive, "archive_month", archive_month)
+    await archive.archive_expired_partitions(retention_months=12)
+
+    assert archived == ["code_submissions_p2024_12", "code_submissions_p2025_09"]
+
+    conn = FakeConnection()
+    partitions.drop_partition(conn, date(2025, 9, 1))
+    assert conn.statements == [
+        'ALTER TABLE code_submissions DETACH PARTITION "code_submissions_p2025_09"',
+        'DROP TABLE "code_submissions_p2025_09"',
+    ]
+
+def test_archived_rows_round_trip():
+    """Test that an archived line decodes to the values that were read"""
+    values = {
+        "id": "0190a0b0-0000-7000-8000-000000000001",
+        "code": "print('héllo')\n",
+        "code_ref": None,
+        "execution_time": 0.25,
+        "test_results": [{"test": 0, "passed": True, "time": 0.01}],
+        "created_at": datetime(2025, 12, 31, 23, 59, 59, 123456, tzinfo=timezone.utc),
+    }
+    line = encode_row(SimpleNamespace(_mapping=values))
+
+    assert "\n" not in line
+    assert decode_row(line) == values
@@ -0,0 +1,122 @@
+"""
+Tests for graded progress updates and the progress view cache
+"""
+
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException, Request, Response
+from sqlalchemy.dialects import postgresql
+from api import catalog, progress_cache
+from api.http_cache import bump_progress_version
+from api.progress import ProgressUpdate, graded_score, record_graded_attempt, update_lesson_progress
+from database.cache import redis_client
+from tests.test_catalog import make_snapshot
+
+def test_graded_score():
+    """Test that the score is the percentage of passing test cases"""
+    assert graded_score(3, 0) == 100
+    assert graded_score(1, 2) == 33
+    assert graded_score(0, 0) == 0
+
+@pytest.mark.asyncio
+async def test_graded_attempt_is_one_upsert():
+    """Test that a graded run creates or updates progress in one statement"""
+    statements = []
+
+    class Session:
+        async def execute(self, stmt):
+            statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+            raise LookupError
+
+    with pytest.raises(LookupError):
+        await record_graded_attempt(Session(), "user", "lesson", 2, 0)
+
+    [sql] = statements
+    assert "ON CONFLICT ON CONSTRAINT uq_user_progress_user_lesson DO UPDATE" in sql
+    assert "greatest(user_progress.best_score, excluded.best_score)" in sql
+    assert "RETURNING" in sql
+
+@pytest.mark.asyncio
+async def test_learners_cannot_post_scores_or_completion():
+    """Test that only graded runs (or an admin) set scores and completion"""
+    learner = SimpleNamespace(id="user", is_admin=False)
+    for update in (ProgressUpdate(lesson_id="lesson", score=100), ProgressUpdate(lesson_id="lesson", is_completed=True)):
+        with pytest.raises(HTTPException) as exc_info:
+            await update_lesson_progress("lesson", update, learner, None)
+        assert exc_info.value.status_code == 403
+
+@pytest.mark.asyncio
+async def test_posted_progress_is_an_upsert_without_an_attempt():
+    """Test that starting a lesson upserts the row and leaves attempts to graded runs"""
+    statements = []
+
+    class Session:
+        async def execute(self, stmt):
+            compiled = stmt.compile(dialect=postgresql.dialect())
+            statements.append(compiled)
+            if len(statements) == 1:
+                return SimpleNamespace(scalar_one_or_none=lambda: "lesson")
+            raise LookupError
+
+    learner = SimpleNamespace(id="user", is_admin=False)
+    with pytest.raises(LookupError):
+        await update_lesson_progress("lesson", ProgressUpdate(lesson_id="lesson"), learner, Session())
+
+    upsert = statements[1]
+    assert "ON CONFLICT ON CONSTRAINT uq_user_progress_user_lesson DO UPDATE" in str(upsert)
+    assert upsert.params["attempts"] == 0
+    assert upsert.params["last_attempt_at"] is None
+
+@pytest.mark.asyncio
+async def test_progress_views_are_cached_until_a_write(monkeypatch):
+    """Test that a repeat read is served from the cache and a write evicts it"""
+    store = {}
+
+    async def get(key):
+        return store.get(key)
+
+    async def set(key, value, nx=False, ex=None, px=None):
+        if nx and key in store:
+            return None
+        store[key] = value
+        return True
+
+    async def delete(key):
+        store.pop(key, None)
+
+    async def hget(key, field):
+        return store.get(key, {}).get(field)
+
+    async def store_view_script(keys, args):
+        version_key, views_key = keys
+        version, view, entry, ttl = args
+        if store.get(version_key) == version:
+            store.setdefault(views_key, {})[view] = entry
+
+    for name, fake in (("get", get), ("set", set), ("delete", delete), ("hget", hget)):
+        monkeypatch.setattr(redis_client, name, fake)
+    monkeypatch.setattr(progress_cache, "store_view_script", store_view_script)
+    monkeypatch.setattr(catalog, "_snapshot", make_snapshot(1))
+
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return {"attempts": len(builds)}, {"X-Next-Cursor": "abc"}
+
+    request = Request({"type": "http", "headers": []})
+
+    async def read():
+        return await progress_cache.cached_progress_view(request, Response(), "u1", "overview", build)
+
+    first = await read()
+    second = await read()
+    assert len(builds) == 1
+    assert second.body == first.body == b'{"attempts":1}'
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.headers["x-next-cursor"] == "abc"
+
+    await bump_progress_version("u1")
+    third = await read()
+    assert len(builds) == 2
+    assert third.headers["etag"] != first.headers["etag"]
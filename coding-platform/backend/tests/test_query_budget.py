@@ -0,0 +1,221 @@
+"""
+SQL round-trip budgets for hot endpoints
+A new refresh(), extra existence check or N+1 pattern fails these tests
+"""
+
+import pytest
+import re
+import uuid
+from contextlib import contextmanager
+from httpx import AsyncClient
+from sqlalchemy import create_engine, event, select, text
+from main import app
+from api import code_execution
+from api.catalog import get_catalog, load_snapshot
+from database import connection
+from database.connection import AsyncSessionLocal
+from database.query_stats import track_queries
+from database.versions import new_version
+from models.lesson import Lesson
+
+# Test data
+BUDGET_USER = {
+    "email": "budget@example.com",
+    "username": "budgetuser",
+    "password": "budgetpassword123",
+    "full_name": "Budget User"
+}
+
+# Read endpoints: (path, queries, round_trips). Read-only sessions run in
+# autocommit mode, so their queries are their only round trips. Lessons
+# come from the in-memory catalog once it is loaded.
+READ_BUDGETS = [
+    ("/api/auth/me", 1, 3),
+    ("/api/lessons", 0, 0),
+    ("/api/progress/overview", 3, 3),
+    ("/api/progress/lessons", 2, 2),
+]
+
+# Lesson columns that list paths must not read
+HEAVY_COLUMN_RE = re.compile(r"\blessons\.(content|starter_code|solution_code|test_cases)\b")
+
+@contextmanager
+def capture_statements():
+    """SQL sent on the primary and read engines inside the block"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = [connection.engine.sync_engine, connection.primary_read_engine.sync_engine]
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+
+def test_query_stats_counts_statements():
+    """Test that engine events count queries, rows and transactions"""
+    engine = create_engine("sqlite://")
+
+    with track_queries() as stats:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            conn.execute(text("INSERT INTO t VALUES (1), (2)"))
+            conn.execute(text("SELECT x FROM t")).all()
+
+    assert stats.queries == 3
+    # BEGIN + 3 statements + COMMIT
+    assert stats.round_trips == 5
+    assert stats.connections == 1
+
+    # Nothing is recorded outside a tracked block
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert stats.queries == 3
+
+async def get_budget_token(client: AsyncClient) -> str:
+    """Register (or log in) the budget test user"""
+    response = await client.post("/api/auth/register", json=BUDGET_USER)
+    if response.status_code != 201:
+        response = await client.post(
+            "/api/auth/login",
+            data={"username": BUDGET_USER["username"], "password": BUDGET_USER["password"]}
+        )
+    return response.json()["access_token"]
+
+@pytest.mark.asyncio
+async def test_register_query_budget(query_budget):
+    """Test registration: one INSERT ... RETURNING and its commit"""
+    suffix = uuid.uuid4().hex[:8]
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        with query_budget(queries=1, round_trips=3):
+            response = await client.post("/api/auth/register", json={
+                "email": f"budget_{suffix}@example.com",
+                "username": f"budget_{suffix}",
+                "password": "budgetpassword123"
+            })
+        assert response.status_code == 201
+
+@pytest.mark.asyncio
+async def test_login_query_budget(query_budget):
+    """Test login: user lookup, last_login update and one commit"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await get_budget_token(client)
+
+        with query_budget(queries=2, round_trips=4):
+            response = await client.post(
+                "/api/auth/login",
+                data={"username": BUDGET_USER["username"], "password": BUDGET_USER["password"]}
+            )
+        assert response.status_code == 200
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path,queries,round_trips", READ_BUDGETS)
+async def test_read_endpoint_query_budget(query_budget, path, queries, round_trips):
+    """Test read endpoints stay within their query budget"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        headers = {"Authorization": f"Bearer {await get_budget_token(client)}"}
+        await get_catalog()
+
+        with query_budget(queries=queries, round_trips=round_trips):
+            response = await client.get(path, headers=headers)
+        assert response.status_code == 200
+
+async def create_budget_lesson() -> str:
+    """A lesson with one test case, inserted with its first version"""
+    suffix = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        lesson = Lesson(
+            title=f"Budget {suffix}",
+            slug=f"budget-{suffix}",
+            description=None,
+            content="# Budget",
+            starter_code="",
+            test_cases=[{"input": "", "expected_output": "ok"}],
+            language="python",
+            content_html=None,
+            content_gzip=None,
+            content_br=None,
+        )
+        db.add(lesson)
+        await db.flush()
+        db.add(new_version(lesson))
+        await db.commit()
+        return lesson.id
+
+@pytest.fixture
+def fake_piston(monkeypatch):
+    """Run code without the execution engine"""
+    async def execute(code, language, stdin=""):
+        return {"output": "ok", "error": "", "execution_time": 0.01, "exit_code": 0, "status": "success"}
+
+    async def run_tests(code, language, test_cases):
+        return [{"test": 1, "passed": True, "output": "ok", "error": "", "time": 0.01} for _ in test_cases]
+
+    monkeypatch.setattr(code_execution, "execute_code_on_piston", execute)
+    monkeypatch.setattr(code_execution, "run_test_cases", run_tests)
+
+@pytest.mark.asyncio
+async def test_execute_query_budget(query_budget, fake_piston):
+    """Test code execution: user lookup, then the submission insert and user update in one commit"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        headers = {"Authorization": f"Bearer {await get_budget_token(client)}"}
+
+        with query_budget(queries=3, round_trips=5):
+            response = await client.post("/api/code/execute", headers=headers, json={"code": "print('ok')"})
+        assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_graded_execute_query_budget(query_budget, fake_piston):
+    """Test a graded run: adds the lesson lookup, progress upsert and stats row update"""
+    lesson_id = await create_budget_lesson()
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        headers = {"Authorization": f"Bearer {await get_budget_token(client)}"}
+        run = {"code": "print('ok')", "lesson_id": lesson_id}
+
+        # The first graded run also creates the lesson's stats row
+        response = await client.post("/api/code/execute", headers=headers, json=run)
+        assert response.status_code == 200
+
+        with query_budget(queries=7, round_trips=9):
+            response = await client.post("/api/code/execute", headers=headers, json=run)
+        assert response.status_code == 200
+        assert response.json()["progress"]["attempts"] == 2
+
+@pytest.mark.asyncio
+async def test_progress_write_query_budget(query_budget):
+    """Test starting a lesson: user lookup, lesson check and one upsert returning the row"""
+    lesson_id = await create_budget_lesson()
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        headers = {"Authorization": f"Bearer {await get_budget_token(client)}"}
+
+        with query_budget(queries=3, round_trips=5):
+            response = await client.post(
+                f"/api/progress/lesson/{lesson_id}", headers=headers, json={"lesson_id": lesson_id}
+            )
+        assert response.status_code == 200
+        assert response.json()["attempts"] == 0
+
+def test_lesson_entity_select_defers_heavy_columns():
+    """Test that loading Lesson rows leaves the body and solution columns unread"""
+    assert not HEAVY_COLUMN_RE.search(str(select(Lesson)))
+
+@pytest.mark.asyncio
+async def test_list_paths_skip_heavy_columns():
+    """Test that progress listings read no lesson bodies and the catalog never reads solutions"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        headers = {"Authorization": f"Bearer {await get_budget_token(client)}"}
+        await get_catalog()
+
+        with capture_statements() as statements:
+            response = await client.get("/api/progress/lessons", headers=headers)
+        assert response.status_code == 200
+        assert statements
+        assert not any(HEAVY_COLUMN_RE.search(sql) for sql in statements)
+
+    with capture_statements() as statements:
+        await load_snapshot(0)
+    assert not any("solution_code" in sql for sql in statements)
@@ -0,0 +1,43 @@
+"""
+Tests for execution-time quota accounting
+"""
+
+import pytest
+from fastapi import HTTPException
+from api import quotas
+from api.quotas import QUOTA_BUCKETS, QuotaCheck, Rate, summarize
+
+RATE = Rate(60, 120)  # 60 sandbox seconds per 2 minutes, 10 s buckets
+
+def test_summarize_under_limit():
+    """Test that usage sums the window and low budgets disable tests"""
+    buckets = list(range(QUOTA_BUCKETS))
+    usage = summarize("user", "u1", RATE, buckets, [None] * 11 + ["50.5"], now=115.0)
+
+    assert usage.used == 50.5
+    assert not usage.exhausted
+    assert usage.low
+    assert not QuotaCheck([usage]).run_tests
+
+def test_summarize_retry_after_oldest_buckets_expire():
+    """Test that Retry-After waits for enough old buckets to roll off"""
+    buckets = list(range(QUOTA_BUCKETS))
+    values = ["30", "0", "25"] + [None] * 8 + ["10"]
+    usage = summarize("user", "u1", RATE, buckets, values, now=115.0)
+
+    assert usage.exhausted
+    # Dropping bucket 0 leaves 35 s < 60 s; it leaves the window at 120 s
+    assert usage.retry_after == 5
+
+@pytest.mark.asyncio
+async def test_exhausted_quota_is_rejected(monkeypatch):
+    """Test that an exhausted budget rejects execution with 429"""
+    async def mget(keys):
+        return [str(quotas.EXECUTION_QUOTA_USER.count)] + [None] * (len(keys) - 1)
+
+    monkeypatch.setattr(quotas.redis_client, "mget", mget)
+    user = type("User", (), {"id": "u1", "organization": None})()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await quotas.check_execution_quota(user)
+    assert exc_info.value.status_code == 429
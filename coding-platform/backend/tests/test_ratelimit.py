@@ -0,0 +1,91 @@
+"""
+Tests for the Redis rate limiter dependency
+"""
+
+import pytest
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+from api import ratelimit
+from api.ratelimit import Rate, RateLimit, parse_rate
+
+def make_request() -> Request:
+    return Request({"type": "http", "headers": [], "client": ("203.0.113.7", 5000)})
+
+def test_parse_rate():
+    """Test limit specs from the environment"""
+    assert parse_rate("10/minute") == Rate(10, 60)
+    assert parse_rate(" 5 / second ") == Rate(5, 1)
+
+    with pytest.raises(ValueError):
+        parse_rate("10 per minute")
+
+@pytest.mark.asyncio
+async def test_allowed_request_gets_headers(monkeypatch):
+    """Test that allowed requests carry the standard rate limit headers"""
+    calls = []
+
+    async def bucket(keys, args):
+        calls.append(keys)
+        return [1, 4, 0, 12000]
+
+    monkeypatch.setattr(ratelimit, "token_bucket", bucket)
+    response = Response()
+    await RateLimit("test", "5/minute")(make_request(), response)
+
+    assert calls == [["ratelimit:test:ip:203.0.113.7"]]
+    assert response.headers["X-RateLimit-Limit"] == "5"
+    assert response.headers["X-RateLimit-Remaining"] == "4"
+    assert response.headers["X-RateLimit-Reset"] == "12"
+
+@pytest.mark.asyncio
+async def test_exhausted_bucket_returns_429(monkeypatch):
+    """Test that an empty bucket is rejected with Retry-After"""
+    async def bucket(keys, args):
+        return [0, 0, 1500, 60000]
+
+    monkeypatch.setattr(ratelimit, "token_bucket", bucket)
+    with pytest.raises(HTTPException) as exc_info:
+        await RateLimit("test", "5/minute")(make_request(), Response())
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers["Retry-After"] == "2"
+
+@pytest.mark.asyncio
+async def test_redis_failure_fails_open(monkeypatch):
+    """Test that requests are allowed when Redis is unavailable"""
+    async def bucket(keys, args):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(ratelimit, "token_bucket", bucket)
+    response = Response()
+    await RateLimit("test", "5/minute")(make_request(), response)
+
+    assert "X-RateLimit-Limit" not in response.headers
+
+@pytest.mark.asyncio
+async def test_clients_behind_nginx_get_their_own_bucket(monkeypatch):
+    """Test that requests relayed by the trusted proxy are keyed on the forwarded client"""
+    calls = []
+
+    async def bucket(keys, args):
+        calls.append(keys[0])
+        return [1, 4, 0, 12000]
+
+    monkeypatch.setattr(ratelimit, "token_bucket", bucket)
+    limit = RateLimit("test", "5/minute")
+
+    async def app(scope, receive, send):
+        await limit(Request(scope), Response())
+
+    # nginx's pinned address, the docker-compose FORWARDED_ALLOW_IPS default
+    proxied = ProxyHeadersMiddleware(app, trusted_hosts="172.25.0.10")
+    for forwarded_for in (b"198.51.100.1", b"203.0.113.9, 198.51.100.2"):
+        scope = {
+            "type": "http",
+            "headers": [(b"x-forwarded-for", forwarded_for)],
+            "client": ("172.25.0.10", 40000),
+        }
+        await proxied(scope, None, None)
+
+    assert calls == ["ratelimit:test:ip:198.51.100.1", "ratelimit:test:ip:198.51.100.2"]
@@ -0,0 +1,73 @@
+"""
+Tests for read-only session routing across replicas and the primary
+"""
+
+import itertools
+import pytest
+from sqlalchemy import false, update
+from starlette.requests import Request
+from api.auth import create_access_token
+from database import connection
+from database.cache import redis_client
+from database.connection import AsyncSessionLocal, DATABASE_URL, create_read_engine, open_read_session, read_engines
+from models.user import User
+
+USER_ID = "0190a0b0-0000-7000-8000-00000000dddd"
+
+def make_request(user_id=None) -> Request:
+    headers = []
+    if user_id:
+        headers.append((b"authorization", f"Bearer {create_access_token({'sub': user_id})}".encode()))
+    return Request({"type": "http", "headers": headers})
+
+def use_replicas(monkeypatch, replicas):
+    monkeypatch.setattr(connection, "replica_engines", replicas)
+    monkeypatch.setattr(connection, "_replica_order", itertools.cycle(range(len(replicas))))
+    monkeypatch.setattr(connection, "_replica_down_until", {})
+
+@pytest.mark.asyncio
+async def test_down_replica_is_skipped(monkeypatch):
+    """Test that an unreachable replica is passed over and then left alone"""
+    down = create_read_engine("postgresql+asyncpg://nobody@127.0.0.1:1/none")
+    up = create_read_engine(DATABASE_URL)
+    use_replicas(monkeypatch, [down, up])
+
+    session = await open_read_session(make_request())
+    try:
+        assert session.bind is up
+    finally:
+        await session.close()
+
+    # Marked down for REPLICA_RETRY_SECONDS: not even tried
+    assert 0 in connection._replica_down_until
+    assert await read_engines(make_request()) == [up, connection.primary_read_engine]
+    await up.dispose()
+
+@pytest.mark.asyncio
+async def test_writer_reads_from_primary_until_marker_expires(monkeypatch):
+    """Test read-your-writes routing after a committed write"""
+    markers = {}
+
+    async def set(key, value, ex=None):
+        markers[key] = ex
+
+    async def exists(key):
+        return int(key in markers)
+
+    monkeypatch.setattr(redis_client, "set", set)
+    monkeypatch.setattr(redis_client, "exists", exists)
+    replica = object()
+    use_replicas(monkeypatch, [replica])
+
+    async with AsyncSessionLocal() as db:
+        db.info["user_id"] = USER_ID
+        await db.execute(update(User).where(false()).values(is_active=True))
+        await db.commit()
+
+    assert markers == {f"ryw:{USER_ID}": connection.READ_YOUR_WRITES_SECONDS}
+    assert await read_engines(make_request(USER_ID)) == [connection.primary_read_engine]
+    assert (await read_engines(make_request("someone-else")))[0] is replica
+
+    # The marker's TTL runs out
+    markers.clear()
+    assert (await read_engines(make_request(USER_ID)))[0] is replica
@@ -0,0 +1,64 @@
+"""
+Tests for write-time lesson rendering and precompressed content
+"""
+
+import brotli
+import gzip
+import pytest
+from httpx import AsyncClient
+from main import app
+from api import catalog
+from api.auth import create_access_token
+from api.http_cache import negotiate_encoding
+from database.rendering import render_content
+from models.lesson import Lesson
+from tests.test_catalog import LESSON, make_snapshot
+
+def test_render_sanitizes_and_highlights():
+    """Test that scripts are stripped and code blocks carry Pygments classes"""
+    html, gzipped, brotlied = render_content(
+        "# Title <script>alert(1)</script>\n\n```python\nprint('hi')\n```\n"
+    )
+
+    assert "<script" not in html
+    assert '<div class="highlight">' in html
+    assert '<span class="nb">print</span>' in html
+    assert gzip.decompress(gzipped).decode() == html
+    assert brotli.decompress(brotlied).decode() == html
+
+def test_model_renders_on_content_write():
+    """Test that assigning content keeps the rendered columns in sync"""
+    lesson = Lesson(title="T", slug="t", content="first")
+    assert "first" in lesson.content_html
+
+    lesson.content = "second"
+    assert "second" in lesson.content_html
+    assert gzip.decompress(lesson.content_gzip).decode() == lesson.content_html
+
+def test_negotiate_encoding():
+    """Test Accept-Encoding preference and q=0 exclusions"""
+    available = {"identity": b"", "gzip": b"", "br": b""}
+
+    assert negotiate_encoding("gzip, deflate, br", available) == "br"
+    assert negotiate_encoding("br;q=0, gzip", available) == "gzip"
+    assert negotiate_encoding("gzip", {"identity": b"", "gzip": b""}) == "gzip"
+    assert negotiate_encoding(None, available) == "identity"
+
+@pytest.mark.asyncio
+async def test_content_served_precompressed(monkeypatch):
+    """Test that the stored encoding is sent byte-for-byte"""
+    snapshot = make_snapshot(1)
+    monkeypatch.setattr(catalog, "_snapshot", snapshot)
+    content = snapshot.contents[LESSON.id]
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'someone'})}"}
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get(
+            f"/api/lessons/{LESSON.id}/content",
+            headers={**headers, "Accept-Encoding": "br"}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.headers["ETag"] == content.etags["br"]
+    assert response.text == content.encodings["identity"].decode()
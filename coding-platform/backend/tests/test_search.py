@@ -0,0 +1,60 @@
+"""
+Tests for lesson search
+"""
+
+import pytest
+from httpx import AsyncClient
+from main import app
+from api import catalog, lessons
+from api.auth import create_access_token
+from api.catalog import build_snapshot
+from tests.test_pagination import numbered_lesson, slugs
+
+def make_lessons():
+    fields = [
+        ("Loops", "Repeat work with for and while", ["control-flow"], "A loop runs a block again."),
+        ("Functions", "Reusable blocks", ["basics"], "Functions can call a loop too."),
+        ("Dictionaries", "Key lookups", ["data-structures"], "Nothing about iteration here."),
+    ]
+    return [
+        numbered_lesson(i, slug=title.lower(), title=title, description=description, tags=tags, content=content, order=i)
+        for i, (title, description, tags, content) in enumerate(fields)
+    ]
+
+def test_index_ranks_title_above_content():
+    """Test that a title match outranks a content match and prefixes match"""
+    snapshot = build_snapshot(1, make_lessons())
+
+    assert slugs(snapshot.search("loop", 10)) == ["loops", "functions"]
+    assert slugs(snapshot.search("dict", 10)) == ["dictionaries"]
+    assert slugs(snapshot.search("loop block", 10)) == ["loops", "functions"]
+    assert slugs(snapshot.search("loop lookups", 10)) == []
+    assert slugs(snapshot.search("loop", 1)) == ["loops"]
+    assert slugs(snapshot.search("recursion", 10)) == []
+    assert slugs(snapshot.search("loop recursion", 10)) == []
+
+def test_select_keeps_database_order():
+    """Test that database results are returned in rank order, minus unknown ids"""
+    snapshot = build_snapshot(1, make_lessons())
+    ids = ["0190a0b0-0000-7000-8000-000000000002", "missing", "0190a0b0-0000-7000-8000-000000000000"]
+
+    assert slugs(snapshot.select(ids)) == ["dictionaries", "loops"]
+
+@pytest.mark.asyncio
+async def test_search_falls_back_to_catalog(monkeypatch):
+    """Test that the endpoint answers from the catalog when the database search fails"""
+    async def search_lesson_ids(db, text, limit):
+        raise OSError("database down")
+
+    monkeypatch.setattr(lessons, "search_lesson_ids", search_lesson_ids)
+    monkeypatch.setattr(lessons, "LESSON_SEARCH_BACKEND", "postgres")
+    monkeypatch.setattr(catalog, "_snapshot", build_snapshot(1, make_lessons()))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'someone'})}"}
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/api/lessons/search", params={"q": "loop"}, headers=headers)
+        assert response.status_code == 200
+        assert [item["slug"] for item in response.json()] == ["loops", "functions"]
+
+        response = await client.get("/api/lessons/search", params={"q": ""}, headers=headers)
+        assert response.status_code == 422
@@ -0,0 +1,31 @@
+"""
+Tests for the orjson response path
+"""
+
+import json
+from datetime import datetime, timezone
+from fastapi import Response
+from api.lessons import LessonListItem
+from api.serialization import dump_json, json_response
+from tests.test_catalog import LESSON
+
+def test_dump_json_matches_pydantic():
+    """Test that orjson output decodes to the same data as Pydantic's JSON"""
+    item = LessonListItem.model_validate(LESSON)
+    assert json.loads(dump_json([item])) == [json.loads(item.model_dump_json())]
+
+    stamped = LESSON.model_copy(update={"created_at": datetime(2026, 1, 1, tzinfo=timezone.utc)})
+    assert json.loads(dump_json(stamped))["created_at"] == json.loads(stamped.model_dump_json())["created_at"]
+
+def test_json_response_keeps_dependency_headers():
+    """Test that headers set on the injected response survive"""
+    injected = Response()
+    injected.headers["X-RateLimit-Remaining"] = "4"
+
+    response = json_response(b'{"ok":true}', injected, status_code=201)
+
+    assert response.status_code == 201
+    assert response.body == b'{"ok":true}'
+    assert response.headers["X-RateLimit-Remaining"] == "4"
+    assert response.headers["content-length"] == "11"
+    assert response.media_type == "application/json"
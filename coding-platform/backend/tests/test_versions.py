@@ -0,0 +1,45 @@
+"""
+Tests for immutable lesson versions
+"""
+
+import pytest
+from collections import OrderedDict
+from httpx import AsyncClient
+from main import app
+from api import versions
+from api.auth import create_access_token
+from api.catalog import rendered_content
+from api.versions import VersionEntry, version_etag
+from database.versions import version_hash
+from tests.test_catalog import LESSON
+
+def test_only_content_changes_make_versions():
+    """Test that metadata edits keep the version hash and content edits change it"""
+    values = LESSON.model_dump()
+
+    assert version_hash({**values, "order": 7, "tags": ["other"]}) == version_hash(values)
+    assert version_hash({**values, "content": "# Changed"}) != version_hash(values)
+    assert version_hash({**values, "test_cases": [{"input": "", "expected_output": "1"}]}) != version_hash(values)
+
+@pytest.mark.asyncio
+async def test_versioned_urls_are_immutable(monkeypatch):
+    """Test that versions are served immutable and revalidated without a lookup"""
+    entry = VersionEntry(body=b'{"number":1}', content=rendered_content(LESSON))
+    monkeypatch.setattr(versions, "_cache", OrderedDict({(LESSON.id, 1): entry}))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'someone'})}"}
+    path = f"/api/lessons/{LESSON.id}/versions/1"
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get(path, headers=headers)
+        assert response.status_code == 200
+        assert response.content == entry.body
+        assert "immutable" in response.headers["cache-control"]
+
+        response = await client.get(f"{path}/content", headers={**headers, "Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"] == version_etag(LESSON.id, 1, "gzip")
+
+        # Not in the cache, and no database: only the ETag can answer this
+        etag = version_etag(LESSON.id, 2)
+        response = await client.get(f"/api/lessons/{LESSON.id}/versions/2", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
@@ -2,24 +2,29 @@
  * LessonViewer component to display lesson content
  */
 
-import { useMemo } from 'react'
-import MarkdownIt from 'markdown-it'
-import DOMPurify from 'isomorphic-dompurify'
+import { useEffect, useState } from 'react'
+import { getLessonContent } from '../utils/api'
 import styles from '../styles/LessonViewer.module.css'
 
-const md = new MarkdownIt({
-  html: false, // Disable HTML tags in source
-  linkify: true,
-  typographer: true,
-  breaks: true,
-})
+export default function LessonViewer({ lesson, html }) {
+  // The API renders and sanitizes lesson HTML once at write time and
+  // serves it precompressed, so there is nothing to parse here; pages
+  // that already have it from the bootstrap pass it in as html
+  const [fetchedHtml, setFetchedHtml] = useState('')
+  const htmlContent = html ?? fetchedHtml
 
-export default function LessonViewer({ lesson }) {
-  const htmlContent = useMemo(() => {
-    if (!lesson.content) return ''
-    const rendered = md.render(lesson.content)
-    return DOMPurify.sanitize(rendered)
-  }, [lesson.content])
+  useEffect(() => {
+    if (html != null) return undefined
+    let cancelled = false
+    getLessonContent(lesson.id, lesson.version)
+      .then((content) => {
+        if (!cancelled) setFetchedHtml(content)
+      })
+      .catch((error) => console.error('Failed to load lesson content:', error))
+    return () => {
+      cancelled = true
+    }
+  }, [lesson.id, lesson.version, html])
 
   return (
     <div className={styles.container}>
@@ -11,7 +11,7 @@ import styles from '../../styles/Lesson.module.css'
 import CodeEditor from '../../components/CodeEditor'
 import OutputConsole from '../../components/OutputConsole'
 import LessonViewer from '../../components/LessonViewer'
-import { getLessonBySlug, executeCode, updateProgress } from '../../utils/api'
+import { getLessonBootstrap, executeCode } from '../../utils/api'
 import { getToken, removeToken } from '../../utils/auth'
 
 export default function LessonPage() {
@@ -19,6 +19,8 @@ export default function LessonPage() {
   const { slug } = router.query
 
   const [lesson, setLesson] = useState(null)
+  const [contentHtml, setContentHtml] = useState(null)
+  const [progress, setProgress] = useState(null)
   const [code, setCode] = useState('')
   const [output, setOutput] = useState(null)
   const [isExecuting, setIsExecuting] = useState(false)
@@ -40,9 +42,13 @@ export default function LessonPage() {
 
   const loadLesson = async () => {
     try {
-      const data = await getLessonBySlug(slug)
-      setLesson(data)
-      setCode(data.starter_code || '# Write your code here\n')
+      const { lesson, content_html, progress, latest_submission } = await getLessonBootstrap(slug)
+      setLesson(lesson)
+      setContentHtml(content_html)
+      setProgress(progress)
+      // Pick up where the learner left off, unless the lesson changed since
+      const resume = latest_submission?.code && latest_submission.lesson_version === lesson.version
+      setCode(resume ? latest_submission.code : lesson.starter_code || '# Write your code here\n')
     } catch (error) {
       console.error('Failed to load lesson:', error)
       if (error.response?.status === 401) {
@@ -86,17 +92,12 @@ export default function LessonPage() {
       if (result.test_results) {
         setTestResults(result.test_results)
 
-        // Calculate score
+        // The server scores graded runs and returns the updated progress
         const passed = result.test_results.filter(t => t.passed).length
         const total = result.test_results.length
-        const score = Math.round((passed / total) * 100)
-
-        // Update progress
-        await updateProgress(lesson.id, {
-          lesson_id: lesson.id,
-          is_completed: passed === total,
-          score: score
-        })
+        if (result.progress) {
+          setProgress(result.progress)
+        }
 
         if (passed === total) {
           toast.success('🎉 All tests passed! Lesson completed!')
@@ -155,12 +156,17 @@ export default function LessonPage() {
           <h1>{lesson.title}</h1>
           <div className={styles.headerActions}>
             <span className={styles.difficulty}>{lesson.difficulty}</span>
+            {progress && (
+              <span className={styles.difficulty}>
+                {progress.is_completed ? '✓ Completed' : `Best: ${progress.best_score}%`}
+              </span>
+            )}
           </div>
         </header>
 
         <div className={styles.layout}>
           <div className={styles.leftPanel}>
-            <LessonViewer lesson={lesson} />
+            <LessonViewer lesson={lesson} html={contentHtml} />
           </div>
 
           <div className={styles.rightPanel}>
@@ -8,14 +8,29 @@ import Head from 'next/head'
 import Link from 'next/link'
 import { toast } from 'react-hot-toast'
 import styles from '../../styles/Lessons.module.css'
-import { getLessonsWithProgress } from '../../utils/api'
+import { getLessonsWithProgress, searchLessons, subscribeToProgress } from '../../utils/api'
 import { getToken, removeToken } from '../../utils/auth'
 
+const computeStats = (data) => {
+  const completed = data.filter(l => l.is_completed).length
+  const total = data.length
+  const avgScore = data.reduce((sum, l) => sum + l.best_score, 0) / (total || 1)
+
+  return {
+    completed,
+    total,
+    inProgress: data.filter(l => l.attempts > 0 && !l.is_completed).length,
+    avgScore: Math.round(avgScore)
+  }
+}
+
 export default function Lessons() {
   const router = useRouter()
   const [lessons, setLessons] = useState([])
   const [isLoading, setIsLoading] = useState(true)
   const [stats, setStats] = useState(null)
+  const [query, setQuery] = useState('')
+  const [results, setResults] = useState(null)  // Ranked lesson ids, or null when not searching
 
   useEffect(() => {
     // Check if user is logged in
@@ -26,24 +41,55 @@ export default function Lessons() {
     }
 
     loadLessons()
+
+    // Progress made in other tabs or devices is pushed instead of polled
+    return subscribeToProgress((type, event) => {
+      if (type === 'resync') {
+        loadLessons()
+      } else if (type === 'progress') {
+        setLessons(current => {
+          const updated = current.map(l => l.lesson_id !== event.lesson_id ? l : {
+            ...l,
+            is_completed: event.progress?.is_completed ?? false,
+            attempts: event.progress?.attempts ?? 0,
+            best_score: event.progress?.best_score ?? 0,
+            progress_id: event.progress?.id ?? null
+          })
+          setStats(computeStats(updated))
+          return updated
+        })
+      }
+    })
   }, [router])
 
+  useEffect(() => {
+    const q = query.trim()
+    if (!q) {
+      setResults(null)
+      return
+    }
+
+    // Debounced so typing does not send a request per keystroke
+    let cancelled = false
+    const timer = setTimeout(async () => {
+      try {
+        const found = await searchLessons(q, 100)
+        if (!cancelled) setResults(found.map(l => l.id))
+      } catch (error) {
+        console.error('Search failed:', error)
+      }
+    }, 200)
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [query])
+
   const loadLessons = async () => {
     try {
       const data = await getLessonsWithProgress()
       setLessons(data)
-
-      // Calculate stats
-      const completed = data.filter(l => l.is_completed).length
-      const total = data.length
-      const avgScore = data.reduce((sum, l) => sum + l.best_score, 0) / (total || 1)
-
-      setStats({
-        completed,
-        total,
-        inProgress: data.filter(l => l.attempts > 0 && !l.is_completed).length,
-        avgScore: Math.round(avgScore)
-      })
+      setStats(computeStats(data))
     } catch (error) {
       console.error('Failed to load lessons:', error)
       if (error.response?.status === 401) {
@@ -71,6 +117,11 @@ export default function Lessons() {
     }
   }
 
+  const byId = new Map(lessons.map(l => [l.lesson_id, l]))
+  const visibleLessons = results
+    ? results.map(id => byId.get(id)).filter(Boolean)
+    : lessons
+
   if (isLoading) {
     return (
       <div className={styles.loading}>
@@ -118,13 +169,21 @@ export default function Lessons() {
         <div className={styles.lessonsSection}>
           <h2>Available Lessons</h2>
 
-          {lessons.length === 0 ? (
+          <input
+            type="search"
+            className={styles.searchInput}
+            placeholder="Search lessons..."
+            value={query}
+            onChange={(e) => setQuery(e.target.value)}
+          />
+
+          {visibleLessons.length === 0 ? (
             <div className={styles.emptyState}>
-              <p>No lessons available yet. Check back soon!</p>
+              <p>{results ? 'No lessons match your search.' : 'No lessons available yet. Check back soon!'}</p>
             </div>
           ) : (
             <div className={styles.lessonsGrid}>
-              {lessons.map((lesson) => (
+              {visibleLessons.map((lesson) => (
                 <Link
                   key={lesson.lesson_id}
                   href={`/lessons/${lesson.lesson_slug}`}
@@ -54,8 +54,21 @@ export const verifyToken = async () => {
 }
 
 // Lessons
-export const getLessons = async () => {
-  const response = await api.get('/api/lessons')
+export const getLessons = async (params = {}) => {
+  // One page; pass response.headers['x-next-cursor'] back as params.cursor
+  const response = await api.get('/api/lessons', { params })
+  return { lessons: response.data, nextCursor: response.headers['x-next-cursor'] || null }
+}
+
+export const searchLessons = async (q, limit = 20) => {
+  // Ranked best first, so the order of the result matters
+  const response = await api.get('/api/lessons/search', { params: { q, limit } })
+  return response.data
+}
+
+export const getLessonBootstrap = async (slug) => {
+  // { lesson, content_html, progress, latest_submission } for the lesson page in one call
+  const response = await api.get(`/api/lessons/slug/${slug}/bootstrap`)
   return response.data
 }
 
@@ -69,6 +82,16 @@ export const getLessonById = async (id) => {
   return response.data
 }
 
+export const getLessonContent = async (id, version) => {
+  // Rendered HTML; the browser decodes the br/gzip body itself. A versioned
+  // URL never changes, so the browser serves repeat visits from its cache
+  const path = version ? `/api/lessons/${id}/versions/${version}/content` : `/api/lessons/${id}/content`
+  const response = await api.get(path, {
+    responseType: 'text',
+  })
+  return response.data
+}
+
 // Code Execution
 export const executeCode = async (codeData) => {
   const response = await api.post('/api/code/execute', codeData)
@@ -98,9 +121,18 @@ export const getProgressOverview = async () => {
   return response.data
 }
 
-export const getLessonsWithProgress = async () => {
-  const response = await api.get('/api/progress/lessons')
-  return response.data
+export const getLessonsWithProgress = async (filters = {}) => {
+  // Pages are keyset-paginated; follow X-Next-Cursor until the last one
+  const lessons = []
+  let cursor = null
+  do {
+    const response = await api.get('/api/progress/lessons', {
+      params: { ...filters, ...(cursor ? { cursor } : {}) },
+    })
+    lessons.push(...response.data)
+    cursor = response.headers['x-next-cursor']
+  } while (cursor)
+  return lessons
 }
 
 export const getLessonProgress = async (lessonId) => {
@@ -118,4 +150,57 @@ export const resetProgress = async (lessonId) => {
   return response.data
 }
 
+// Live events: a server-sent event stream read with fetch, which unlike
+// EventSource can send the Authorization header. Calls onEvent(type, data)
+// per event and reconnects until the returned function is called.
+export const subscribeToEvents = (path, onEvent) => {
+  const controller = new AbortController()
+  let retryMs = 5000
+
+  const dispatch = (frame) => {
+    let type = 'message'
+    const data = []
+    for (const line of frame.split('\n')) {
+      if (line.startsWith('event: ')) type = line.slice(7)
+      else if (line.startsWith('data: ')) data.push(line.slice(6))
+      else if (line.startsWith('retry: ')) retryMs = Number(line.slice(7)) || retryMs
+    }
+    if (data.length) onEvent(type, JSON.parse(data.join('\n')))
+  }
+
+  const connect = async () => {
+    while (!controller.signal.aborted) {
+      try {
+        const response = await fetch(`${API_URL}${path}`, {
+          headers: { Authorization: `Bearer ${getToken()}` },
+          signal: controller.signal,
+        })
+        if (response.status === 401 || response.status === 403) return
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+        let buffer = ''
+        for (;;) {
+          const { value, done } = await reader.read()
+          if (done) break
+          buffer += value
+          let end
+          while ((end = buffer.indexOf('\n\n')) >= 0) {
+            dispatch(buffer.slice(0, end))
+            buffer = buffer.slice(end + 2)
+          }
+        }
+      } catch (error) {
+        if (controller.signal.aborted) return
+      }
+      // Events may have been missed while disconnected
+      onEvent('resync', {})
+      await new Promise(resolve => setTimeout(resolve, retryMs))
+    }
+  }
+
+  connect()
+  return () => controller.abort()
+}
+
+export const subscribeToProgress = (onEvent) => subscribeToEvents('/api/events/progress', onEvent)
+
 export default api